@@ -138,8 +138,6 @@ if __name__ == '__main__':
     for game in gameMan.all_games:
         game.init_trans()
 
-    LOGGER.info('Loading sound FX...')
-    sound.load_snd()
     loadScreen.main_loader.step('UI')
 
     LOGGER.info('Initialising UI...')
@@ -148,6 +146,11 @@ if __name__ == '__main__':
 
     loadScreen.main_loader.destroy()
 
+    # Sounds and package images aren't needed to show the window - load
+    # them once it's up. Any used before then are loaded immediately.
+    TK_ROOT.after_idle(sound.load_snd)
+    TK_ROOT.after_idle(extract_packages.extract_images)
+
     if GEN_OPTS.get_bool('General', 'preserve_BEE2_resource_dir'):
         extract_packages.done_callback()
     else:
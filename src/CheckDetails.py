@@ -55,6 +55,8 @@ def truncate(text, width):
 class Item:
     """Represents one item in a CheckDetails list.
 
+    This only holds the data for the row. Widgets are only made for the rows
+    which are in view, and are reused for other items when scrolled.
     """
     def __init__(
             self,
@@ -72,122 +74,180 @@ class Item:
         - state is the initial state of the checkbox.
         """
         self.values = values
-        self.state_var = tk.IntVar(value=bool(state))
+        self._state = bool(state)
         self.master = None  # type: CheckDetails
-        self.check = None  # type: ttk.Checkbutton
         self.locked = lock_check
         self.hover_text = hover_text
-        self.val_widgets = []
+        # The row currently displaying this item, if it's visible.
+        self.row = None  # type: Row
 
     def copy(self):
-        return Item(self.values)
+        return Item(*self.values)
 
-    def make_widgets(self, master: 'CheckDetails'):
+    @property
+    def state(self) -> bool:
+        return self._state
+
+    @state.setter
+    def state(self, value: bool):
+        self._state = bool(value)
+        if self.row is not None:
+            self.row.state_var.set(self._state)
         if self.master is not None:
-            # If we let items move between lists, the old widgets will become
-            # orphaned!
-            raise ValueError(
-                "Can't move Item objects between lists!"
-            )
+            self.master.update_allcheck()
+
 
+class Row:
+    """The widgets for a single row in the list.
+
+    These are reused to display different items as the list is scrolled.
+    """
+    def __init__(self, master: 'CheckDetails'):
         self.master = master
+        self.item = None  # type: Item
+        # The position and column sizes we were last placed with.
+        self.y = None  # type: int
+        self.layout = None
+
+        canvas = master.wid_canvas
+        self.state_var = tk.IntVar(value=False)
         self.check = ttk.Checkbutton(
-            master.wid_frame,
+            canvas,
             variable=self.state_var,
             onvalue=1,
             offvalue=0,
             takefocus=False,
             width=0,
             style='CheckDetails.TCheckbutton',
-            command=self.master.update_allcheck,
+            command=self.check_changed,
+        )
+        self.check_id = canvas.create_window(
+            0, 0,
+            window=self.check,
+            anchor='nw',
+            state='hidden',
         )
-        if self.locked:
-            self.check.state(['disabled'])
 
-        self.val_widgets = []
-        for value in self.values:
+        self.val_widgets = []  # type: List[tk.Label]
+        self.val_ids = []  # type: List[int]
+        for _ in master.headers:
             wid = tk.Label(
-                master.wid_frame,
-                text=value,
+                canvas,
                 justify=tk.LEFT,
                 anchor=tk.W,
                 background='white',
             )
             add_tooltip(wid)
-            if self.hover_text:
-                wid.tooltip_text = self.hover_text
-                wid.hover_override = True
-            else:
-                wid.tooltip_text = ''
-                wid.hover_override = False
+            wid.tooltip_text = ''
+            wid.hover_override = False
 
-            if not self.locked:
-                # Allow clicking on the row to toggle the checkbox
-                wid.bind('<Enter>', self.hover_start, add='+')
-                wid.bind('<Leave>', self.hover_stop, add='+')
-                utils.bind_leftclick(wid, self.row_click, add='+')
-                wid.bind(utils.EVENTS['LEFT_RELEASE'], self.row_unclick, add='+')
+            # Allow clicking on the row to toggle the checkbox
+            wid.bind('<Enter>', self.hover_start, add='+')
+            wid.bind('<Leave>', self.hover_stop, add='+')
+            utils.bind_leftclick(wid, self.row_click, add='+')
+            wid.bind(utils.EVENTS['LEFT_RELEASE'], self.row_unclick, add='+')
 
             self.val_widgets.append(wid)
+            self.val_ids.append(canvas.create_window(
+                0, 0,
+                window=wid,
+                anchor='nw',
+                state='hidden',
+            ))
 
         utils.add_mousewheel(
-            self.master.wid_canvas,
+            canvas,
             self.check,
             *self.val_widgets
         )
 
-    def place(self, check_width, head_pos, y):
-        """Position the widgets on the frame."""
-        self.check.place(
-            x=0,
-            y=y,
+    def show(self, item: Item, y, layout):
+        """Display this item, at the given position.
+
+        layout is the checkbox width and the list of header positions.
+        """
+        if item is self.item and y == self.y and layout == self.layout:
+            return  # No change.
+
+        canvas = self.master.wid_canvas
+        check_width, head_pos = layout
+
+        if item is not self.item:
+            if self.item is not None and self.item.row is self:
+                self.item.row = None
+            self.item = item
+            item.row = self
+            self.state_var.set(item.state)
+            if item.locked:
+                self.check.state(['disabled'])
+            else:
+                self.check.state(['!disabled'])
+            self.layout = None  # Text needs to be redone.
+
+        canvas.coords(self.check_id, 0, y)
+        canvas.itemconfigure(
+            self.check_id,
             width=check_width,
             height=ROW_HEIGHT,
+            state='normal',
         )
-        for text, widget, (x, width) in zip(
-                self.values,
+
+        for text, widget, wid_id, (x, width) in zip(
+                item.values,
                 self.val_widgets,
+                self.val_ids,
                 head_pos
                 ):
-            widget.place(
-                x=x+check_width,
-                y=y,
+            canvas.coords(wid_id, x + check_width, y)
+            canvas.itemconfigure(
+                wid_id,
                 width=width,
                 height=ROW_HEIGHT,
+                state='normal',
             )
-            text = str(text)
-            short_text = widget['text'] = truncate(text, width-5)
-            if not widget.hover_override:
-                if short_text != text:
-                    widget.tooltip_text = text
+            if layout != self.layout:
+                text = str(text)
+                short_text = widget['text'] = truncate(text, width-5)
+                if item.hover_text:
+                    widget.tooltip_text = item.hover_text
+                    widget.hover_override = True
                 else:
-                    widget.tooltip_text = ''
-            x += width
-
-    def destroy(self):
-        """Remove this from the window."""
-        self.check.place_forget()
-        for wid in self.val_widgets:
-            wid.place_forget()
-
-    @property
-    def state(self) -> bool:
-        return self.state_var.get()
-
-    @state.setter
-    def state(self, value: bool):
-        self.state_var.set(value)
-        self.master.update_allcheck()
+                    widget.hover_override = False
+                    if short_text != text:
+                        widget.tooltip_text = text
+                    else:
+                        widget.tooltip_text = ''
+
+        self.y = y
+        self.layout = layout
+
+    def hide(self):
+        """Remove this row from the window."""
+        if self.item is not None and self.item.row is self:
+            self.item.row = None
+        self.item = self.y = self.layout = None
+
+        canvas = self.master.wid_canvas
+        canvas.itemconfigure(self.check_id, state='hidden')
+        for wid_id in self.val_ids:
+            canvas.itemconfigure(wid_id, state='hidden')
+
+    def check_changed(self):
+        """Called when the checkbox is clicked."""
+        if self.item is not None:
+            self.item.state = self.state_var.get()
 
     def hover_start(self, e):
-        self.check.state(['active'])
+        if self.item is not None and not self.item.locked:
+            self.check.state(['active'])
 
     def hover_stop(self, e):
         self.check.state(['!active'])
 
     def row_click(self, e):
-        self.state = not self.state
-        self.check.state(['pressed'])
+        if self.item is not None and not self.item.locked:
+            self.item.state = not self.item.state
+            self.check.state(['pressed'])
 
     def row_unclick(self, e):
         self.check.state(['!pressed'])
@@ -207,6 +267,11 @@ class CheckDetails(ttk.Frame):
         self.parent = parent
         self.headers = list(headers)
         self.items = []  # type: List[Item]
+        # The widgets for the rows in view. Item N is always displayed by
+        # row N % len(rows), so scrolling only changes a few rows.
+        self.rows = []  # type: List[Row]
+        # The checkbox width and header positions, set in refresh().
+        self.layout = (0, [])
         self.sort_ind = None
         self.rev_sort = False  # Should we sort in reverse?
 
@@ -224,13 +289,14 @@ class CheckDetails(ttk.Frame):
 
         def checkbox_enter(e):
             """When hovering over the 'all' checkbox, highlight the others."""
-            for item in self.items:
-                item.check.state(['active'])
+            for row in self.rows:
+                if row.item is not None and not row.item.locked:
+                    row.check.state(['active'])
         self.wid_head_check.bind('<Enter>', checkbox_enter)
 
         def checkbox_leave(e):
-            for item in self.items:
-                item.check.state(['!active'])
+            for row in self.rows:
+                row.check.state(['!active'])
         self.wid_head_check.bind('<Leave>', checkbox_leave)
 
         self.wid_header = tk.PanedWindow(
@@ -248,6 +314,8 @@ class CheckDetails(ttk.Frame):
 
         self.wid_canvas = tk.Canvas(
             self,
+            background='white',
+            highlightthickness=0,
         )
         self.wid_canvas.grid(row=1, column=0, columnspan=2, sticky='NSEW')
         self.columnconfigure(1, weight=1)
@@ -264,7 +332,7 @@ class CheckDetails(ttk.Frame):
             command=self.wid_canvas.yview,
         )
         self.wid_canvas['xscrollcommand'] = self.horiz_scroll.set
-        self.wid_canvas['yscrollcommand'] = self.vert_scroll.set
+        self.wid_canvas['yscrollcommand'] = self._scroll_moved
 
         self.horiz_scroll.grid(row=2, column=0, columnspan=2, sticky='EWS')
         self.vert_scroll.grid(row=1, column=2, sticky='NSE')
@@ -274,13 +342,6 @@ class CheckDetails(ttk.Frame):
         else:
             self.sizegrip = None
 
-        self.wid_frame = tk.Frame(
-            self.wid_canvas,
-            background='white',
-            border=0
-        )
-        self.wid_canvas.create_window(0, 0, window=self.wid_frame, anchor='nw')
-
         self.bind('<Configure>', self.refresh)
         self.bind('<Map>', self.refresh)  # When added to a window, refresh
 
@@ -294,7 +355,6 @@ class CheckDetails(ttk.Frame):
             self.wid_canvas,
 
             self.wid_canvas,
-            self.wid_frame,
             self.wid_header,
         )
 
@@ -346,29 +406,33 @@ class CheckDetails(ttk.Frame):
 
     def add_items(self, *items):
         for item in items:
+            if item.master is not None and item.master is not self:
+                raise ValueError(
+                    "Can't move Item objects between lists!"
+                )
+            item.master = self
             self.items.append(item)
-            item.make_widgets(self)
         self.update_allcheck()
         self.refresh()
 
     def rem_items(self, *items):
         for item in items:
             self.items.remove(item)
-            item.destroy()
+            item.master = None
         self.update_allcheck()
         self.refresh()
 
     def remove_all(self):
         """Remove all items from the list."""
         for item in self.items:
-            item.destroy()
+            item.master = None
         self.items.clear()
         self.update_allcheck()
         self.refresh()
 
     def update_allcheck(self):
         """Update the 'all' checkbox to match the state of sub-boxes."""
-        num_checked = sum(item.state for item in self.items)
+        num_checked = sum(item._state for item in self.items)
         if num_checked == 0:
             self.head_check_var.set(False)
             self.event_generate(EVENT_NO_CHECKS)
@@ -392,7 +456,9 @@ class CheckDetails(ttk.Frame):
 
             # We can't use item.state, since that calls update_allcheck()
             # which would infinite-loop.
-            item.state_var.set(value)
+            item._state = bool(value)
+            if item.row is not None:
+                item.row.state_var.set(value)
         if value and self.items:  # Don't enable if we don't have items
             self.event_generate(EVENT_HAS_CHECKS)
         else:
@@ -412,10 +478,8 @@ class CheckDetails(ttk.Frame):
 
         self.wid_head_check.update_idletasks()
         check_width = self.wid_head_check.winfo_width()
-        pos = ROW_PADDING
-        for item in self.items:
-            item.place(check_width, header_sizes, pos)
-            pos += ROW_HEIGHT + ROW_PADDING
+        self.layout = (check_width, header_sizes)
+        pos = ROW_PADDING + len(self.items) * (ROW_HEIGHT + ROW_PADDING)
 
         # Disable checkbox if no items are present
         if self.items:
@@ -423,11 +487,11 @@ class CheckDetails(ttk.Frame):
         else:
             self.wid_head_check.state(['disabled'])
 
-        self.wid_frame['width'] = width = max(
+        width = max(
             self.wid_canvas.winfo_width(),
             sum(header_sizes[-1]) + check_width,
         )
-        self.wid_frame['height'] = height = max(
+        height = max(
             self.wid_canvas.winfo_height(),
             pos,
         )
@@ -471,9 +535,37 @@ class CheckDetails(ttk.Frame):
             self.vert_scroll.grid_remove()
 
         # Set the size of the canvas
-        self.wid_frame.update_idletasks()
-
         self.wid_canvas['scrollregion'] = (0, 0, width, height)
+        self.update_rows()
+
+    def _scroll_moved(self, first, last):
+        """Called when the canvas is scrolled, to update the visible rows."""
+        self.vert_scroll.set(first, last)
+        self.update_rows()
+
+    def update_rows(self):
+        """Display the items which are in view."""
+        canvas = self.wid_canvas
+        row_size = ROW_HEIGHT + ROW_PADDING
+        # Include an extra row on each side, for partially visible rows.
+        row_count = canvas.winfo_height() // row_size + 2
+        while len(self.rows) < row_count:
+            self.rows.append(Row(self))
+
+        # canvasy() gives the canvas position at the top of the view.
+        first = max(0, int(canvas.canvasy(0)) // row_size)
+        row_count = len(self.rows)
+        for row_ind, row in enumerate(self.rows):
+            # The index of the visible item that this row should display.
+            item_ind = first + (row_ind - first) % row_count
+            if item_ind < len(self.items):
+                row.show(
+                    self.items[item_ind],
+                    ROW_PADDING + item_ind * row_size,
+                    self.layout,
+                )
+            else:
+                row.hide()
 
     def sort(self, index, e=None):
         """Click event for headers."""
@@ -497,11 +589,11 @@ class CheckDetails(ttk.Frame):
 
     def checked(self) -> Iterator[Item]:
         """Yields enabled check items."""
-        return (item for item in self.items if item.state_var.get())
+        return (item for item in self.items if item.state)
 
     def unchecked(self) -> Iterator[Item]:
         """Yields disabled check items."""
-        return (item for item in self.items if not item.state_var.get())
+        return (item for item in self.items if not item.state)
 
 
 if __name__ == '__main__':
@@ -2,7 +2,6 @@ from tkinter import *
 from tk_tools import TK_ROOT
 from tkinter import ttk
 
-from collections import namedtuple
 import functools
 import operator
 
@@ -11,70 +10,12 @@ import img as png
 from BEE2_config import GEN_OPTS
 from SubPane import SubPane
 import packageLoader
+from packageLoader import stylevar, styleOptions
 import tooltip
 import utils
 
 from typing import Union
 
-stylevar = namedtuple('stylevar', 'id name default desc')
-
-# Special StyleVars that are hardcoded into the BEE2
-# These are effectively attributes of Portal 2 itself, and always work
-# in every style.
-styleOptions = [
-    # ID, Name, default value
-    stylevar(
-        id='MultiverseCave',
-        name=_('Multiverse Cave'),
-        default=1,
-        desc=_('Play the Workshop Cave Johnson lines on map start.')
-    ),
-
-    stylevar(
-        id='FixFizzlerBump',
-        name=_('Prevent Portal Bump (fizzler)'),
-        default=0,
-        desc=_('Add portal bumpers to make it more difficult to portal across '
-               'fizzler edges. This can prevent placing portals in tight '
-               'spaces near fizzlers, or fizzle portals on activation.')
-    ),
-
-    stylevar(
-        id='NoMidVoices',
-        name=_('Suppress Mid-Chamber Dialogue'),
-        default=0,
-        desc=_('Disable all voicelines other than entry and exit lines.')
-    ),
-
-    stylevar(
-        id='UnlockDefault',
-        name=_('Unlock Default Items'),
-        default=0,
-        desc=_('Allow placing and deleting the mandatory Entry/Exit Doors and '
-               'Large Observation Room. Use with caution, this can have weird '
-               'results!')
-    ),
-
-    stylevar(
-        id='AllowGooMist',
-        name=_('Allow Adding Goo Mist'),
-        default=1,
-        desc=_('Add mist particles above Toxic Goo in certain styles. This can '
-               'increase the entity count significantly with large, complex '
-               'goo pits, so disable if needed.')
-    ),
-
-    stylevar(
-        id='FunnelAllowSwitchedLights',
-        name=_('Light Reversible Excursion Funnels'),
-        default=1,
-        desc=_('Funnels emit a small amount of light. However, if multiple funnels'
-               'are near each other and can reverse polarity, this can cause '
-               'lighting issues. Disable this to prevent that by disabling '
-               'lights. Non-reversible Funnels do not have this issue.'),
-    )
-]
-
 checkbox_all = {}
 checkbox_chosen = {}
 checkbox_other = {}
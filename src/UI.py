@@ -44,6 +44,8 @@ pal_picked = []  # array of the picker icons
 pal_items = []  # array of the "all items" icons
 pal_picked_fake = []  # Labels used for the empty palette positions
 pal_items_fake = []  # Labels for empty picker positions
+# Set when flow_picker() is scheduled to run when Tk is idle.
+picker_flow_pending = False
 
 ItemsBG = "#CDD0CE"  # Colour of the main background to match the menu image
 
@@ -963,7 +965,7 @@ def drag_stop(e):
     drag_win.unbind("<B1-Motion>")
     drag_win.grab_release()
     clear_disp_name()
-    UI['pre_sel_line'].place_forget()
+    unplace(UI['pre_sel_line'])
     UI['pre_moving'].place_forget()
     snd.fx('config')
 
@@ -1008,7 +1010,7 @@ def drag_move(e):
     pos_x, pos_y = conv_screen_to_grid(e.x_root, e.y_root)
     if 0 <= pos_x < 4 and 0 <= pos_y < 8:
         drag_win.configure(cursor=utils.CURSORS['move_item'])
-        UI['pre_sel_line'].place(x=pos_x*65+3, y=pos_y*65+33)
+        place_at(UI['pre_sel_line'], pos_x*65+3, pos_y*65+33)
         if not drag_win.passed_over_pal:
             # If we've passed over the palette, replace identical items
             # with movement icons to indicate they will move to the new location
@@ -1027,7 +1029,7 @@ def drag_move(e):
             drag_win.configure(cursor=utils.CURSORS['destroy_item'])
         else:
             drag_win.configure(cursor=utils.CURSORS['invalid_drag'])
-        UI['pre_sel_line'].place_forget()
+        unplace(UI['pre_sel_line'])
 
 
 def drag_fast(e):
@@ -1372,26 +1374,46 @@ def init_option(f):
         )
 
 
+def place_at(widget, x: int, y: int) -> bool:
+    """Place a widget at the given position, if it isn't there already.
+
+    This returns True if the widget was moved.
+    """
+    pos = (x, y)
+    if getattr(widget, 'grid_slot', None) == pos:
+        return False
+    widget.place(x=x, y=y)
+    widget.grid_slot = pos
+    return True
+
+
+def unplace(widget):
+    """Remove a widget placed by place_at(), if it's visible."""
+    if getattr(widget, 'grid_slot', None) is not None:
+        widget.place_forget()
+        widget.grid_slot = None
+
+
 def flow_preview():
     """Position all the preview icons based on the array.
 
-    Run to refresh if items are moved around.
+    Run to refresh if items are moved around. Only items which changed
+    position are moved.
     """
     for i, item in enumerate(pal_picked):
         # these can be referred to to figure out where it is
         item.pre_x = i % 4
         item.pre_y = i // 4
-        item.place(x=(i % 4*65 + 4), y=(i // 4*65 + 32))
+        if place_at(item, i % 4*65 + 4, i // 4*65 + 32):
+            item.lift()
         # Check to see if this should use the single-icon
         item.load_data()
-        item.lift()
 
     item_count = len(pal_picked)
     for ind, fake in enumerate(pal_picked_fake):
         if ind < item_count:
-            fake.place_forget()
-        else:
-            fake.place(x=(ind % 4*65+4), y=(ind//4*65+32))
+            unplace(fake)
+        elif place_at(fake, ind % 4*65+4, ind//4*65+32):
             fake.lift()
     UI['pre_sel_line'].lift()
 
@@ -1493,9 +1515,17 @@ def init_picker(f):
 def flow_picker(e=None):
     """Update the picker box so all items are positioned corrctly.
 
-    Should be run (e arg is ignored) whenever the items change, or the
-    window changes shape.
+    Should be run whenever the items change, or the window changes shape.
+    When called as an event handler, the reflow is delayed until Tk is
+    idle, so a series of resize events only reflows once.
     """
+    global picker_flow_pending
+    if e is not None:
+        if not picker_flow_pending:
+            picker_flow_pending = True
+            TK_ROOT.after_idle(flow_picker_idle)
+        return
+
     frmScroll.update_idletasks()
     frmScroll['width'] = pal_canvas.winfo_width()
     if tagsPane.is_expanded:
@@ -1514,17 +1544,19 @@ def flow_picker(e=None):
     width = (pal_canvas.winfo_width() - 10) // 65
     if width < 1:
         width = 1  # we got way too small, prevent division by zero
-    vis_items = [it for it in pal_items if it.visible]
-    num_items = len(vis_items)
-    for i, item in enumerate(vis_items):
-        item.is_pre = False
-        item.place(
-            x=((i % width) * 65 + 1),
-            y=((i // width) * 65 + 1),
+    num_items = 0
+    for item in pal_items:
+        if item.visible:
+            item.is_pre = False
+            place_at(
+                item,
+                (num_items % width) * 65 + 1,
+                (num_items // width) * 65 + 1,
             )
+            num_items += 1
+        else:
+            unplace(item)
 
-    for item in (it for it in pal_items if not it.visible):
-        item.place_forget()
     height = (num_items // width + 1) * 65 + 2
     pal_canvas['scrollregion'] = (
         0,
@@ -1536,16 +1568,26 @@ def flow_picker(e=None):
 
     # This adds extra blank items on the end to finish the grid nicely.
     for i in range(width):
-        if i not in pal_items_fake:
+        if i >= len(pal_items_fake):
             pal_items_fake.append(ttk.Label(frmScroll, image=img.PAL_BG_64))
         if (num_items % width) <= i < width:  # if this space is empty
-            pal_items_fake[i].place(
-                x=((i % width)*65 + 1),
-                y=(num_items // width)*65 + offset + 1,
+            place_at(
+                pal_items_fake[i],
+                (i % width)*65 + 1,
+                (num_items // width)*65 + offset + 1,
             )
+        else:
+            unplace(pal_items_fake[i])
 
     for item in pal_items_fake[width:]:
-        item.place_forget()
+        unplace(item)
+
+
+def flow_picker_idle():
+    """Run the reflow scheduled by flow_picker()."""
+    global picker_flow_pending
+    picker_flow_pending = False
+    flow_picker()
 
 
 def init_drag_icon():
@@ -1941,7 +1983,9 @@ def init_windows():
         # Disable this if the style doesn't have elevators
         elev_win.readonly = not style_obj.has_video
 
-        tagsPane.filter_items()  # Update filters (authors may have changed)
+        # Authors and tags may have changed, so update the index.
+        tagsPane.refresh_tags()
+        tagsPane.filter_items()
 
         CompilerPane.set_corr_values('sp_entry', style_obj.corridor_names)
         CompilerPane.set_corr_values('sp_exit', style_obj.corridor_names)
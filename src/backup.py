@@ -21,14 +21,17 @@ from tk_tools import TK_ROOT
 from datetime import datetime
 from io import BytesIO
 from codecs import EncodedFile
+from concurrent.futures import ThreadPoolExecutor
+import threading
 import time
+import hashlib
 import os
 import shutil
 import string
 import atexit
 
 from FakeZip import FakeZip, zip_names, zip_open_bin
-from zipfile import ZipFile, ZIP_LZMA
+from zipfile import ZipFile, ZipInfo, ZIP_LZMA, ZIP_STORED
 
 from tooltip import add_tooltip
 from srctools import Property, KeyValError
@@ -39,7 +42,7 @@ import tk_tools
 import gameMan
 import srctools
 
-from typing import List
+from typing import List, Dict, Tuple, Optional, Callable
 
 # The backup window - either a toplevel, or TK_ROOT.
 window = None  # type: tk.Toplevel
@@ -53,8 +56,14 @@ AUTO_BACKUP_STAGE = 'BACKUP_ZIP'
 
 # Characters allowed in the backup filename
 BACKUP_CHARS = set(string.ascii_letters + string.digits + '_-.')
-# Format for the backup filename
-AUTO_BACKUP_FILE = 'back_{game}{ind}.zip'
+# Format for the auto-backup manifest filename
+AUTO_BACKUP_FILE = 'back_{game}{ind}.manifest'
+# Folder in the backup directory which holds the contents of auto-backed up
+# files, named by their hash. Each manifest lists the files in a backup.
+AUTO_BACKUP_STORE = 'store'
+# Format for auto-backups from older versions, which were full zips.
+# These are converted to manifests the next time we backup.
+AUTO_BACKUP_LEGACY = 'back_{game}{ind}.zip'
 
 HEADERS = ['Name', 'Mode', 'Date']
 
@@ -92,16 +101,37 @@ copy_loader = LoadScreen(
     title_text=_('Copying maps'),
 )
 
-reading_loader = LoadScreen(
-    ('READ', ''),
-    title_text=_('Loading maps'),
-)
-
 deleting_loader = LoadScreen(
     ('DELETE', ''),
     title_text=_('Deleting maps'),
 )
 
+# The keys in the P2C header we display. Once these are found we can
+# stop reading the file.
+P2C_HEADER_KEYS = {
+    'title',
+    'description',
+    'coop',
+    'timestamp_created',
+    'timestamp_modified',
+}
+
+# Header info for P2Cs in game folders, keyed by (path, mtime, size).
+P2C_CACHE = {}  # type: Dict[Tuple[str, float, int], dict]
+
+# Number of threads used to read P2C files.
+SCAN_THREADS = 4
+# Delay in milliseconds between checking for newly read maps.
+SCAN_POLL_DELAY = 50
+# The thread pool, created when first needed.
+_scan_pool = None  # type: ThreadPoolExecutor
+
+# The MapScan currently filling each list.
+SCANS = {
+    'game': None,
+    'back': None,
+}  # type: Dict[str, Optional[MapScan]]
+
 
 class P2C:
     """A PeTI map."""
@@ -124,53 +154,114 @@ class P2C:
         self.is_coop = is_coop
 
     @classmethod
-    def from_file(cls, path, zip_file):
+    def from_file(cls, path, zip_file, reader=None):
         """Initialise from a file.
 
         path is the file path for the map inside the zip, without extension.
         zip_file is either a ZipFile or FakeZip object.
+        If set, the file is read from reader instead of zip_file - this
+        should be a copy of the same zip.
         """
-        # Some P2Cs may have non-ASCII characters in descriptions, so we
-        # need to read it as bytes and convert to utf-8 ourselves - zips
-        # don't convert encodings automatically for us.
+        cache_key = cls.cache_key(path, zip_file)
         try:
-            with zip_open_bin(zip_file, path + '.p2c') as file:
-                props = Property.parse(
-                    # Decode the P2C as UTF-8, and skip unknown characters.
-                    # We're only using it for display purposes, so that should
-                    # be sufficent.
-                    EncodedFile(
-                        file,
-                        data_encoding='utf-8',
-                        errors='replace',
-                    ),
-                    path,
-                )
-        except KeyValError:
-            # Silently fail if we can't parse the file. That way it's still
-            # possible to backup.
-            LOGGER.warning('Failed parsing puzzle file!', path, exc_info=True)
-            props = Property('portal2_puzzle', [])
-            title = None
-            desc = _('Failed to parse this puzzle file. It can still be backed up.')
-        else:
-            props = props.find_key('portal2_puzzle', [])
-            title = props['title', None]
-            desc = props['description', _('No description found.')]
+            info = P2C_CACHE[cache_key]
+        except KeyError:
+            info = cls.read_info(path, reader or zip_file)
+            if cache_key is not None:
+                P2C_CACHE[cache_key] = info
 
+        return cls(
+            filename=os.path.basename(path),
+            zip_file=zip_file,
+            **info
+        )
 
+    @classmethod
+    def from_cache(cls, path, zip_file) -> Optional['P2C']:
+        """Initialise from the cache, if this file was read previously."""
+        try:
+            info = P2C_CACHE[cls.cache_key(path, zip_file)]
+        except KeyError:
+            return None
+        return cls(
+            filename=os.path.basename(path),
+            zip_file=zip_file,
+            **info
+        )
+
+    @staticmethod
+    def cache_key(path, zip_file) -> Optional[Tuple[str, float, int]]:
+        """Return the key used in P2C_CACHE for this file.
+
+        Only files on disk are cached, since zips may change without
+        altering the name.
+        """
+        if not isinstance(zip_file, FakeZip):
+            return None
+        full_path = os.path.join(zip_file.folder, path + '.p2c')
+        try:
+            stat = os.stat(full_path)
+        except OSError:
+            return None
+        return full_path, stat.st_mtime, stat.st_size
+
+    @staticmethod
+    def read_info(path, zip_file) -> dict:
+        """Read the header information from a P2C.
+
+        The result is the keyword arguments for P2C(), other than the
+        filename and zip.
+        """
+        with zip_open_bin(zip_file, path + '.p2c') as file:
+            props = read_p2c_header(file)
+
+        if props is None:
+            # Something complicated, use the full parser.
+            # Some P2Cs may have non-ASCII characters in descriptions, so we
+            # need to read it as bytes and convert to utf-8 ourselves - zips
+            # don't convert encodings automatically for us.
+            try:
+                with zip_open_bin(zip_file, path + '.p2c') as file:
+                    props = Property.parse(
+                        # Decode the P2C as UTF-8, and skip unknown
+                        # characters. We're only using it for display
+                        # purposes, so that should be sufficent.
+                        EncodedFile(
+                            file,
+                            data_encoding='utf-8',
+                            errors='replace',
+                        ),
+                        path,
+                    )
+            except KeyValError:
+                # Silently fail if we can't parse the file. That way it's
+                # still possible to backup.
+                LOGGER.warning('Failed parsing puzzle file!', path, exc_info=True)
+                props = {}
+                title = None
+                desc = _('Failed to parse this puzzle file. It can still be backed up.')
+            else:
+                props = {
+                    prop.name: prop.value
+                    for prop in
+                    props.find_key('portal2_puzzle', [])
+                    if prop.name in P2C_HEADER_KEYS
+                }
+                title = props.get('title', None)
+                desc = props.get('description', _('No description found.'))
+        else:
+            title = props.get('title', None)
+            desc = props.get('description', _('No description found.'))
 
         if title is None:
             title = '<' + path.rsplit('/', 1)[-1] + '.p2c>'
 
-        return cls(
-            filename=os.path.basename(path),
-            zip_file=zip_file,
+        return dict(
             title=title,
             desc=desc,
-            is_coop=srctools.conv_bool(props['coop', '0']),
-            create_time=Date(props['timestamp_created', '']),
-            mod_time=Date(props['timestamp_modified', '']),
+            is_coop=srctools.conv_bool(props.get('coop', '0')),
+            create_time=Date(props.get('timestamp_created', '')),
+            mod_time=Date(props.get('timestamp_modified', '')),
         )
 
     def copy(self):
@@ -255,36 +346,169 @@ class Date:
         return self.date != other.date
 
 
-# Note: All the backup functions use zip files, but also work on FakeZip
-# directories.
+def read_p2c_header(file) -> Optional[Dict[str, str]]:
+    """Read the header keys from a P2C file.
 
+    file should be opened in binary mode. This stops reading once all the
+    keys in P2C_HEADER_KEYS are found, or the first sub-block in the puzzle
+    begins. If the file uses syntax we don't handle, None is returned so the
+    full parser can be used instead.
+    """
+    found = {}  # type: Dict[str, str]
+    depth = 0
+    for line in file:
+        line = line.decode('utf-8', 'replace').strip()
+        if not line or line.startswith('//'):
+            continue
+        if line == '{':
+            depth += 1
+            if depth > 1:
+                # The header keys are all before the sub-blocks.
+                break
+            continue
+        elif line == '}':
+            break
+        elif line[0] != '"' or '\\' in line:
+            return None
+
+        parts = line.split('"')
+        if len(parts) == 3 and not parts[2]:
+            # A block name. This must be 'portal2_puzzle' at the top.
+            if depth == 0 and parts[1].casefold() != 'portal2_puzzle':
+                return None
+            continue
+        elif len(parts) != 5 or parts[2].strip() or parts[4] or depth != 1:
+            return None
 
-def load_backup(zip_file):
-    """Load in a backup file."""
-    maps = []
-    puzzles = [
-        file[:-4]  # Strip extension
-        for file in
-        zip_names(zip_file)
-        if file.endswith('.p2c')
-    ]
-    # Each P2C init requires reading in the properties file, so this may take
-    # some time. Use a loading screen.
-    reading_loader.set_length('READ', len(puzzles))
-    LOGGER.info('Loading {} maps..', len(puzzles))
-    with reading_loader:
+        key = parts[1].casefold()
+        if key in P2C_HEADER_KEYS:
+            found[key] = parts[3]
+            if len(found) == len(P2C_HEADER_KEYS):
+                break
+    return found
+
+
+def get_scan_pool() -> ThreadPoolExecutor:
+    """Return the thread pool used to read P2C files."""
+    global _scan_pool
+    if _scan_pool is None:
+        _scan_pool = ThreadPoolExecutor(max_workers=SCAN_THREADS)
+    return _scan_pool
+
+
+class MapScan:
+    """Reads the maps in a backup or game folder in the background.
+
+    Maps are passed to the callback in batches as they're read.
+    Cached maps are passed immediately.
+
+    ZipFile isn't thread-safe, and the main thread may read from the
+    backup while we're scanning. So each worker thread reads from its own
+    copy of the zip instead. Folders can be read from any thread.
+    """
+    def __init__(self, zip_file, callback: Callable[[List['P2C']], None]):
+        self.callback = callback
+        self.cancelled = False
+        self.zip_file = zip_file
+        self.pending = []  # Futures for each map being read.
+
+        if isinstance(zip_file, FakeZip):
+            self._zip_data = None
+        else:
+            # The zip is in memory, so copy what's there now.
+            self._zip_data = zip_file.fp.getvalue()  # type: Optional[bytes]
+        self._local = threading.local()
+
+        puzzles = [
+            file[:-4]  # Strip extension
+            for file in
+            zip_names(zip_file)
+            if file.endswith('.p2c')
+        ]
+        LOGGER.info('Loading {} maps..', len(puzzles))
+
+        cached = []
+        pool = get_scan_pool()
         for file in puzzles:
-            new_map = P2C.from_file(file, zip_file)
-            maps.append(new_map)
-            LOGGER.debug(
-                'Loading {} map "{}"',
-                'coop' if new_map.is_coop else 'sp',
-                new_map.title,
-            )
-            reading_loader.step('READ')
-    LOGGER.info('Done!')
+            p2c = P2C.from_cache(file, zip_file)
+            if p2c is None:
+                self.pending.append(pool.submit(self.read_map, file))
+            else:
+                cached.append(p2c)
+        LOGGER.info('{} maps were cached.', len(cached))
+
+        if cached:
+            self.callback(cached)
+        self.poll()
+
+    def read_map(self, path: str) -> 'P2C':
+        """Read a map. This runs in the worker threads."""
+        if self._zip_data is None:
+            return P2C.from_file(path, self.zip_file)
+        try:
+            reader = self._local.reader
+        except AttributeError:
+            reader = self._local.reader = ZipFile(BytesIO(self._zip_data))
+        return P2C.from_file(path, self.zip_file, reader)
+
+    def cancel(self):
+        """Stop adding maps to the list."""
+        self.cancelled = True
+        for future in self.pending:
+            future.cancel()
+        self.pending.clear()
+
+    def poll(self):
+        """Pass along any maps that have been read since the last check."""
+        if self.cancelled:
+            return
+        maps = []
+        still_pending = []
+        for future in self.pending:
+            if not future.done():
+                still_pending.append(future)
+                continue
+            try:
+                maps.append(future.result())
+            except Exception:
+                LOGGER.warning('Failed reading puzzle file!', exc_info=True)
+        self.pending = still_pending
+
+        if maps:
+            self.callback(maps)
+        if self.pending:
+            TK_ROOT.after(SCAN_POLL_DELAY, self.poll)
+        else:
+            LOGGER.info('Done!')
+
+
+def start_scan(kind: str, zip_file):
+    """Read the maps in a zip, adding them to the 'game' or 'back' list."""
+    cancel_scan(kind)
+    details = UI[kind + '_details']  # type: CheckDetails
+
+    def add_maps(maps: List[P2C]):
+        """Add newly read maps to the list."""
+        BACKUPS[kind].extend(maps)
+        details.add_items(*(
+            peti_map.make_item()
+            for peti_map in
+            maps
+        ))
+
+    SCANS[kind] = MapScan(zip_file, add_maps)
+
+
+def cancel_scan(kind: str):
+    """Stop any scan filling the 'game' or 'back' list."""
+    scan = SCANS[kind]
+    if scan is not None:
+        scan.cancel()
+        SCANS[kind] = None
+
 
-    return maps
+# Note: All the backup functions use zip files, but also work on FakeZip
+# directories.
 
 
 def load_game(game: 'gameMan.Game'):
@@ -295,10 +519,10 @@ def load_game(game: 'gameMan.Game'):
     if puzz_path:
         BACKUPS['game_path'] = puzz_path
         BACKUPS['game_zip'] = zip_file = FakeZip(puzz_path)
-        maps = load_backup(zip_file)
 
-        BACKUPS['game'] = maps
+        BACKUPS['game'] = []
         refresh_game_details()
+        start_scan('game', zip_file)
 
 
 def find_puzzles(game: 'gameMan.Game'):
@@ -358,10 +582,134 @@ def backup_maps(maps):
     refresh_back_details()
 
 
+def hash_file(path: str) -> str:
+    """Return the hash used to identify a file in the backup store."""
+    # Only SHA512 is available in the frozen build.
+    sha = hashlib.sha512()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            sha.update(chunk)
+    return sha.hexdigest()[:32]
+
+
+def store_path(backup_dir: str, file_hash: str) -> str:
+    """Return the location of a file in the backup store."""
+    return os.path.join(
+        backup_dir,
+        AUTO_BACKUP_STORE,
+        file_hash[:2],
+        file_hash,
+    )
+
+
+def read_manifest(path: str) -> Dict[str, Tuple[str, int, int]]:
+    """Read an auto-backup manifest.
+
+    This maps filenames to (hash, size, mtime_ns).
+    If the manifest doesn't exist, this is empty.
+    """
+    files = {}
+    try:
+        with open(path, encoding='utf8') as f:
+            for line in f:
+                line = line.rstrip('\n')
+                if not line:
+                    continue
+                file_hash, size, mtime, filename = line.split('\t', 3)
+                files[filename] = file_hash, int(size), int(mtime)
+    except FileNotFoundError:
+        pass
+    except ValueError:
+        LOGGER.warning('Invalid backup manifest "{}"!', path, exc_info=True)
+    return files
+
+
+def write_manifest(path: str, files: Dict[str, Tuple[str, int, int]]):
+    """Write an auto-backup manifest."""
+    with open(path + '.tmp', 'w', encoding='utf8') as f:
+        for filename, (file_hash, size, mtime) in sorted(files.items()):
+            f.write('{}\t{}\t{}\t{}\n'.format(
+                file_hash, size, mtime, filename,
+            ))
+    os.replace(path + '.tmp', path)
+
+
+def manifest_to_zip(manifest_path: str, zip_file: ZipFile):
+    """Copy the files in an auto-backup into a zip."""
+    backup_dir = os.path.dirname(manifest_path)
+    files = read_manifest(manifest_path)
+    for filename, (file_hash, size, mtime) in sorted(files.items()):
+        info = ZipInfo(filename, time.localtime(mtime / 1e9)[:6])
+        info.compress_type = zip_file.compression
+        with open(store_path(backup_dir, file_hash), 'rb') as f:
+            zip_file.writestr(info, f.read())
+
+
+def migrate_legacy_zip(zip_path: str, manifest_path: str):
+    """Convert an auto-backup zip from an older version into a manifest.
+
+    The files are added to the store, then the zip is deleted.
+    If the manifest already exists, the zip is just removed.
+    """
+    backup_dir = os.path.dirname(manifest_path)
+    if not os.path.exists(manifest_path):
+        LOGGER.info('Converting old backup "{}"', zip_path)
+        files = {}  # type: Dict[str, Tuple[str, int, int]]
+        try:
+            with ZipFile(zip_path) as zip_file:
+                for info in zip_file.infolist():
+                    data = zip_file.read(info)
+                    file_hash = hashlib.sha512(data).hexdigest()[:32]
+                    dest = store_path(backup_dir, file_hash)
+                    if not os.path.isfile(dest):
+                        os.makedirs(os.path.dirname(dest), exist_ok=True)
+                        with open(dest + '.tmp', 'wb') as f:
+                            f.write(data)
+                        os.replace(dest + '.tmp', dest)
+                    mtime = time.mktime(info.date_time + (0, 0, -1))
+                    files[info.filename] = (
+                        file_hash,
+                        len(data),
+                        int(mtime * 1e9),
+                    )
+        except (OSError, ValueError):  # BadZipFile is a ValueError.
+            LOGGER.warning(
+                'Could not convert old backup "{}"!',
+                zip_path,
+                exc_info=True,
+            )
+            return
+        write_manifest(manifest_path, files)
+    os.remove(zip_path)
+
+
+def clean_store(backup_dir: str):
+    """Remove files from the store which no backups use."""
+    used = set()
+    for filename in os.listdir(backup_dir):
+        if filename.endswith('.manifest'):
+            used.update(
+                file_hash
+                for file_hash, size, mtime in
+                read_manifest(os.path.join(backup_dir, filename)).values()
+            )
+
+    store = os.path.join(backup_dir, AUTO_BACKUP_STORE)
+    removed = 0
+    for dirpath, dirnames, filenames in os.walk(store):
+        for filename in filenames:
+            if filename not in used:
+                os.remove(os.path.join(dirpath, filename))
+                removed += 1
+    LOGGER.info('Removed {} unused files from the backup store.', removed)
+
+
 def auto_backup(game: 'gameMan.Game', loader: LoadScreen):
     """Perform an automatic backup for the given game.
 
     We do this seperately since we don't need to read the property files.
+    Each file is stored once by its hash, so unchanged files are shared
+    between generations, and each generation is just a manifest.
     """
     from BEE2_config import GEN_OPTS
     if not GEN_OPTS.get_bool('General', 'enable_auto_backup'):
@@ -377,7 +725,11 @@ def auto_backup(game: 'gameMan.Game', loader: LoadScreen):
     # Keep this many previous
     extra_back_count = GEN_OPTS.get_int('General', 'auto_backup_count', 0)
 
-    to_backup = os.listdir(folder)
+    to_backup = [
+        file
+        for file in os.listdir(folder)
+        if os.path.isfile(os.path.join(folder, file))
+    ]
     backup_dir = GEN_OPTS.get_val('Directories', 'backup_loc', 'backups/')
 
     os.makedirs(backup_dir, exist_ok=True)
@@ -391,6 +743,27 @@ def auto_backup(game: 'gameMan.Game', loader: LoadScreen):
 
     loader.set_length(AUTO_BACKUP_STAGE, len(to_backup))
 
+    # Older versions saved each generation as a full zip. Convert those
+    # so they're still rotated and pruned along with the new ones.
+    for ind in [''] + ['_' + str(i+1) for i in range(extra_back_count)]:
+        legacy = os.path.join(
+            backup_dir,
+            AUTO_BACKUP_LEGACY.format(game=safe_name, ind=ind),
+        )
+        if os.path.isfile(legacy):
+            migrate_legacy_zip(legacy, os.path.join(
+                backup_dir,
+                AUTO_BACKUP_FILE.format(game=safe_name, ind=ind),
+            ))
+
+    final_backup = os.path.join(
+        backup_dir,
+        AUTO_BACKUP_FILE.format(game=safe_name, ind=''),
+    )
+    # Files whose size and modification time match the last backup don't
+    # need to be hashed again.
+    prev_files = read_manifest(final_backup)
+
     if extra_back_count:
         back_files = [
             AUTO_BACKUP_FILE.format(game=safe_name, ind='')
@@ -399,7 +772,7 @@ def auto_backup(game: 'gameMan.Game', loader: LoadScreen):
             for i in range(extra_back_count)
         ]
         # Move each file over by 1 index, ignoring missing ones
-        # We need to reverse to ensure we don't overwrite any zips
+        # We need to reverse to ensure we don't overwrite any manifests
         for old_name, new_name in reversed(
                 list(zip(back_files, back_files[1:]))
                 ):
@@ -419,20 +792,40 @@ def auto_backup(game: 'gameMan.Game', loader: LoadScreen):
             except FileNotFoundError:
                 pass
 
-    final_backup = os.path.join(
-        backup_dir,
-        AUTO_BACKUP_FILE.format(game=safe_name, ind=''),
-    )
     LOGGER.info('Writing backup to "{}"', final_backup)
-    with open(final_backup, 'wb') as f:
-        with ZipFile(f, mode='w', compression=ZIP_LZMA) as zip_file:
-            for file in to_backup:
-                zip_file.write(
-                    os.path.join(folder, file),
-                    file,
-                    ZIP_LZMA,
-                )
-                loader.step(AUTO_BACKUP_STAGE)
+    files = {}  # type: Dict[str, Tuple[str, int, int]]
+    reused = 0
+    for file in to_backup:
+        path = os.path.join(folder, file)
+        stat = os.stat(path)
+        try:
+            file_hash, size, mtime = prev_files[file]
+        except KeyError:
+            file_hash = None
+        else:
+            if size != stat.st_size or mtime != stat.st_mtime_ns:
+                file_hash = None
+        if file_hash is None:
+            file_hash = hash_file(path)
+
+        dest = store_path(backup_dir, file_hash)
+        if os.path.isfile(dest):
+            reused += 1
+        else:
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            shutil.copyfile(path, dest + '.tmp')
+            os.replace(dest + '.tmp', dest)
+
+        files[file] = file_hash, stat.st_size, stat.st_mtime_ns
+        loader.step(AUTO_BACKUP_STAGE)
+
+    write_manifest(final_backup, files)
+    LOGGER.info(
+        'Backed up {} files, {} were already stored.',
+        len(files),
+        reused,
+    )
+    clean_store(backup_dir)
 
 
 def save_backup():
@@ -571,32 +964,45 @@ def ui_load_backup():
     """Prompt and load in a backup file."""
     file = filedialog.askopenfilename(
         title=_('Load Backup'),
-        filetypes=[(_('Backup zip'), '.zip')],
+        filetypes=[
+            (_('Backup zip'), '.zip'),
+            (_('Auto-backup'), '.manifest'),
+        ],
     )
     if not file:
         return
 
-    BACKUPS['backup_path'] = file
-    with open(file, 'rb') as f:
-        # Read the backup zip into memory!
-        data = f.read()
-        BACKUPS['unsaved_file'] = unsaved = BytesIO(data)
+    if file.endswith('.manifest'):
+        # Build a zip from the backup store. Saving must pick a new file,
+        # so we don't overwrite the manifest.
+        BACKUPS['backup_path'] = None
+        BACKUPS['unsaved_file'] = unsaved = BytesIO()
+        with ZipFile(unsaved, mode='w', compression=ZIP_STORED) as zip_file:
+            manifest_to_zip(file, zip_file)
+    else:
+        BACKUPS['backup_path'] = file
+        with open(file, 'rb') as f:
+            # Read the backup zip into memory!
+            data = f.read()
+            BACKUPS['unsaved_file'] = unsaved = BytesIO(data)
 
     BACKUPS['backup_zip'] = zip_file = ZipFile(
         unsaved,
         mode='a',
         compression=ZIP_LZMA,
     )
-    BACKUPS['back'] = load_backup(zip_file)
+    BACKUPS['back'] = []
 
     BACKUPS['backup_name'] = os.path.basename(file)
     backup_name.set(BACKUPS['backup_name'])
 
     refresh_back_details()
+    start_scan('back', zip_file)
 
 
 def ui_new_backup():
     """Create a new backup file."""
+    cancel_scan('back')
     BACKUPS['back'].clear()
     BACKUPS['backup_name'] = None
     BACKUPS['backup_path'] = None
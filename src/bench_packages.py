@@ -0,0 +1,530 @@
+"""Benchmark loading and exporting packages.
+
+This generates synthetic packages, in the same layout as the real ones -
+an info.txt listing the objects, items/<folder>/ with properties.txt,
+editoritems.txt and vbsp_config.cfg, styles/<folder>/ and images in
+resources/BEE2/. These are then read by packageLoader, with the loading
+screen replaced so no Tk window is needed. Each stage is timed with
+utils.span(), and the spans (with the change in memory and net change in
+allocated blocks) are printed as JSON. Use --output to append the results
+to a file, so they can be compared across commits.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from zipfile import ZipFile, ZIP_DEFLATED
+
+from srctools import Property
+
+from bench_vbsp import read_metrics
+import utils
+
+from typing import List, Dict
+
+# The first package, which all others require.
+CORE_PACKAGE = 'BENCH_CORE'
+
+# Size of the fake PNG files.
+IMAGE_SIZE = 2048
+
+
+def style_id(index: int) -> str:
+    """The ID of a synthetic style."""
+    return 'BENCH_STYLE_{}'.format(index)
+
+
+def item_id(index: int) -> str:
+    """The ID of a synthetic item."""
+    return 'BENCH_ITEM_{}'.format(index)
+
+
+def make_properties(item_num: int, icon: str) -> Property:
+    """Build properties.txt for an item folder."""
+    return Property(None, [
+        Property('Properties', [
+            Property('Authors', 'Bench, Mark'),
+            Property('Tags', 'Synthetic; Benchmark'),
+            Property('ent_count', str(item_num % 7 + 1)),
+            Property('Description', [
+                Property('', 'A **synthetic** item for benchmarking.'),
+                Property('', ''),
+                Property('', '* It has a list.'),
+                Property('', '* With two points.'),
+            ]),
+            Property('Icon', [
+                Property('0', icon),
+            ]),
+        ]),
+    ])
+
+
+def make_editoritems(item_num: int, folder: str, subtypes: int) -> Property:
+    """Build editoritems.txt for an item folder."""
+    editor = Property('Editor', [
+        Property('SubType', [
+            Property('Name', 'Bench Item {} ({})'.format(item_num, sub)),
+            Property('Model', [
+                Property('ModelName', 'bench_{}.3ds'.format(sub)),
+            ]),
+            Property('Palette', [
+                Property('Tooltip', 'BENCH ITEM {}'.format(item_num)),
+                Property('Image', 'palette/bench/{}.png'.format(folder)),
+                Property('Position', '0 0 0'),
+            ]),
+        ])
+        for sub in range(subtypes)
+    ])
+    editor.append(Property('MovementHandle', 'HANDLE_4_DIRECTIONS'))
+    editor.append(Property('InvalidSurface', 'CEILING'))
+
+    return Property(None, [
+        Property('Item', [
+            Property('Type', item_id(item_num)),
+            Property('ItemClass', 'ItemBase'),
+            editor,
+            Property('Properties', [
+                Property('StartEnabled', [
+                    Property('DefaultValue', '1'),
+                    Property('Index', '1'),
+                ]),
+                Property('ConnectionCount', [
+                    Property('DefaultValue', '0'),
+                    Property('Index', '2'),
+                ]),
+            ]),
+            Property('Exporting', [
+                Property('Instances', [
+                    Property(str(ind), [
+                        Property('Name', 'instances/bee2_bench/{}_{}.vmf'.format(
+                            folder, ind,
+                        )),
+                        Property('EntityCount', '2'),
+                        Property('BrushCount', '1'),
+                        Property('BrushSideCount', '6'),
+                    ])
+                    for ind in range(subtypes)
+                ]),
+                Property('TargetName', 'bench'),
+                Property('OccupiedVoxels', [
+                    Property('Voxel', [
+                        Property('Pos', '0 0 0'),
+                        Property('Surface', [
+                            Property('Normal', '0 0 1'),
+                        ]),
+                    ]),
+                    Property('Volume', [
+                        Property('Pos1', '0 0 0'),
+                        Property('Pos2', '1 1 0'),
+                    ]),
+                ]),
+                Property('EmbeddedVoxels', [
+                    Property('Volume', [
+                        Property('Pos1', '0 0 0'),
+                        Property('Pos2', '0 0 0'),
+                    ]),
+                ]),
+            ]),
+        ]),
+    ])
+
+
+def make_item_config(item_num: int, folder: str) -> Property:
+    """Build vbsp_config.cfg for an item folder."""
+    return Property(None, [
+        Property('Conditions', [
+            Property('Condition', [
+                Property('InstFile', '<{}>'.format(item_id(item_num))),
+                Property('Result', [
+                    Property('AddOutput', [
+                        Property('Output', 'OnUser1'),
+                        Property('Target', 'bench'),
+                        Property('Input', 'Trigger'),
+                    ]),
+                ]),
+            ]),
+            Property('Condition', [
+                Property('InstVar', '$start_enabled 1'),
+                Property('Result', [
+                    Property('ChangeInstance', 'instances/bee2_bench/{}_on.vmf'.format(
+                        folder,
+                    )),
+                ]),
+            ]),
+        ]),
+    ])
+
+
+def make_style_files(index: int, items: int) -> Dict[str, Property]:
+    """Build the items.txt and vbsp_config.cfg for a style."""
+    items_txt = Property(None, [
+        Property('Item', [
+            Property('Type', 'ITEM_BENCH_STYLE_{}_{}'.format(index, num)),
+            Property('Editor', [
+                Property('SubType', [
+                    Property('Name', 'Style item {}'.format(num)),
+                ]),
+            ]),
+        ])
+        for num in range(items)
+    ])
+    config = Property(None, [
+        Property('Textures', [
+            Property('White', [
+                Property('Wall', 'tile/white_wall_tile003a'),
+                Property('Floor', 'tile/white_floor_tile002a'),
+            ]),
+        ]),
+        Property('Options', [
+            Property('goo_mist', str(index % 2)),
+        ]),
+    ])
+    return {
+        'items.txt': items_txt,
+        'vbsp_config.cfg': config,
+    }
+
+
+def write_props(files: Dict[str, bytes], path: str, props: Property):
+    """Add a Property tree to the list of files."""
+    files[path] = ''.join(props.export()).encode('utf8')
+
+
+def make_packages(
+    packages: int,
+    items: int,
+    styles: int,
+    overrides: int,
+    images: int,
+    subtypes: int,
+    seed: int,
+) -> Dict[str, Dict[str, bytes]]:
+    """Generate the contents of each synthetic package.
+
+    Styles are all defined in the core package, each based on the
+    previous. Items are spread across all packages, and each has a folder
+    for the first style plus a random set of others. overrides is the
+    number of item overrides, each adding a folder to an item from
+    another package. images is the number of PNG files in resources/BEE2/.
+
+    This returns {package_id: {path: data}}.
+    """
+    rand = random.Random(seed)
+    pak_ids = [CORE_PACKAGE] + [
+        'BENCH_PACKAGE_{}'.format(ind)
+        for ind in range(1, packages)
+    ]
+    pak_files = {pak_id: {} for pak_id in pak_ids}
+    pak_info = {
+        pak_id: Property(None, [
+            Property('ID', pak_id),
+            Property('Name', 'Benchmark Package {}'.format(ind)),
+            Property('Desc', 'Synthetic package for benchmarking.'),
+        ])
+        for ind, pak_id in enumerate(pak_ids)
+    }
+    for pak_id in pak_ids[1:]:
+        pak_info[pak_id].append(Property('Prerequisites', [
+            Property('Package', CORE_PACKAGE),
+        ]))
+
+    for sty_num in range(styles):
+        folder = 'bench_style_{}'.format(sty_num)
+        style = Property('Style', [
+            Property('ID', style_id(sty_num)),
+            Property('Name', 'Bench Style {}'.format(sty_num)),
+            Property('Authors', 'Bench'),
+            Property('Description', 'A synthetic style.'),
+            Property('Folder', folder),
+            Property('Suggested', [
+                Property('Skybox', 'SKY_BLACK'),
+            ]),
+        ])
+        if sty_num:
+            style.append(Property('Base', style_id(sty_num - 1)))
+        pak_info[CORE_PACKAGE].append(style)
+        for filename, props in make_style_files(sty_num, items // 10).items():
+            write_props(
+                pak_files[CORE_PACKAGE],
+                'styles/{}/{}'.format(folder, filename),
+                props,
+            )
+
+    def add_folder(files: Dict[str, bytes], item_num: int, folder: str):
+        """Add an item folder to a package."""
+        icon = 'items/bench/icon_{}.png'.format(item_num % max(images, 1))
+        path = 'items/' + folder + '/'
+        write_props(files, path + 'properties.txt', make_properties(
+            item_num, icon,
+        ))
+        write_props(files, path + 'editoritems.txt', make_editoritems(
+            item_num, folder, subtypes,
+        ))
+        write_props(files, path + 'vbsp_config.cfg', make_item_config(
+            item_num, folder,
+        ))
+
+    item_paks = []
+    for item_num in range(items):
+        pak_id = pak_ids[item_num % len(pak_ids)]
+        item_paks.append(pak_id)
+        style_block = Property('Styles', [])
+        for sty_num in range(styles):
+            if sty_num and rand.random() < 0.5:
+                continue  # Inherit from the base style.
+            folder = 'bench_{}_{}'.format(item_num, sty_num)
+            style_block.append(Property(style_id(sty_num), folder))
+            add_folder(pak_files[pak_id], item_num, folder)
+        pak_info[pak_id].append(Property('Item', [
+            Property('ID', item_id(item_num)),
+            Property('Version', [
+                Property('ID', 'VER_DEFAULT'),
+                style_block,
+            ]),
+        ]))
+
+    for over_num in range(overrides):
+        item_num = rand.randrange(items)
+        # Prefer another package, like real overrides.
+        pak_id = pak_ids[(pak_ids.index(item_paks[item_num]) + 1) % len(pak_ids)]
+        folder = 'bench_over_{}'.format(over_num)
+        add_folder(pak_files[pak_id], item_num, folder)
+        pak_info[pak_id].ensure_exists('Overrides').append(Property('Item', [
+            Property('ID', item_id(item_num)),
+            Property('Version', [
+                Property('ID', 'VER_DEFAULT'),
+                Property('Styles', [
+                    Property(style_id(rand.randrange(styles)), folder),
+                ]),
+            ]),
+        ]))
+
+    for img_num in range(images):
+        pak_id = pak_ids[img_num % len(pak_ids)]
+        path = 'resources/BEE2/items/bench/icon_{}.png'.format(img_num)
+        pak_files[pak_id][path] = bytes(
+            rand.getrandbits(8) for _ in range(IMAGE_SIZE)
+        )
+
+    for pak_id, info in pak_info.items():
+        write_props(pak_files[pak_id], 'info.txt', info)
+    return pak_files
+
+
+def write_packages(
+    pak_dir: str,
+    pak_files: Dict[str, Dict[str, bytes]],
+    unzipped: bool,
+):
+    """Write out the packages, either as zips or folders."""
+    os.makedirs(pak_dir, exist_ok=True)
+    for pak_id, files in pak_files.items():
+        if unzipped:
+            for path, data in files.items():
+                path = os.path.join(pak_dir, pak_id.casefold(), path)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as f:
+                    f.write(data)
+        else:
+            zip_path = os.path.join(pak_dir, pak_id.casefold() + '.zip')
+            with ZipFile(zip_path, 'w', compression=ZIP_DEFLATED) as zip_file:
+                for path, data in files.items():
+                    zip_file.writestr(path, data)
+
+
+class FakeLoader:
+    """Replaces the loading screen, counting the steps."""
+    def __init__(self):
+        self.lengths = {}  # type: Dict[str, int]
+        self.steps = {}  # type: Dict[str, int]
+
+    def set_length(self, stage: str, num: int):
+        """Record the number of steps in a stage."""
+        self.lengths[stage] = num
+
+    def step(self, stage: str):
+        """Record a step."""
+        self.steps[stage] = self.steps.get(stage, 0) + 1
+
+
+def run_benchmark(args, root: str) -> dict:
+    """Generate the packages, then load and export them."""
+    gen_start = time.perf_counter()
+    pak_files = make_packages(
+        packages=args.packages,
+        items=args.items,
+        styles=args.styles,
+        overrides=args.overrides,
+        images=args.images,
+        subtypes=args.subtypes,
+        seed=args.seed,
+    )
+    write_packages(
+        os.path.join(root, 'packages'),
+        pak_files,
+        args.unzipped,
+    )
+    zip_size = sum(
+        len(data)
+        for files in pak_files.values()
+        for data in files.values()
+    )
+    del pak_files
+    gen_time = time.perf_counter() - gen_start
+
+    # Paths are relative to bin/, like the app.
+    bin_dir = os.path.join(root, 'bin')
+    os.makedirs(bin_dir, exist_ok=True)
+    os.makedirs(os.path.join(root, 'config'), exist_ok=True)
+    os.chdir(bin_dir)
+
+    import logging
+    logger = utils.init_logging()
+    # Only show problems, the JSON goes to stdout.
+    utils.stdout_loghandler.setLevel(logging.WARNING)
+    utils.setup_localisations(logger)
+
+    loader = FakeLoader()
+    # Each stage is recorded as a span, along with the ones packageLoader
+    # already has.
+    metrics_path = os.path.join(root, 'bench.metrics.jsonl')
+    utils.init_metrics(metrics_path, trace_memory=not args.no_memory)
+    import_start = time.perf_counter()
+    import packageLoader
+    import_time = time.perf_counter() - import_start
+
+    # load_packages() calls this at the end - run it separately so it is
+    # timed on its own.
+    setup_style_tree = packageLoader.setup_style_tree
+    style_tree_args = []
+
+    def defer_style_tree(*tree_args):
+        """Record the arguments for later."""
+        style_tree_args.append(tree_args)
+    packageLoader.setup_style_tree = defer_style_tree
+
+    start = time.perf_counter()
+    with utils.span('load_packages'):
+        packageLoader.load_packages(
+            'packages',
+            loader=loader,
+        )
+    item_data, style_data, *tree_args = style_tree_args[0]
+    with utils.span('setup_style_tree'):
+        setup_style_tree(
+            list(item_data),
+            list(style_data),
+            *tree_args
+        )
+
+    Item = packageLoader.Item
+    Style = packageLoader.Style
+    # Put the first few subtypes of each item on the palette.
+    pal_list = [
+        (item.id, sub)
+        for item in sorted(Item.all(), key=lambda item: item.id)
+        for sub in range(args.subtypes)
+    ][:32]
+
+    def export_styles():
+        """Export each style's configs."""
+        return [
+            (style, ) + style.export()
+            for style in Style.all()
+        ]
+
+    def export_items(style_exports):
+        """Export all the items, for each style."""
+        blocks = 0
+        for style, editoritems, vbsp_config in style_exports:
+            Item.export(packageLoader.ExportData(
+                selected=(pal_list, {}, {}),
+                selected_style=style,
+                editoritems=editoritems,
+                vbsp_conf=vbsp_config,
+                game=None,
+            ))
+            blocks += len(editoritems)
+        return blocks
+
+    with utils.span('Style.export'):
+        style_exports = export_styles()
+    with utils.span('Item.export'):
+        editor_blocks = export_items(style_exports)
+    total = time.perf_counter() - start
+
+    return {
+        'version': utils.BEE_VERSION,
+        'params': {
+            key: value
+            for key, value in vars(args).items()
+            if key != 'output'
+        },
+        'generate_time': round(gen_time, 6),
+        'import_time': round(import_time, 6),
+        'total_time': round(total, 6),
+        'input': {
+            'bytes': zip_size,
+            'packages': len(packageLoader.packages),
+        },
+        'output': {
+            'items': len(Item.all()),
+            'styles': len(Style.all()),
+            'editoritems_blocks': editor_blocks,
+            'loader_steps': loader.steps,
+        },
+        'stages': read_metrics(metrics_path),
+    }
+
+
+def main(argv: List[str]):
+    """Parse arguments, and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--packages', type=int, default=4,
+                        help='Number of packages to spread objects across.')
+    parser.add_argument('--items', type=int, default=200,
+                        help='Number of synthetic items.')
+    parser.add_argument('--styles', type=int, default=4,
+                        help='Number of synthetic styles.')
+    parser.add_argument('--overrides', type=int, default=50,
+                        help='Number of item overrides.')
+    parser.add_argument('--images', type=int, default=200,
+                        help='Number of images in resources/BEE2/.')
+    parser.add_argument('--subtypes', type=int, default=2,
+                        help='Number of subtypes for each item.')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Random seed for the generated packages.')
+    parser.add_argument('--unzipped', action='store_true',
+                        help='Write packages as folders instead of zips.')
+    parser.add_argument('--no-memory', action='store_true',
+                        help="Don't trace memory, for more accurate times.")
+    parser.add_argument('--output', default=None,
+                        help='Append the results to this file as a line '
+                             'of JSON.')
+    args = parser.parse_args(argv)
+    if args.packages < 1 or args.styles < 1 or args.items < 1:
+        parser.error('At least one package, style and item is required!')
+    if args.output:
+        args.output = os.path.abspath(args.output)
+
+    with tempfile.TemporaryDirectory(prefix='bee2_bench_') as root:
+        orig_dir = os.getcwd()
+        try:
+            result = run_benchmark(args, root)
+        finally:
+            os.chdir(orig_dir)
+            utils.stop_metrics()
+            tracemalloc.stop()
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, 'a') as f:
+            f.write(json.dumps(result) + '\n')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,566 @@
+"""Benchmark the VBSP hook's conversion of Puzzlemaker maps.
+
+This generates a synthetic PeTI map, along with the vbsp_config.cfg,
+instances.cfg, templates.vmf and pack_list.cfg VBSP needs. Then the PeTI branch of
+vbsp.main() is run, with the real VBSP stubbed out. Each stage is timed with
+utils.span(), and the spans (with the change in memory and net change in
+allocated blocks) are printed as JSON. The peak memory of the whole run and
+the time taken to import each module VBSP loads are included too. Use
+--output to append the results to a file, so they can be compared across
+commits.
+"""
+import argparse
+import functools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from srctools import Property, Vec, VMF, Entity
+
+import comp_consts as consts
+import utils
+
+from typing import List
+
+# Instance paths for each of the synthetic item types.
+ITEM_INST = 'instances/bee2_bench/item_{}.vmf'
+
+# The special items VBSP requires, and the number of instances each has.
+# The paths are derived from the item ID.
+SPECIAL_ITEMS = {
+    # Corridors 0-6, frames 7-8, elevators 9-10, transition ents 11.
+    'ITEM_ENTRY_DOOR': 12,
+    'ITEM_EXIT_DOOR': 4,
+    'ITEM_COOP_ENTRY_DOOR': 5,
+    'ITEM_COOP_EXIT_DOOR': 6,
+    'ITEM_INDICATOR_PANEL': 1,
+    'ITEM_INDICATOR_PANEL_TIMER': 1,
+    'ITEM_INDICATOR_TOGGLE': 1,
+    'ITEM_BARRIER': 9,
+    'ITEM_POINT_LIGHT': 1,
+}
+
+# The stages of vbsp.main() to time, in the order they run. These are in
+# addition to the spans VBSP already records (vbsp.load_map, vbsp.save etc).
+VBSP_STAGES = [
+    'calc_rand_seed',
+    'get_map_info',
+    'fix_inst',
+    'alter_flip_panel',
+    'add_extra_ents',
+    'change_ents',
+    'fixup_goo_sides',
+    'change_brush',
+    'change_overlays',
+    'change_trig',
+    'collapse_goo_trig',
+    'change_func_brush',
+    'remove_static_ind_toggles',
+    'remove_barrier_ents',
+    'fix_worldspawn',
+    'make_packlist',
+    'make_vrad_config',
+]
+
+
+def special_inst(item_id: str, index: int) -> str:
+    """The instance filename used for a special item."""
+    return 'instances/bee2_bench/{}_{}.vmf'.format(item_id.lower(), index)
+
+
+def make_instances_cfg(item_types: int) -> Property:
+    """Build the instances.cfg file, listing every item's instances."""
+    all_inst = Property('AllInstances', [])
+    for item_id, count in SPECIAL_ITEMS.items():
+        all_inst.append(Property(item_id, [
+            Property('Instance', special_inst(item_id, ind))
+            for ind in range(count)
+        ]))
+    for item_num in range(item_types):
+        all_inst.append(Property('BENCH_ITEM_{}'.format(item_num), [
+            Property('Instance', ITEM_INST.format(item_num)),
+        ]))
+
+    return Property(None, [
+        all_inst,
+        Property('CustInstances', []),
+        Property('Connections', []),
+        Property('ItemClasses', []),
+    ])
+
+
+def make_vbsp_config(bee2_loc: str) -> Property:
+    """Build a minimal vbsp_config.cfg."""
+    return Property(None, [
+        Property('Options', [
+            Property('BEE2_loc', bee2_loc),
+            Property('goo_mist', '1'),
+        ]),
+    ])
+
+
+def add_tile(
+    vmf: VMF,
+    pos: Vec,
+    normal: Vec,
+    mat: str,
+    thickness: int=64,
+):
+    """Add a 128x128 wall tile behind the face of a cell.
+
+    pos is the center of the cell, and normal points into the cell.
+    """
+    face_pos = pos - 64 * normal
+    back_pos = face_pos - thickness * normal
+    p1 = Vec(face_pos)
+    p2 = Vec(back_pos)
+    for axis in 'xyz':
+        if normal[axis] == 0:
+            p1[axis] -= 64
+            p2[axis] += 64
+    prism = vmf.make_prism(p1, p2)
+    face = {
+        (0, 0, 1): prism.top,
+        (0, 0, -1): prism.bottom,
+        (0, 1, 0): prism.north,
+        (0, -1, 0): prism.south,
+        (1, 0, 0): prism.east,
+        (-1, 0, 0): prism.west,
+    }[normal.as_tuple()]
+    face.mat = mat
+    vmf.add_brush(prism.solid)
+    return prism
+
+
+def add_instance(
+    vmf: VMF,
+    file: str,
+    origin: Vec,
+    name: str='',
+    angles: str='0 0 0',
+    **fixups: str
+) -> Entity:
+    """Add a func_instance to the map."""
+    inst = vmf.create_ent(
+        classname='func_instance',
+        targetname=name,
+        file=file,
+        origin=origin.join(' '),
+        angles=angles,
+        fixup_style='0',
+    )
+    for var, value in fixups.items():
+        inst.fixup[var] = value
+    return inst
+
+
+def add_antline(vmf: VMF, name: str, pos: Vec):
+    """Add a straight floor antline overlay."""
+    vmf.create_ent(
+        classname='info_overlay',
+        targetname=name,
+        material=consts.Antlines.STRAIGHT,
+        origin=pos.join(' '),
+        angles='0 0 0',
+        basisorigin=pos.join(' '),
+        basisnormal='0 0 1',
+        basisu='1 0 0',
+        basisv='0 1 0',
+        startu='0',
+        endu='1',
+        startv='0',
+        endv='1',
+        uv0='-64 -8 0',
+        uv1='-64 8 0',
+        uv2='64 8 0',
+        uv3='64 -8 0',
+        renderorder='0',
+        sides='',
+    )
+
+
+def make_map(
+    size: int,
+    item_types: int,
+    per_item: int,
+    goo: int,
+    pits: int,
+    glass: int,
+    antlines: int,
+    indicators: int,
+    seed: int,
+) -> VMF:
+    """Generate a synthetic Puzzlemaker map.
+
+    The chamber is size x size x size cells. goo and pits are the number
+    of floor cells to replace with each, glass is the number of cells
+    along the middle of the room to block, and antlines is the number of
+    antline overlays (each with an indicator toggle).
+    """
+    rand = random.Random(seed)
+    vmf = VMF(map_info={'paintinmap': '0', 'skyname': 'sky_black_nofog'})
+
+    # Pick floor cells for goo and pits.
+    floor_cells = [(x, y) for x in range(size) for y in range(size)]
+    rand.shuffle(floor_cells)
+    goo_cells = set(floor_cells[:goo])
+    pit_cells = set(floor_cells[goo:goo + pits])
+    free_cells = floor_cells[goo + pits:]
+
+    def cell_pos(x, y, z):
+        """The center of a cell."""
+        return Vec(x * 128 + 64, y * 128 + 64, z * 128 + 64)
+
+    def tile_mat():
+        """Pick a white or black tile."""
+        if rand.random() < 0.5:
+            return consts.WhitePan.WHITE_1x1
+        else:
+            return consts.BlackPan.BLACK_1
+
+    # The walls and ceiling.
+    for a in range(size):
+        for b in range(size):
+            add_tile(vmf, cell_pos(a, b, size - 1), Vec(0, 0, -1), tile_mat())
+            add_tile(vmf, cell_pos(0, a, b), Vec(1, 0, 0), tile_mat())
+            add_tile(vmf, cell_pos(size - 1, a, b), Vec(-1, 0, 0), tile_mat())
+            add_tile(vmf, cell_pos(a, 0, b), Vec(0, 1, 0), tile_mat())
+            add_tile(vmf, cell_pos(a, size - 1, b), Vec(0, -1, 0), tile_mat())
+
+    # The floor, with goo and pits one cell down.
+    for x in range(size):
+        for y in range(size):
+            pos = cell_pos(x, y, 0)
+            if (x, y) not in goo_cells and (x, y) not in pit_cells:
+                add_tile(vmf, pos, Vec(0, 0, 1), tile_mat())
+                continue
+            below = cell_pos(x, y, -1)
+            # Black walls around the sides of the hole.
+            for side in [Vec(1, 0, 0), Vec(-1, 0, 0), Vec(0, 1, 0), Vec(0, -1, 0)]:
+                other = (x - int(side.x), y - int(side.y))
+                if other not in goo_cells and other not in pit_cells:
+                    add_tile(vmf, below, side, consts.BlackPan.BLACK_1)
+
+            if (x, y) in pit_cells:
+                # Bottomless pits just have a floor far below.
+                add_tile(vmf, cell_pos(x, y, -8), Vec(0, 0, 1), consts.Tools.NODRAW)
+                continue
+
+            add_tile(vmf, below, Vec(0, 0, 1), consts.BlackPan.BLACK_FLOOR)
+            goo_brush = vmf.make_prism(
+                below - (64, 64, 64),
+                below + (64, 64, 32),
+            )
+            goo_brush.top.mat = consts.Goo.CHEAP
+            vmf.add_brush(goo_brush.solid)
+            # PeTI adds a pair of triggers to every goo cell.
+            for classname, keys in [
+                ('trigger_multiple', {'wait': '0.1', 'spawnflags': '8'}),
+                ('trigger_hurt', {'damage': '1000', 'spawnflags': '1'}),
+            ]:
+                trig = vmf.create_ent(classname=classname, **keys)
+                trig.solids.append(vmf.make_prism(
+                    below - (64, 64, 64),
+                    below + (64, 64, 16),
+                    consts.Tools.TRIGGER,
+                ).solid)
+
+    # Glass along the middle of the room.
+    mid = size // 2
+    for ind in range(min(glass, size * size)):
+        y, z = divmod(ind, size)
+        pos = cell_pos(mid, y, z)
+        add_instance(
+            vmf,
+            special_inst('ITEM_BARRIER', 0),
+            pos - (64, 0, 64),
+            'barrier_{}'.format(ind),
+            '0 0 90',
+        )
+        glass_brush = vmf.make_prism(pos - (66, 64, 64), pos + (-62, 64, 64))
+        glass_brush.east.mat = glass_brush.west.mat = consts.Special.GLASS
+        vmf.create_ent(classname='func_detail').solids.append(glass_brush.solid)
+
+    # The entry and exit corridors.
+    add_instance(
+        vmf,
+        special_inst('ITEM_ENTRY_DOOR', 0),
+        cell_pos(0, 0, 0) - (128, 0, 64),
+        'entry_corr',
+        no_player_start='0',
+    )
+    add_instance(
+        vmf,
+        special_inst('ITEM_EXIT_DOOR', 0),
+        cell_pos(size - 1, size - 1, 0) + (128, 0, -64),
+        'exit_corr',
+        '0 180 0',
+    )
+
+    # Lights in the corners.
+    for x, y in [(0, 0), (0, size - 1), (size - 1, 0), (size - 1, size - 1)]:
+        add_instance(
+            vmf,
+            special_inst('ITEM_POINT_LIGHT', 0),
+            cell_pos(x, y, size - 1) + (0, 0, 64),
+            'light_{}_{}'.format(x, y),
+            '0 0 180',
+        )
+
+    # Items, placed randomly on the floor.
+    for item_num in range(item_types):
+        for ind in range(per_item):
+            x, y = rand.choice(free_cells)
+            add_instance(
+                vmf,
+                ITEM_INST.format(item_num),
+                cell_pos(x, y, 0) - (0, 0, 64),
+                'item_{}_{}'.format(item_num, ind),
+                '0 {} 0'.format(rand.choice((0, 90, 180, 270))),
+                connectioncount='0',
+                start_enabled='0',
+            )
+
+    # Antlines, each with its indicator toggle.
+    for ind in range(antlines):
+        x, y = rand.choice(free_cells)
+        pos = cell_pos(x, y, 0) - (0, 0, 63)
+        name = 'antline_{}'.format(ind)
+        add_antline(vmf, name, pos)
+        add_instance(
+            vmf,
+            special_inst('ITEM_INDICATOR_TOGGLE', 0),
+            pos - (0, 0, 1),
+            'toggle_{}'.format(ind),
+            indicator_name=name,
+        )
+
+    for ind in range(indicators):
+        x, y = rand.choice(free_cells)
+        add_instance(
+            vmf,
+            special_inst('ITEM_INDICATOR_PANEL', 0),
+            cell_pos(x, y, 0) - (0, 0, 64),
+            'indpanel_{}'.format(ind),
+            indicator_name='antline_{}'.format(ind),
+        )
+
+    return vmf
+
+
+def add_span(module, name: str, label: str=None):
+    """Replace a function in a module with one timed by utils.span()."""
+    func = getattr(module, name)
+
+    @functools.wraps(func)
+    def timed(*args, **kwargs):
+        with utils.span(label or name):
+            return func(*args, **kwargs)
+    setattr(module, name, timed)
+
+
+def read_metrics(path: str) -> List[dict]:
+    """Read back the span records written during the benchmark."""
+    spans = []
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            if record.pop('type') == 'span':
+                del record['pid']
+                spans.append(record)
+    return spans
+
+
+def write_file(path: str, data):
+    """Write a VMF or Property tree to a file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        if isinstance(data, VMF):
+            data.export(f)
+        else:
+            for line in data.export():
+                f.write(line)
+
+
+def run_benchmark(args, root: str) -> dict:
+    """Generate the files, then run VBSP on them."""
+    gen_start = time.perf_counter()
+    vmf = make_map(
+        size=args.size,
+        item_types=args.item_types,
+        per_item=args.per_item,
+        goo=args.goo,
+        pits=args.pits,
+        glass=args.glass,
+        antlines=args.antlines,
+        indicators=args.indicators,
+        seed=args.seed,
+    )
+    map_path = os.path.join(root, 'sdk_content', 'maps', 'bench.vmf')
+    write_file(map_path, vmf)
+    input_brushes = len(vmf.brushes)
+    input_ents = len(vmf.entities)
+    del vmf
+
+    bin_dir = os.path.join(root, 'bin')
+    os.makedirs(os.path.join(root, 'config'), exist_ok=True)
+    if args.config:
+        # Use real config files instead.
+        for filename in [
+            'vbsp_config.cfg',
+            'instances.cfg',
+            'templates.vmf',
+            'pack_list.cfg',
+        ]:
+            with open(os.path.join(args.config, filename)) as src:
+                data = src.read()
+            os.makedirs(os.path.join(bin_dir, 'bee2'), exist_ok=True)
+            with open(os.path.join(bin_dir, 'bee2', filename), 'w') as dest:
+                dest.write(data)
+    else:
+        write_file(
+            os.path.join(bin_dir, 'bee2', 'vbsp_config.cfg'),
+            make_vbsp_config(root),
+        )
+        write_file(
+            os.path.join(bin_dir, 'bee2', 'instances.cfg'),
+            make_instances_cfg(args.item_types),
+        )
+        write_file(os.path.join(bin_dir, 'bee2', 'templates.vmf'), VMF())
+        write_file(
+            os.path.join(bin_dir, 'bee2', 'pack_list.cfg'),
+            Property('PackList', []),
+        )
+    gen_time = time.perf_counter() - gen_start
+
+    # VBSP uses paths relative to bin/, and starts logging when imported.
+    os.chdir(bin_dir)
+    import vbsp
+    import conditions
+    import brushLoc
+    import brushMerge
+    import entityBudget
+    import logging
+    # Only show problems, the JSON goes to stdout.
+    utils.stdout_loghandler.setLevel(logging.WARNING)
+
+    # Each stage is recorded as a span, along with the ones VBSP already
+    # has. VBSP's import times are written as spans once main() starts.
+    trace_memory = not args.no_memory
+    metrics_path = os.path.join(root, 'bench.metrics.jsonl')
+    utils.init_metrics(metrics_path, trace_memory=trace_memory)
+    for name in VBSP_STAGES:
+        add_span(vbsp, name)
+    add_span(conditions, 'init', 'conditions.init')
+    add_span(conditions, 'check_all', 'conditions.check_all')
+    add_span(brushLoc.POS, 'read_from_map', 'brushLoc.read_from_map')
+    add_span(brushMerge, 'merge_brushes')
+    add_span(entityBudget, 'optimise', 'entityBudget.optimise')
+
+    def run_vbsp(vbsp_args, path, new_path=None):
+        """Don't run the real VBSP."""
+    vbsp.run_vbsp = run_vbsp
+
+    sys.argv = [
+        'vbsp',
+        '-entity_limit', '1750',
+        '-game', os.path.join(root, 'portal2'),
+        map_path[:-4],
+    ]
+    start = time.perf_counter()
+    vbsp.main()
+    total = time.perf_counter() - start
+
+    spans = read_metrics(metrics_path)
+    import_times = [span for span in spans if span['name'] == 'import']
+
+    return {
+        'version': utils.BEE_VERSION,
+        'params': {
+            key: value
+            for key, value in vars(args).items()
+            if key != 'output'
+        },
+        'generate_time': round(gen_time, 6),
+        'total_time': round(total, 6),
+        'peak_kb': (
+            tracemalloc.get_traced_memory()[1] // 1024
+            if trace_memory else None
+        ),
+        'input': {
+            'brushes': input_brushes,
+            'entities': input_ents,
+        },
+        'output': {
+            'brushes': len(vbsp.VMF.brushes),
+            'entities': len(vbsp.VMF.entities),
+        },
+        'stages': [span for span in spans if span['name'] != 'import'],
+        'imports': {
+            'total_time': round(sum(
+                imp['duration']
+                for imp in import_times
+                if imp['tags']['depth'] == 0
+            ), 6),
+            'modules': import_times,
+        },
+    }
+
+
+def main(argv: List[str]):
+    """Parse arguments, and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--size', type=int, default=8,
+                        help='Width of the chamber, in 128 unit cells.')
+    parser.add_argument('--item-types', type=int, default=8,
+                        help='Number of synthetic item types.')
+    parser.add_argument('--per-item', type=int, default=4,
+                        help='Number of instances of each item type.')
+    parser.add_argument('--goo', type=int, default=16,
+                        help='Number of floor cells filled with goo.')
+    parser.add_argument('--pits', type=int, default=4,
+                        help='Number of floor cells with bottomless pits.')
+    parser.add_argument('--glass', type=int, default=8,
+                        help='Number of cells blocked by glass.')
+    parser.add_argument('--antlines', type=int, default=16,
+                        help='Number of antline overlays.')
+    parser.add_argument('--indicators', type=int, default=4,
+                        help='Number of indicator panels.')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Random seed for item placement.')
+    parser.add_argument('--config', default=None,
+                        help='Folder with real vbsp_config.cfg, '
+                             'instances.cfg, templates.vmf and '
+                             'pack_list.cfg to use.')
+    parser.add_argument('--no-memory', action='store_true',
+                        help="Don't trace memory, for more accurate times.")
+    parser.add_argument('--output', default=None,
+                        help='Append the results to this file as a line '
+                             'of JSON.')
+    args = parser.parse_args(argv)
+    if args.config:
+        args.config = os.path.abspath(args.config)
+    if args.output:
+        args.output = os.path.abspath(args.output)
+
+    with tempfile.TemporaryDirectory(prefix='bee2_bench_') as root:
+        orig_dir = os.getcwd()
+        try:
+            result = run_benchmark(args, root)
+        finally:
+            os.chdir(orig_dir)
+            utils.stop_metrics()
+            tracemalloc.stop()
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, 'a') as f:
+            f.write(json.dumps(result) + '\n')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
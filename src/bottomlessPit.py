@@ -6,6 +6,7 @@ import srctools
 import utils
 import vbsp
 import brushLoc
+import conditions
 import vbsp_options
 
 
@@ -317,11 +318,12 @@ def make_bottomless_pit(vmf: VMF, max_height):
 def fix_base_brush(vmf: VMF, solid: Solid, face: Side):
     """Retexture the brush forming the bottom of a pit."""
     if SETTINGS['skybox'] != '':
-        face.mat = 'tools/toolsskybox'
+        conditions.FACES.set_mat(face, 'tools/toolsskybox')
         vbsp.IGNORED_FACES.add(face)
     else:
         # We have a pit shell, we don't want a bottom.
         vmf.remove_brush(solid)
+        conditions.FACES.remove_solid(solid)
 
 
 def make_pit_shell(vmf: VMF):
@@ -354,15 +356,16 @@ def make_pit_shell(vmf: VMF):
                 prism.bottom.mat = consts.Special.BACKPANELS_CHEAP
 
                 vmf.add_brush(prism.solid)
+                conditions.FACES.add_solid(prism.solid)
                 continue
 
             if block_types[lowest].is_solid:
                 real_pos = brushLoc.grid_to_world(Vec(x, y, lowest))
                 for z in range(0, 10):
                     br_pos = real_pos - (0, 0, 512 * z)
-                    vmf.add_brush(
-                        vmf.make_prism(br_pos + 64, br_pos - (64, 64, 512-64), vbsp.BLACK_PAN[1]).solid
-                    )
+                    shell = vmf.make_prism(br_pos + 64, br_pos - (64, 64, 512-64), vbsp.BLACK_PAN[1]).solid
+                    vmf.add_brush(shell)
+                    conditions.FACES.add_solid(shell)
 
     prism = vmf.make_prism(
         Vec(-8 * 128, -8 * 128, -4864),
@@ -370,6 +373,7 @@ def make_pit_shell(vmf: VMF):
     )
     prism.top.mat = 'tools/toolsblack'
     vmf.add_brush(prism.solid)
+    conditions.FACES.add_solid(prism.solid)
 
     diss_trig = vmf.create_ent(
         classname='trigger_multiple',
@@ -0,0 +1,217 @@
+"""Merge adjacent box-shaped brushes together, to reduce brush counts.
+
+The hook produces many identical prisms side by side - glass clips,
+goo triggers, tile pieces and template brushes. Where two boxes in the
+same entity share a whole face and their other faces match, they can be
+replaced by a single brush. This is done by swapping the shared face of
+the first box for the far face of the second. The remaining faces are
+coplanar, so their planes still bound the combined box.
+"""
+import time
+from collections import defaultdict
+
+from srctools import VMF, Solid, Side
+
+import utils
+
+from typing import Dict, List, Tuple, Optional, Set
+
+LOGGER = utils.getLogger(__name__)
+
+AXES = 'xyz'
+
+# Brushes using these have special meanings, so they can't be combined.
+SKIP_MATS = {
+    'tools/toolsorigin',
+    'tools/toolshint',
+    'tools/toolsskip',
+    'tools/toolsareaportal',
+    'tools/toolsoccluder',
+}
+
+# Brush entities where each brush matters individually.
+SKIP_CLASSES = {
+    'func_areaportal',
+    'func_areaportalwindow',
+    'func_occluder',
+    'func_viscluster',
+}
+
+
+class Box:
+    """An axis-aligned box brush, with its sides looked up by direction."""
+    __slots__ = ['solid', 'mins', 'maxs', 'sides', 'mats']
+
+    def __init__(
+        self,
+        solid: Solid,
+        sides: Dict[Tuple[str, bool], Side],
+    ):
+        self.solid = solid
+        self.mins, self.maxs = solid.get_bbox()
+        # (axis, is_max) -> side.
+        self.sides = sides
+        # The materials determine the brush contents, so both
+        # boxes must use the same set.
+        self.mats = self.calc_mats()
+
+    @classmethod
+    def from_solid(cls, solid: Solid, skip_ids: Set[int]) -> Optional['Box']:
+        """Check if a solid is a box, and if so return the Box for it."""
+        if solid.hidden or len(solid.sides) != 6:
+            return None
+        bbox_min, bbox_max = solid.get_bbox()
+        sides = {}
+        for side in solid.sides:
+            if (
+                side.is_disp or
+                side.id in skip_ids or
+                side.mat.casefold() in SKIP_MATS
+            ):
+                return None
+            norm = side.normal()
+            for axis in AXES:
+                if abs(norm[axis]) > 0.999:
+                    break
+            else:
+                return None  # Not axis-aligned.
+            pos = side.planes[0][axis]
+            if pos == bbox_max[axis]:
+                key = axis, True
+            elif pos == bbox_min[axis]:
+                key = axis, False
+            else:
+                return None
+            if key in sides:
+                return None
+            sides[key] = side
+        return cls(solid, sides)
+
+    def calc_mats(self):
+        """Return the set of materials used by this box."""
+        return frozenset(
+            side.mat.casefold()
+            for side in self.solid.sides
+        )
+
+    def absorb(self, other: 'Box', axis: str):
+        """Extend this box to cover other, which is beyond our max side."""
+        old_side = self.sides[axis, True]
+        new_side = other.sides[axis, True]
+        self.solid.sides[self.solid.sides.index(old_side)] = new_side
+        other.solid.sides.remove(new_side)
+        self.sides[axis, True] = new_side
+        self.maxs[axis] = other.maxs[axis]
+        self.mats = self.calc_mats()
+
+
+def side_key(side: Side):
+    """Values which must match for two sides to merge seamlessly."""
+    return (
+        side.mat.casefold(),
+        str(side.uaxis),
+        str(side.vaxis),
+        side.lightmap,
+        side.smooth,
+        side.ham_rot,
+    )
+
+
+def merge_axis(boxes: List[Box], axis: str, removed: Set[Solid]) -> List[Box]:
+    """Merge boxes which are touching along the given axis.
+
+    Merged brushes are added to removed. The remaining boxes are returned.
+    """
+    ax1, ax2 = [other for other in AXES if other != axis]
+    groups = defaultdict(list)  # type: Dict[tuple, List[Box]]
+    for box in boxes:
+        groups[
+            box.mins[ax1], box.maxs[ax1],
+            box.mins[ax2], box.maxs[ax2],
+            box.mats,
+            side_key(box.sides[ax1, False]),
+            side_key(box.sides[ax1, True]),
+            side_key(box.sides[ax2, False]),
+            side_key(box.sides[ax2, True]),
+        ].append(box)
+
+    result = []
+    for group in groups.values():
+        group.sort(key=lambda box: box.mins[axis])
+        cur_box = group[0]
+        for box in group[1:]:
+            if box.mins[axis] == cur_box.maxs[axis]:
+                cur_box.absorb(box, axis)
+                removed.add(box.solid)
+            else:
+                result.append(cur_box)
+                cur_box = box
+        result.append(cur_box)
+    return result
+
+
+def merge_solids(solids: List[Solid], skip_ids: Set[int]) -> Set[Solid]:
+    """Merge together the given brushes, which all have the same owner.
+
+    The set of brushes which are no longer needed is returned.
+    """
+    boxes = []
+    for solid in solids:
+        box = Box.from_solid(solid, skip_ids)
+        if box is not None:
+            boxes.append(box)
+
+    removed = set()  # type: Set[Solid]
+    if len(boxes) < 2:
+        return removed
+    for axis in AXES:
+        boxes = merge_axis(boxes, axis, removed)
+    return removed
+
+
+def merge_brushes(vmf: VMF):
+    """Merge adjacent brushes in the world and each brush entity."""
+    LOGGER.info('Merging brushes...')
+    start_time = time.perf_counter()
+
+    # Overlays and cubemaps refer to brush faces by ID, so leave those
+    # brushes alone.
+    skip_ids = set()  # type: Set[int]
+    for ent in vmf.entities:
+        for side_id in ent['sides', ''].split():
+            try:
+                skip_ids.add(int(side_id))
+            except ValueError:
+                pass
+
+    brush_count = merged = 0
+
+    removed = merge_solids(vmf.brushes, skip_ids)
+    brush_count += len(vmf.brushes)
+    if removed:
+        merged += len(removed)
+        vmf.brushes[:] = [
+            solid for solid in vmf.brushes
+            if solid not in removed
+        ]
+
+    for ent in vmf.entities:
+        if not ent.solids or ent.hidden or ent['classname'] in SKIP_CLASSES:
+            continue
+        removed = merge_solids(ent.solids, skip_ids)
+        brush_count += len(ent.solids)
+        if removed:
+            merged += len(removed)
+            ent.solids[:] = [
+                solid for solid in ent.solids
+                if solid not in removed
+            ]
+
+    LOGGER.info(
+        'Merged {} brushes: {} -> {} brushes, {} fewer sides. ({:.2f}s)',
+        merged,
+        brush_count,
+        brush_count - merged,
+        merged * 6,
+        time.perf_counter() - start_time,
+    )
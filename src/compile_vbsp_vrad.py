@@ -42,14 +42,8 @@ EXCLUDES = [
     'smtplib',
     'http',
 ]
-# These also aren't required by logging really, but by default
-# they're imported unconditionally. Check to see if it's modified first.
-import logging.handlers
-if not hasattr(logging.handlers, 'socket'):
-    EXCLUDES.append('socket')
-if not hasattr(logging.handlers, 'pickle'):
-    EXCLUDES.append('pickle')
-del logging
+# socket and pickle are imported by logging.handlers, but also used to talk to
+# the compile daemon, so they're always required.
 
 if utils.WIN:
     # Subprocess uses these in UNIX-style OSes, but not Windows
@@ -58,8 +52,9 @@ if utils.WIN:
 if utils.MAC or utils.LINUX:
     EXCLUDES += ['grp', 'pwd']  # Unix authentication modules, optional
 
-    # The only hash algorithm that's used is sha512 - random.seed()
-    EXCLUDES += ['_sha1', '_sha256', '_md5']
+    # The only hash algorithms that are used are sha512 - random.seed(),
+    # and md5 - authenticating with the compile daemon.
+    EXCLUDES += ['_sha1', '_sha256']
 
 
 # Additional modules to include:
@@ -91,6 +91,173 @@ solidGroup = NamedTuple('solidGroup', [
 ])
 SOLIDS = {}  # type: Dict[Vec_tuple, solidGroup]
 
+
+class FaceIndex:
+    """Indexes the faces of world and func_detail brushes.
+
+    This allows finding faces by material or origin, without looping over
+    every brush in the map. It is built in a single pass by
+    build_solid_dict(), then has to be kept up to date:
+
+    - Retexture faces with set_mat(), and call update_origin() after
+      moving one.
+    - Call add_solid() and remove_solid() when adding or removing
+      world brushes.
+    - Call add_detail() after creating a func_detail or adding brushes
+      to one, and remove_detail() when removing it.
+
+    Results are in the same order as VMF.iter_wfaces().
+    """
+    def __init__(self):
+        self.by_mat = defaultdict(set)  # type: Dict[str, Set[Side]]
+        self.by_origin = defaultdict(set)  # type: Dict[Vec_tuple, Set[Side]]
+        # Face -> func_detail owning it, or None for world brushes.
+        self.owner = {}  # type: Dict[Side, Optional[Entity]]
+        # Face -> the brush it's part of.
+        self.solid = {}  # type: Dict[Side, Solid]
+        # Face -> the origin it's filed under in by_origin.
+        self._origin = {}  # type: Dict[Side, Vec_tuple]
+        # The position of each face in VMF.iter_wfaces().
+        self._order = {}  # type: Dict[Side, Tuple[int, int, int]]
+        # The order of each func_detail in the map.
+        self._detail_order = {}  # type: Dict[Entity, int]
+        self._count = 0
+        # The highest point of any brush, or None if it needs recalculating.
+        self._highest = None  # type: Optional[float]
+
+    def build(self):
+        """Build the index from the current map."""
+        self.by_mat.clear()
+        self.by_origin.clear()
+        self.owner.clear()
+        self.solid.clear()
+        self._origin.clear()
+        self._order.clear()
+        self._detail_order.clear()
+        self._count = 0
+        self._highest = None
+
+        for solid in VMF.brushes:
+            self.add_solid(solid)
+        for ind, ent in enumerate(VMF.entities):
+            if ent['classname', ''] == 'func_detail':
+                self._detail_order[ent] = ind
+                self.add_detail(ent)
+
+    def add_solid(self, solid: Solid, owner: Entity=None):
+        """Add a world brush (or a brush of the given func_detail)."""
+        if owner is None:
+            group = (0, 0)
+        else:
+            if owner not in self._detail_order:
+                # New entities are added to the end of the map.
+                self._detail_order[owner] = len(VMF.entities)
+            group = (1, self._detail_order[owner])
+        for face in solid:
+            if face in self.owner:
+                continue
+            self.owner[face] = owner
+            self.solid[face] = solid
+            self._order[face] = group + (self._count, )
+            self._count += 1
+            self.by_mat[face.mat.casefold()].add(face)
+            origin = self._origin[face] = face.get_origin().as_tuple()
+            self.by_origin[origin].add(face)
+            if self._highest is not None:
+                self._highest = max(
+                    self._highest,
+                    face.planes[0].z,
+                    face.planes[1].z,
+                    face.planes[2].z,
+                )
+
+    def remove_solid(self, solid: Solid):
+        """Remove a brush from the index."""
+        for face in solid:
+            if face not in self.owner:
+                continue
+            del self.owner[face]
+            del self.solid[face]
+            del self._order[face]
+            self.by_mat[face.mat.casefold()].discard(face)
+            self.by_origin[self._origin.pop(face)].discard(face)
+        # This might have been the highest brush.
+        self._highest = None
+
+    def add_detail(self, ent: Entity):
+        """Add the brushes of a func_detail which aren't already indexed."""
+        for solid in ent.solids:
+            self.add_solid(solid, ent)
+
+    def remove_detail(self, ent: Entity):
+        """Remove the brushes of a func_detail from the index."""
+        for solid in ent.solids:
+            self.remove_solid(solid)
+
+    def set_mat(self, face: Side, mat: str):
+        """Retexture a face, keeping the index up to date."""
+        if face in self.owner:
+            self.by_mat[face.mat.casefold()].discard(face)
+            self.by_mat[mat.casefold()].add(face)
+        face.mat = mat
+
+    def update_origin(self, face: Side):
+        """Refile a face after its planes have been moved."""
+        if face in self.owner:
+            self.by_origin[self._origin[face]].discard(face)
+            origin = self._origin[face] = face.get_origin().as_tuple()
+            self.by_origin[origin].add(face)
+            # It might have been or become the highest point.
+            self._highest = None
+
+    def _in_map(self, face: Side) -> bool:
+        """Check the face (and its func_detail) hasn't been removed."""
+        try:
+            owner = self.owner[face]
+        except KeyError:
+            return False
+        return owner is None or owner in VMF.by_class['func_detail']
+
+    def find_mat(self, *mats: str) -> List[Side]:
+        """Return all faces using any of the given materials."""
+        found = []
+        for mat in {mat.casefold() for mat in mats}:
+            found.extend(filter(self._in_map, self.by_mat.get(mat, ())))
+        found.sort(key=self._order.__getitem__)
+        return found
+
+    def all_faces(self) -> List[Side]:
+        """Return every face in the index."""
+        found = list(filter(self._in_map, self.owner))
+        found.sort(key=self._order.__getitem__)
+        return found
+
+    def find_origin(self, origin: Vec_tuple) -> List[Side]:
+        """Return all faces centered on the given location."""
+        found = list(filter(self._in_map, self.by_origin.get(origin, ())))
+        found.sort(key=self._order.__getitem__)
+        return found
+
+    def is_world(self, face: Side) -> bool:
+        """Check if this face is part of a world brush."""
+        return face in self.owner and self.owner[face] is None
+
+    def highest_point(self) -> float:
+        """Return the highest Z position of any world or detail brush."""
+        if self._highest is None:
+            self._highest = 0
+            for face in self.owner:
+                if self._in_map(face):
+                    self._highest = max(
+                        self._highest,
+                        face.planes[0].z,
+                        face.planes[1].z,
+                        face.planes[2].z,
+                    )
+        return self._highest
+
+FACES = FaceIndex()
+
 # The input/output connection values defined for each item.
 # Each is a tuple of (inst_name, command) values, ready to be passed to
 # VLib.Output().
@@ -236,9 +403,20 @@ class EndCondition(Exception):
 # and can be cleaned up - adding a global instance, for example.
 RES_EXHAUSTED = object()
 
+# The id()s of results which have been exhausted in the current map.
+# Conditions are never modified once parsed, so they can be reused
+# for every map - init() just replaces this.
+EXHAUSTED = set()  # type: Set[int]
+# Incremented by init() for each map, so conditions know when to reset
+# their count of remaining results.
+MAP_NUM = 0
+
 
 class Condition:
-    __slots__ = ['flags', 'results', 'else_results', 'priority', 'source']
+    __slots__ = [
+        'flags', 'results', 'else_results', 'priority', 'source',
+        'remaining', 'remaining_map',
+    ]
 
     def __init__(
         self,
@@ -248,12 +426,16 @@ class Condition:
         priority=Decimal('0'),
         source=None,
     ):
-        self.flags = flags or []
-        self.results = results or []
-        self.else_results = else_results or []
+        self.flags = tuple(flags or ())
+        self.results = results or ()
+        self.else_results = else_results or ()
         self.priority = priority
         self.source = source
         self.setup()
+        # The number of results which aren't exhausted, in map
+        # remaining_map. It's reset when first used in each map.
+        self.remaining = 0
+        self.remaining_map = -1
 
     def __repr__(self):
         return (
@@ -313,12 +495,19 @@ class Condition:
     def setup(self):
         """Some results need some pre-processing before they can be used.
 
+        The results are then stored as tuples, since they're shared by
+        every map.
         """
-        for res in self.results[:]:
-            self.setup_result(self.results, res)
+        results = list(self.results)
+        for res in results[:]:
+            self.setup_result(results, res)
 
-        for res in self.else_results[:]:
-            self.setup_result(self.else_results, res)
+        else_results = list(self.else_results)
+        for res in else_results[:]:
+            self.setup_result(else_results, res)
+
+        self.results = tuple(results)
+        self.else_results = tuple(else_results)
 
     @staticmethod
     def setup_result(res_list, result):
@@ -342,6 +531,19 @@ class Condition:
         else:
             return func(VMF, inst, res)
 
+    @classmethod
+    def run_result(cls, inst, res) -> bool:
+        """Execute the given result, unless it's exhausted in this map.
+
+        This returns True if the result was exhausted by this call.
+        """
+        if id(res) in EXHAUSTED:
+            return False
+        if cls.test_result(inst, res) is RES_EXHAUSTED:
+            EXHAUSTED.add(id(res))
+            return True
+        return False
+
     def test(self, inst):
         """Try to satisfy this condition on the given instance."""
         success = True
@@ -350,10 +552,21 @@ class Condition:
                 success = False
                 break
         results = self.results if success else self.else_results
-        for res in results[:]:
-            should_del = self.test_result(inst, res)
-            if should_del is RES_EXHAUSTED:
-                results.remove(res)
+        for res in results:
+            if self.run_result(inst, res):
+                if self.remaining_map != MAP_NUM:
+                    self.remaining_map = MAP_NUM
+                    self.remaining = (
+                        len(self.results) + len(self.else_results)
+                    )
+                self.remaining -= 1
+
+    def is_exhausted(self) -> bool:
+        """Check if every result has been exhausted in this map."""
+        if self.remaining_map != MAP_NUM:
+            # Nothing's been exhausted yet.
+            return not self.results and not self.else_results
+        return self.remaining == 0
 
 
 def annotation_caller(func, *parms):
@@ -430,16 +643,17 @@ def add_meta(func, priority, only_once=True):
 
     RESULT_LOOKUP[name] = annotation_caller(func, srctools.VMF, Entity, Property)
 
+    results = [Property(name, '')]
+    if only_once:
+        results.append(
+            Property('endCondition', '')
+        )
+
     cond = Condition(
-        results=[Property(name, '')],
+        results=results,
         priority=priority,
         source='MetaCondition {}'.format(name)
     )
-
-    if only_once:
-        cond.results.append(
-            Property('endCondition', '')
-        )
     conditions.append(cond)
     ALL_META.append((name, priority, func))
 
@@ -497,20 +711,33 @@ def add(prop_block):
         conditions.append(con)
 
 
+def freeze():
+    """Sort the conditions, once they have all been added.
+
+    After this the conditions are never modified, so they can be
+    reused for every map.
+    """
+    global conditions
+    # Sort by priority, where higher = done later
+    zero = Decimal(0)
+    conditions = tuple(sorted(
+        conditions,
+        key=lambda cond: getattr(cond, 'priority', zero),
+    ))
+
+
 def init(seed, inst_list, vmf_file):
     """Initialise the Conditions system."""
     # Get a bunch of values from VBSP
-    global MAP_RAND_SEED, ALL_INST, VMF
+    global MAP_RAND_SEED, ALL_INST, VMF, EXHAUSTED, MAP_NUM
     VMF = vmf_file
     MAP_RAND_SEED = seed
     ALL_INST.update(inst_list)
-
-    # Sort by priority, where higher = done later
-    zero = Decimal(0)
-    conditions.sort(key=lambda cond: getattr(cond, 'priority', zero))
+    # No results have been used yet.
+    EXHAUSTED = set()
+    MAP_NUM += 1
 
     build_solid_dict()
-    load_templates()
 
 
 def check_all():
@@ -537,7 +764,7 @@ def check_all():
                 # Skip to next condition.
                 import sys
                 sys.exit(1)
-            if not condition.results and not condition.else_results:
+            if condition.is_exhausted():
                 break  # Condition has run out of results, quit early
 
     import vbsp
@@ -547,7 +774,6 @@ def check_all():
         vbsp.settings['has_attr'].items()
         if value
     ])
-    LOGGER.info('instanceLocs cache: {}', resolve_inst.cache_info())
     LOGGER.info('Style Vars: {}', dict(vbsp.settings['style_vars']))
     LOGGER.info('Global instances: {}', GLOBAL_INSTANCES)
 
@@ -619,6 +845,8 @@ def build_solid_dict():
     for mat in vbsp.WHITE_PAN:
         mat_types[mat] = MAT_TYPES.white
 
+    FACES.build()
+
     for solid in VMF.brushes:
         for face in solid:
             if face.mat.casefold in consts.Goo:
@@ -647,8 +875,11 @@ def build_solid_dict():
                     # The only time two textures will be in the same
                     # place is if they are covering each other -
                     # nodraw them both and ignore them
-                    SOLIDS.pop(origin).face.mat = consts.Tools.NODRAW
-                    face.mat = consts.Tools.NODRAW
+                    FACES.set_mat(
+                        SOLIDS.pop(origin).face,
+                        consts.Tools.NODRAW,
+                    )
+                    FACES.set_mat(face, consts.Tools.NODRAW)
                     continue
 
                 SOLIDS[origin] = solidGroup(
@@ -813,6 +1044,15 @@ def local_name(inst: Entity, name: str):
         return name + '-' + targ_name
 
 
+def find_inst_named(name: str) -> Set[Entity]:
+    """Return all instances with the given targetname.
+
+    This uses the VMF's targetname lookup, which is kept up to date when
+    instances are added, removed or renamed.
+    """
+    return VMF.by_class['func_instance'] & VMF.by_target[name]
+
+
 def widen_fizz_brush(brush, thickness, bounds=None):
     """Move the two faces of a fizzler brush outward.
 
@@ -903,10 +1143,11 @@ def steal_from_brush(
 
     if rem_brush:
         VMF.remove_brush(brush_group.solid)
+        FACES.remove_solid(brush_group.solid)
     else:
         # Switch it to nodraw if still in the map, since it must be
         # covered.
-        brush_group.face.mat = 'tools/toolsnodraw'
+        FACES.set_mat(brush_group.face, 'tools/toolsnodraw')
 
     # Additional is a list of IDs in the template VMF, not the final one.
     additional = [
@@ -993,7 +1234,10 @@ def parse_temp_name(name) -> Tuple[str, Set[str]]:
 
 
 def load_templates():
-    """Load in the template file, used for import_template()."""
+    """Load in the template file, used for import_template().
+
+    This is done once, before any maps are converted.
+    """
     with open(TEMPLATE_LOCATION) as file:
         props = Property.parse(file, TEMPLATE_LOCATION)
     vmf = srctools.VMF.parse(props, preserve_ids=True)
@@ -1163,6 +1407,8 @@ def import_template(
 
     if add_to_map:
         VMF.add_brushes(new_world)
+        for solid in new_world:
+            FACES.add_solid(solid)
 
     if new_detail:
         detail_ent = VMF.create_ent(
@@ -1171,7 +1417,9 @@ def import_template(
         # Don't let this be touched later..
         vbsp.IGNORED_BRUSH_ENTS.add(detail_ent)
         detail_ent.solids = new_detail
-        if not add_to_map:
+        if add_to_map:
+            FACES.add_detail(detail_ent)
+        else:
             detail_ent.remove()
     else:
         detail_ent = None
@@ -1293,7 +1541,7 @@ def retexture_template(
                 if mat.startswith('<') or mat.endswith('>'):
                     # Lookup in the style data.
                     mat = vbsp.get_tex(mat[1:-1])
-                face.mat = mat
+                FACES.set_mat(face, mat)
                 continue
 
             tex_type = TEMPLATE_RETEXTURE.get(folded_mat)
@@ -1304,14 +1552,14 @@ def retexture_template(
             if isinstance(tex_type, str):
                 # It's something like squarebeams or backpanels, just look
                 # it up
-                face.mat = vbsp.get_tex(tex_type)
+                FACES.set_mat(face, vbsp.get_tex(tex_type))
 
                 if tex_type == 'special.goo_cheap':
                     if face.normal() != (0, 0, 1):
                         # Goo must be facing upright!
                         # Retexture to nodraw, so a template can be made with
                         # all faces goo to work in multiple orientations.
-                        face.mat = 'tools/toolsnodraw'
+                        FACES.set_mat(face, 'tools/toolsnodraw')
                     else:
                         # Goo always has the same orientation!
                         face.uaxis = UVAxis(
@@ -1352,21 +1600,21 @@ def retexture_template(
                 # We want to use the bullseye textures, instead of normal
                 # ones
                 if norm.z < -floor_tolerance:
-                    face.mat = vbsp.get_tex(
+                    FACES.set_mat(face, vbsp.get_tex(
                         'special.bullseye_{}_floor'.format(tex_colour)
-                    )
+                    ))
                 elif norm.z > floor_tolerance:
-                    face.mat = vbsp.get_tex(
+                    FACES.set_mat(face, vbsp.get_tex(
                         'special.bullseye_{}_ceiling'.format(tex_colour)
-                    )
+                    ))
                 else:
-                    face.mat = ''  # Ensure next if statement triggers
+                    FACES.set_mat(face, '')  # Ensure next if statement triggers
 
                 # If those aren't defined, try the wall texture..
                 if face.mat == '':
-                    face.mat = vbsp.get_tex(
+                    FACES.set_mat(face, vbsp.get_tex(
                         'special.bullseye_{}_wall'.format(tex_colour)
-                    )
+                    ))
                 if face.mat != '':
                     continue  # Set to a bullseye texture,
                     # don't use the wall one
@@ -1374,17 +1622,17 @@ def retexture_template(
             if grid_size == 'special':
                 # Don't use wall on faces similar to floor/ceiling:
                 if -floor_tolerance < norm.z < floor_tolerance:
-                    face.mat = vbsp.get_tex(
+                    FACES.set_mat(face, vbsp.get_tex(
                         'special.{!s}_wall'.format(tex_colour)
-                    )
+                    ))
                 else:
-                    face.mat = ''  # Ensure next if statement triggers
+                    FACES.set_mat(face, '')  # Ensure next if statement triggers
 
                 # Various fallbacks if not defined
                 if face.mat == '':
-                    face.mat = vbsp.get_tex(
+                    FACES.set_mat(face, vbsp.get_tex(
                         'special.{!s}'.format(tex_colour)
-                    )
+                    ))
                 if face.mat == '':
                     # No special texture - use a wall one.
                     grid_size = 'wall'
@@ -1403,22 +1651,22 @@ def retexture_template(
                 vbsp.IGNORED_FACES.remove(face)
                 if tex_colour is MAT_TYPES.white:
                     if grid_size == '4x4':
-                        face.mat = 'tile/white_wall_tile003f'
+                        FACES.set_mat(face, 'tile/white_wall_tile003f')
                     elif grid_size == '2x2':
-                        face.mat = 'tile/white_wall_tile003c'
+                        FACES.set_mat(face, 'tile/white_wall_tile003c')
                     else:
-                        face.mat = 'tile/white_wall_tile003h'
+                        FACES.set_mat(face, 'tile/white_wall_tile003h')
                 elif tex_colour is MAT_TYPES.black:
                     if grid_size == '4x4':
-                        face.mat = 'metal/black_wall_metal_002b'
+                        FACES.set_mat(face, 'metal/black_wall_metal_002b')
                     elif grid_size == '2x2':
-                        face.mat = 'metal/black_wall_metal_002a'
+                        FACES.set_mat(face, 'metal/black_wall_metal_002a')
                     else:
-                        face.mat = 'metal/black_wall_metal_002e'
+                        FACES.set_mat(face, 'metal/black_wall_metal_002e')
             else:
-                face.mat = vbsp.get_tex(
+                FACES.set_mat(face, vbsp.get_tex(
                     '{!s}.{!s}'.format(tex_colour, grid_size)
-                )
+                ))
 
     for over in template_data.overlay[:]:
         random.seed('TEMP_OVERLAY_' + over['basisorigin'])
@@ -1458,10 +1706,12 @@ def hollow_block(solid_group: solidGroup, remove_orig_face=False):
         # If it's 4 units thick, skip hollowing - PeTI did it already.
         if remove_orig_face:
             VMF.remove_brush(orig_solid)
+            FACES.remove_solid(orig_solid)
             del SOLIDS[solid_group.face.get_origin().as_tuple()]
         return
 
     VMF.remove_brush(orig_solid)
+    FACES.remove_solid(orig_solid)
 
     for face in orig_solid.sides:
         if remove_orig_face and face is solid_group.face:
@@ -1499,11 +1749,12 @@ def hollow_block(solid_group: solidGroup, remove_orig_face=False):
 
                 # Overwrite all the properties, to make the new brush
                 # the same as the original.
-                new_face.mat = face.mat
+                FACES.set_mat(new_face, face.mat)
                 new_face.uaxis = face.uaxis
                 new_face.vaxis = face.vaxis
                 new_face.planes = face.planes
                 new_face.ham_rot = 0
+                FACES.update_origin(new_face)
 
                 # Swap the two IDs - that way when the original face gets
                 # deleted the auto-set ID will vanish, leaving the original
@@ -11,7 +11,7 @@ from conditions import (
     remove_ant_toggle,
     PETI_INST_ANGLE, RES_EXHAUSTED
 )
-from instanceLocs import resolve as resolve_inst, get_special_inst
+from instanceLocs import resolve as resolve_inst, resolve_set, get_special_inst
 from srctools import Vec, Property, VMF, Entity, Output
 
 
@@ -160,7 +160,7 @@ def res_find_potential_tag_fizzlers(vmf: VMF, inst: Entity):
     if vbsp_options.get(str, 'game_id') != utils.STEAM_IDS['TAG']:
         return RES_EXHAUSTED
 
-    if inst['file'].casefold() not in resolve_inst('<ITEM_BARRIER_HAZARD:0>'):
+    if inst['file'].casefold() not in resolve_set('<ITEM_BARRIER_HAZARD:0>'):
         return
 
     # The key list in the dict will be a set of all fizzler items!
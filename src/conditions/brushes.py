@@ -10,7 +10,8 @@ import vbsp
 import vbsp_options
 import comp_consts as const
 from conditions import (
-    make_result, make_result_setup, SOLIDS, MAT_TYPES, TEMPLATES, TEMP_TYPES
+    make_result, make_result_setup, SOLIDS, MAT_TYPES, TEMPLATES, TEMP_TYPES,
+    FACES,
 )
 from srctools import Property, NoKeyError, Vec, Output, Entity, Side, conv_bool
 
@@ -235,7 +236,7 @@ def res_set_texture(inst: Entity, res: Property):
         )
         for face in temp_brush:
             if face.normal() == brush.normal:
-                face_to_mod.mat = face.mat
+                FACES.set_mat(face_to_mod, face.mat)
                 # It's OK to reuse this axis, the original is
                 # going away when we go out of scope.
                 face_to_mod.uaxis = face.uaxis
@@ -245,14 +246,14 @@ def res_set_texture(inst: Entity, res: Property):
     tex = res['tex']
 
     if tex.startswith('[') and tex.endswith(']'):
-        face_to_mod.mat = vbsp.get_tex(tex[1:-1])
+        FACES.set_mat(face_to_mod, vbsp.get_tex(tex[1:-1]))
     elif tex.startswith('<') and tex.endswith('>'):
         # Special texture names!
         tex = tex[1:-1].casefold()
         if tex == 'white':
-            face_to_mod.mat = 'tile/white_wall_tile003a'
+            FACES.set_mat(face_to_mod, 'tile/white_wall_tile003a')
         elif tex == 'black':
-            face_to_mod.mat = 'metal/black_wall_metal_002c'
+            FACES.set_mat(face_to_mod, 'metal/black_wall_metal_002c')
 
         if tex == 'black' or tex == 'white':
             # For these two, run the regular logic to apply textures
@@ -280,15 +281,15 @@ def res_set_texture(inst: Entity, res: Property):
             # 4x4 and 2x2 instructions are ignored on floors and ceilings.
             orient = vbsp.get_face_orient(face_to_mod)
             if orient == vbsp.ORIENT.wall:
-                face_to_mod.mat = vbsp.get_tex(
+                FACES.set_mat(face_to_mod, vbsp.get_tex(
                     color + '.' + tex[-3:]
-                )
+                ))
             else:
-                face_to_mod.mat = vbsp.get_tex(
+                FACES.set_mat(face_to_mod, vbsp.get_tex(
                     color + '.' + str(orient)
-                )
+                ))
     else:
-        face_to_mod.mat = tex
+        FACES.set_mat(face_to_mod, tex)
 
 
 @make_result('AddBrush')
@@ -371,14 +372,17 @@ def res_add_brush(inst: Entity, res: Property):
 
     if srctools.conv_bool(res['detail', False], False):
         # Add the brush to a func_detail entity
-        vbsp.VMF.create_ent(
+        detail = vbsp.VMF.create_ent(
             classname='func_detail'
-        ).solids = [
+        )
+        detail.solids = [
             solids.solid
         ]
+        FACES.add_detail(detail)
     else:
         # Add to the world
         vbsp.VMF.add_brush(solids.solid)
+        FACES.add_solid(solids.solid)
 
 
 @make_result_setup('TemplateBrush')
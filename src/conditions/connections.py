@@ -3,7 +3,7 @@ import srctools
 import utils
 from conditions import (
     make_flag, make_result, make_result_setup,
-    resolve_value, local_name,
+    resolve_value, local_name, find_inst_named,
     CONNECTIONS,
 )
 from conditions.instances import GLOBAL_INPUT_ENTS
@@ -138,7 +138,7 @@ def res_locking_input(inst: Entity, res: Property):
     The parameter is an `instance:name;Input` value, which resets the item.
     This must be executed after the `MarkLocking` results have run.
     """
-    from vbsp import IND_ITEM_NAMES, IND_PANEL_NAMES, VMF
+    from vbsp import IND_ITEM_NAMES, IND_PANEL_NAMES
     in_name, in_inp = Output.parse_name(res.value)
 
     targets = {
@@ -167,8 +167,8 @@ def res_locking_input(inst: Entity, res: Property):
         # Skip toggle or indicator panel items.
         if out.target in IND_PANEL_NAMES
     }
-    for pan_inst in VMF.by_class['func_instance']:
-        if pan_inst['targetname'] in ind_panels:
+    for pan_name in ind_panels:
+        for pan_inst in find_inst_named(pan_name):
             pan_inst.remove()
 
     # Add an output pointing in the opposite direction.
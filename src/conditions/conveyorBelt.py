@@ -214,6 +214,7 @@ def res_conveyor_belt(inst: Entity, res: Property):
     ).solid
 
     vmf.add_brush(base_trig)
+    conditions.FACES.add_solid(base_trig)
 
     # Make a paint_cleanser under the belt..
     if res.bool('PaintFizzler'):
@@ -16,6 +16,8 @@ from conditions import (
 from instanceLocs import resolve as resolve_inst
 from srctools import Property, Vec, Entity, Output
 
+from typing import List
+
 # Map sign_type values to the item ID and the resolveInst ID.
 IND_PANEL_TYPES = {
     'check': ('item_indicator_panel', '[indPanCheck]'),
@@ -84,11 +86,12 @@ def res_cust_output(inst: Entity, res: Property):
 
     # These all require us to search through the instances.
     if force_sign_type or dec_con_count or targ_conditions:
-        for con_inst in vbsp.VMF.by_class['func_instance']:  # type: Entity
-            if con_inst['targetname'] not in targets:
-                # Not our instance
-                continue
-
+        con_instances = [
+            con_inst
+            for targ_name in list(targets)
+            for con_inst in conditions.find_inst_named(targ_name)
+        ]  # type: List[Entity]
+        for con_inst in con_instances:
             # Is it an indicator panel, and should we be modding it?
             if force_sign_type is not None and con_inst['file'].casefold() in pan_files:
                 # Remove the panel
@@ -408,6 +411,7 @@ def res_faith_mods(inst: Entity, res: Property):
             # Remove the trigger solids from worldspawn..
             for solid in trig.solids:
                 vbsp.VMF.remove_brush(solid)
+                conditions.FACES.remove_solid(solid)
 
         if trig_enabled is not None and 'helper' not in trig['targetname']:
             trig['startdisabled'] = srctools.bool_as_int(not trig_enabled)
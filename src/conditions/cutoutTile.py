@@ -7,7 +7,7 @@ import srctools
 import utils
 import vbsp
 import comp_consts as consts
-from instanceLocs import resolve as resolve_inst
+from instanceLocs import resolve as resolve_inst, resolve_set
 from perlin import SimplexNoise
 from srctools import Property, Vec_tuple, Vec, Entity, Side, UVAxis
 
@@ -52,7 +52,7 @@ FLOOR_DEPTH = 8  # Distance we drop the floor
 def find_indicator_panels(inst: Entity):
     """We need to locate indicator panels, so they aren't overwritten.
     """
-    if inst['file'].casefold() not in resolve_inst('[indpan]'):
+    if inst['file'].casefold() not in resolve_set('[indpan]'):
         return
     loc = Vec(0, 0, -64).rotate_by_str(inst['angles'])
     loc += Vec.from_str(inst['origin'])
@@ -221,11 +221,13 @@ def res_cutout_tile(res: Property):
             )
 
         # Add a player_clip brush across the whole area
-        conditions.VMF.add_brush(conditions.VMF.make_prism(
+        clip = conditions.VMF.make_prism(
             p1=box_min - (64, 64, FLOOR_DEPTH),
             p2=box_max + (64, 64, 0),
             mat=MATS['clip'][0],
-        ).solid)
+        ).solid
+        conditions.VMF.add_brush(clip)
+        conditions.FACES.add_solid(clip)
 
         # Add a noportal_volume covering the surface, in case there's
         # room for a portal.
@@ -357,6 +359,7 @@ def res_cutout_tile(res: Property):
                 noise_weight=weights[x, y],
                 noise_func=noise,
             )
+        conditions.FACES.add_detail(detail_ent)
 
     add_floor_sides(floor_edges)
 
@@ -400,7 +403,8 @@ def convert_floor(
         # This is a pillar block - there isn't actually tiles here!
         # We need to generate a squarebeams brush to fill this gap.
 
-        brush.face.mat = 'tools/toolsnodraw'  # It won't be visible
+        # It won't be visible
+        conditions.FACES.set_mat(brush.face, 'tools/toolsnodraw')
         temp_data = conditions.import_template(
             temp_name=FLOOR_TEMP_PILLAR,
             origin=loc,
@@ -424,7 +428,8 @@ def convert_floor(
     # Move the floor brush down and switch to the floorbase texture.
     for plane in brush.face.planes:
         plane.z -= FLOOR_DEPTH
-    brush.face.mat = random.choice(mats['floorbase'])
+    conditions.FACES.update_origin(brush.face)
+    conditions.FACES.set_mat(brush.face, random.choice(mats['floorbase']))
 
     loc.x -= 64
     loc.y -= 64
@@ -696,6 +701,7 @@ def make_alpha_base(bbox_min: Vec, bbox_max: Vec, noise: SimplexNoise):
                 noise=noise,
             )
             conditions.VMF.add_brush(brush.solid)
+            conditions.FACES.add_solid(brush.solid)
 
 
 def make_displacement(
@@ -758,8 +764,8 @@ def make_displacement(
 def add_floor_sides(locs):
     """We need to replace nodraw textures around the outside of the holes.
 
-    This requires looping through all faces, since these will have been
-    nodrawed.
+    These will have been nodrawed, so look them up by location in the
+    face index.
     """
     added_locations = {
         barrier.wall.as_tuple(): False
@@ -767,13 +773,14 @@ def add_floor_sides(locs):
         locs
     }
 
-    for face in conditions.VMF.iter_wfaces(world=True, detail=False):
-        if face.mat != 'tools/toolsnodraw':
-            continue
-        loc = face.get_origin().as_tuple()
-        if loc in added_locations:
+    for loc in added_locations:
+        for face in conditions.FACES.find_origin(loc):
+            if face.mat != 'tools/toolsnodraw':
+                continue
+            if not conditions.FACES.is_world(face):
+                continue
             random.seed('floor_side_{}_{}_{}'.format(*loc))
-            face.mat = random.choice(MATS['squarebeams'])
+            conditions.FACES.set_mat(face, random.choice(MATS['squarebeams']))
             added_locations[loc] = True
             # Swap these to flip the texture diagonally, so the beam is at top
             face.uaxis, face.vaxis = face.vaxis, face.uaxis
@@ -113,6 +113,7 @@ def res_insert_overlay(inst: Entity, res: Property):
     # Wipe the brushes from the map.
     if temp.detail is not None:
         temp.detail.remove()
+        conditions.FACES.remove_detail(temp.detail)
         LOGGER.info(
             'Overlay template "{}" could set keep_brushes=0.',
             temp_id,
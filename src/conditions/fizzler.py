@@ -68,24 +68,28 @@ def res_cust_fizzler(base_inst: Entity, res: Property):
         fizz_name + '_modelEnd',
         )
     is_laser = False
-    for inst in vbsp.VMF.by_class['func_instance']:
-        if inst['targetname'] in model_targetnames:
-            if inst.fixup['skin', '0'] == '2':
-                is_laser = True
-            if model_name is not None:
-                if model_name == '':
-                    inst['targetname'] = base_inst['targetname']
-                else:
-                    inst['targetname'] = (
-                        base_inst['targetname'] +
-                        '-' +
-                        model_name
-                    )
-            if make_unique:
-                inst.make_unique()
+    model_insts = [
+        inst
+        for targetname in model_targetnames
+        for inst in conditions.find_inst_named(targetname)
+    ]
+    for inst in model_insts:
+        if inst.fixup['skin', '0'] == '2':
+            is_laser = True
+        if model_name is not None:
+            if model_name == '':
+                inst['targetname'] = base_inst['targetname']
+            else:
+                inst['targetname'] = (
+                    base_inst['targetname'] +
+                    '-' +
+                    model_name
+                )
+        if make_unique:
+            inst.make_unique()
 
-            for key, value in base_inst.fixup.items():
-                inst.fixup[key] = value
+        for key, value in base_inst.fixup.items():
+            inst.fixup[key] = value
 
     base_inst.fixup['$is_laser'] = is_laser
 
@@ -365,10 +369,8 @@ def res_fizzler_pair(begin_inst: Entity, res: Property):
 
     begin_pos = Vec.from_str(begin_inst['origin'])
     axis_1, axis_2, main_axis = PAIR_AXES[direction.as_tuple()]
-    for end_inst in vbsp.VMF.by_class['func_instance']:
-        if end_inst['targetname', ''] != end_name:
-            # Only examine this barrier hazard's instances!
-            continue
+    # Only examine this barrier hazard's instances!
+    for end_inst in conditions.find_inst_named(end_name):
         if end_inst['file'] != orig_file:
             # Allow adding overlays or other instances at the ends.
             continue
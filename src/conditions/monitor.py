@@ -1,12 +1,11 @@
 from collections import namedtuple, defaultdict
-import os
 import math
 
 from conditions import (
     make_result, make_result_setup, meta_cond, RES_EXHAUSTED,
-    local_name
+    local_name, FACES,
 )
-from instanceLocs import resolve as resolve_inst
+from instanceLocs import resolve as resolve_inst, resolve_set
 from srctools import Property, Vec, Entity, VMF
 import srctools
 import vbsp_options
@@ -24,7 +23,8 @@ ALL_CAMERAS = []  # type: List[Camera]
 # and that we remove when more than one camera is pointed here.
 BULLSYE_LOCS = defaultdict(int)
 
-MON_ARGS_SCRIPT = os.path.join('BEE2', 'inject', 'monitor_args.nut')
+# The script containing the camera arguments, in bee2/inject/.
+MON_ARGS_SCRIPT = 'monitor_args.nut'
 
 Camera = namedtuple('Camera', 'inst config cam_pos cam_angles')
 Monitor = namedtuple('Monitor', 'inst')
@@ -193,7 +193,7 @@ def mon_remove_bullseyes(inst: Entity):
     if not BULLSYE_LOCS:
         return RES_EXHAUSTED
 
-    if inst['file'].casefold() not in resolve_inst('<ITEM_CATAPULT_TARGET>'):
+    if inst['file'].casefold() not in resolve_set('<ITEM_CATAPULT_TARGET>'):
         return
 
     LOGGER.info('Bullseye {}', BULLSYE_LOCS)
@@ -279,7 +279,7 @@ def mon_camera_link():
     vbsp.PACK_FILES.add('scripts/vscripts/BEE2/mon_camera.nut')
 
     # Write out a script containing the arguments to the camera.
-    with open(MON_ARGS_SCRIPT, 'w') as scr:
+    with vbsp.open_inject(MON_ARGS_SCRIPT) as scr:
         scr.write('CAM_NUM <- {};\n'.format(len(ALL_CAMERAS)))
         scr.write('CAM_ACTIVE_NUM <- {};\n'.format(sum(active_counts)))
         scr.write('CAM_ACTIVE <- {!r};\n'.format(active_counts))
@@ -341,9 +341,12 @@ def make_voice_studio(vmf: VMF, loc: Vec):
     else:
         # If there aren't monitors, the studio instance isn't used.
         # We need to seal anyway.
-        vmf.add_brushes(vmf.make_hollow(
+        walls = vmf.make_hollow(
             loc - 256,
             loc + 256,
             thick=32,
-        ))
+        )
+        vmf.add_brushes(walls)
+        for solid in walls:
+            FACES.add_solid(solid)
         return False
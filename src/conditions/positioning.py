@@ -2,7 +2,7 @@ import math
 
 from conditions import (
     make_flag, make_result,
-    DIRECTIONS, SOLIDS, GOO_LOCS,
+    DIRECTIONS, SOLIDS, GOO_LOCS, FACES,
 )
 from srctools import Vec, Entity, Property
 import srctools
@@ -115,6 +115,7 @@ def flag_brush_at_loc(inst: Entity, flag: Property):
             VMF.remove_brush(
                 brush.solid,
             )
+            FACES.remove_solid(brush.solid)
 
     if result_var:
         inst.fixup[result_var] = br_type
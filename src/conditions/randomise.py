@@ -6,7 +6,7 @@ import conditions
 import srctools
 
 from conditions import (
-    Condition, make_flag,  make_result, make_result_setup, RES_EXHAUSTED,
+    Condition, make_flag,  make_result, make_result_setup,
 )
 
 
@@ -77,8 +77,8 @@ def res_random(inst: Entity, res: Property):
     results in a "group" property block to treat them as a single result to be
     executed in order.
     """
-    # Note: 'global' results like "Has" won't delete themselves!
-    # Instead they're replaced by 'dummy' results that don't execute.
+    # Note: 'global' results like "Has" aren't removed from the choices!
+    # Instead they're skipped once exhausted.
     # Otherwise the chances would be messed up.
     seed, chance, weight, results = res.value
     random.seed('random_case_{}:{}_{}_{}'.format(
@@ -94,22 +94,9 @@ def res_random(inst: Entity, res: Property):
     choice = results[ind]  # type: Property
     if choice.name == 'group':
         for sub_res in choice.value:
-            should_del = Condition.test_result(
-                inst,
-                sub_res,
-            )
-            if should_del is RES_EXHAUSTED:
-                # This Result doesn't do anything!
-                sub_res.name = 'nop'
-                sub_res.value = None
+            Condition.run_result(inst, sub_res)
     else:
-        should_del = Condition.test_result(
-            inst,
-            choice,
-        )
-        if should_del is RES_EXHAUSTED:
-            choice.name = 'nop'
-            choice.value = None
+        Condition.run_result(inst, choice)
 
 
 @make_result_setup('variant')
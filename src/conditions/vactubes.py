@@ -8,7 +8,7 @@ import vbsp
 from conditions import (
     make_result, make_result_setup, RES_EXHAUSTED,
     import_template, remove_ant_toggle,
-    TEMP_TYPES, GOO_LOCS, SOLIDS
+    TEMP_TYPES, GOO_LOCS, SOLIDS, FACES,
 )
 from instanceLocs import resolve as resolve_inst
 from srctools import (
@@ -383,6 +383,7 @@ def make_corner(origin, angle, size, config):
         ).world
         for solid in temp_solids:
             vbsp.VMF.remove_brush(solid)
+            FACES.remove_solid(solid)
         motion_trigger(*temp_solids)
 
 
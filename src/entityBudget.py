@@ -0,0 +1,335 @@
+"""Estimate the entity, brush and overlay counts VBSP will produce.
+
+process_vbsp_log() only finds out these values after VBSP has run. Here we
+count the styled map and the contents of each instance beforehand. If the
+map is close to the entity limit, changes which save entities are applied.
+"""
+import os
+from collections import Counter, defaultdict
+
+from srctools import Property, Vec, VMF
+from BEE2_config import ConfigFile
+import instanceLocs
+import vmf_fast
+import vbsp_options
+import utils
+
+from typing import Tuple
+
+LOGGER = utils.getLogger(__name__)
+
+# Instance filenames are relative to this folder.
+INST_ROOT = os.path.join('..', 'sdk_content', 'maps')
+
+# Stores the counts for each instance, so they only need to be read
+# once. This is in the bee2/ folder.
+INST_STATS_FILE = 'instance_stats.cfg'
+# Increment this when the counting changes, so old counts are redone.
+INST_STATS_VERSION = '2'
+
+# The limits the map is compared against. The entity limit is the in-game
+# edict limit, which is much lower than VBSP's own maximum.
+LIMITS = {
+    'brush': 8192,
+    'overlay': 512,
+    'entity': 2048,
+}
+
+# Entities which VBSP removes, or merges into the world.
+REMOVED_CLASSES = {
+    'func_instance',
+    'func_instance_parms',
+    'func_instance_io_proxy',
+    'func_instance_origin',
+    'func_detail',
+    'func_viscluster',
+    'prop_static',
+    'info_null',
+    'info_lighting',
+    'env_cubemap',
+}
+
+# Entities which VBSP removes unless they're named, so they can be
+# controlled ingame. Overlays are also counted separately.
+REMOVED_UNNAMED = {
+    'info_overlay',
+    'infodecal',
+    'light',
+    'light_spot',
+}
+
+# Trigger types which can be combined, if they're identical and have
+# no outputs.
+MERGE_TRIGGERS = {
+    'trigger_multiple',
+    'trigger_hurt',
+    'trigger_push',
+}
+
+
+def count_map(vmf: VMF) -> Tuple[Counter, Counter]:
+    """Count the contents of a map.
+
+    This returns the counts for the map itself (excluding worldspawn),
+    and how many times each instance file is used.
+    """
+    counts = Counter()
+    instances = Counter()
+    counts['brush'] = len(vmf.brushes)
+    for ent in vmf.entities:
+        classname = ent['classname', ''].casefold()
+        counts['brush'] += len(ent.solids)
+        if classname == 'func_instance':
+            instances[ent['file', ''].casefold()] += 1
+            continue
+        if classname == 'info_overlay':
+            counts['overlay'] += 1
+        if classname in REMOVED_UNNAMED:
+            if ent['targetname', '']:
+                counts['entity'] += 1
+        elif classname not in REMOVED_CLASSES:
+            counts['entity'] += 1
+    return counts, instances
+
+
+class InstanceStats:
+    """Counts the contents of instance files.
+
+    Results are cached by the file's modification time.
+    """
+    def __init__(self):
+        self.config = ConfigFile(INST_STATS_FILE, root='bee2')
+        # Filename -> the totals for that instance, including
+        # nested instances.
+        self.totals = {}
+        # Sections which were recounted, and need saving.
+        self.updated = {}
+
+    def get(self, filename: str, parents: Tuple[str, ...]=()) -> Counter:
+        """Return the counts for the given instance."""
+        try:
+            return self.totals[filename]
+        except KeyError:
+            pass
+
+        path = os.path.join(INST_ROOT, filename)
+        try:
+            mtime = str(os.stat(path).st_mtime_ns)
+        except FileNotFoundError:
+            LOGGER.debug('Instance "{}" not found!', filename)
+            self.totals[filename] = total = Counter()
+            return total
+
+        if (
+            self.config.get_val(filename, 'mtime', '') == mtime and
+            self.config.get_val(filename, 'version', '') == INST_STATS_VERSION
+        ):
+            section = self.config[filename]
+            counts = Counter({
+                kind: int(section.get(kind, '0'))
+                for kind in LIMITS
+            })
+            nested = Counter()
+            for inst in section.get('instances', '').split('|'):
+                if inst:
+                    inst_file, num = inst.rsplit('*', 1)
+                    nested[inst_file] = int(num)
+        else:
+            counts, nested = self.read_instance(path)
+            self.updated[filename] = self.config[filename] = {
+                'mtime': mtime,
+                'version': INST_STATS_VERSION,
+                'entity': str(counts['entity']),
+                'brush': str(counts['brush']),
+                'overlay': str(counts['overlay']),
+                'instances': '|'.join(
+                    '{}*{}'.format(inst_file, num)
+                    for inst_file, num in nested.items()
+                ),
+            }
+
+        total = Counter(counts)
+        parents += (filename, )
+        for inst_file, num in nested.items():
+            if inst_file in parents:
+                LOGGER.warning('Instance "{}" contains itself!', inst_file)
+                continue
+            for kind, value in self.get(inst_file, parents).items():
+                total[kind] += value * num
+        self.totals[filename] = total
+        return total
+
+    @staticmethod
+    def read_instance(path: str) -> Tuple[Counter, Counter]:
+        """Parse an instance, and count its contents."""
+        LOGGER.debug('Counting contents of "{}"...', path)
+        try:
+            vmf = vmf_fast.load_vmf(path)
+        except vmf_fast.FastParseError:
+            with open(path) as f:
+                vmf = VMF.parse(Property.parse(f, path))
+        return count_map(vmf)
+
+    def save(self):
+        """Save any new counts.
+
+        Batch workers can save at the same time, so the file is re-read
+        and our counts added to it. That's written to a temporary file
+        for this process, then renamed over the original.
+        """
+        if not self.updated:
+            return
+        config = ConfigFile(INST_STATS_FILE, root='bee2')
+        for filename, section in self.updated.items():
+            config[filename] = section
+        temp_path = '{}.{}.tmp'.format(config.filename, os.getpid())
+        os.makedirs(os.path.dirname(temp_path), exist_ok=True)
+        with open(temp_path, 'w') as f:
+            config.write(f)
+        os.replace(temp_path, config.filename)
+        self.updated.clear()
+
+
+def estimate(vmf: VMF, stats: InstanceStats) -> Counter:
+    """Estimate the counts for the compiled map."""
+    counts, instances = count_map(vmf)
+    counts['entity'] += 1  # Worldspawn
+    for filename, num in instances.items():
+        for kind, value in stats.get(filename).items():
+            counts[kind] += value * num
+    return counts
+
+
+def merge_triggers(vmf: VMF):
+    """Combine identical unnamed triggers into one entity.
+
+    This is the same as collapse_goo_trig(), but for any trigger.
+    Triggers with outputs are left alone, since the merged trigger would
+    only fire them once for the whole volume.
+    """
+    import vbsp
+    groups = defaultdict(list)
+    for ent in vmf.entities:
+        if (
+            ent['classname', ''].casefold() not in MERGE_TRIGGERS or
+            ent['targetname', ''] or
+            not ent.solids or
+            ent.outputs or
+            ent in vbsp.IGNORED_BRUSH_ENTS
+        ):
+            continue
+        groups[
+            ent['classname'].casefold(),
+            frozenset(
+                (key.casefold(), value)
+                for key, value in ent.keys.items()
+                if key.casefold() not in ('origin', 'hammerid')
+            ),
+        ].append(ent)
+
+    for first, *others in groups.values():
+        for trig in others:
+            first.solids.extend(trig.solids)
+            trig.remove()
+
+
+def combine_goo_mist(vmf: VMF):
+    """Replace groups of small goo mist particles with larger ones.
+
+    The larger particle may extend slightly past the goo.
+    """
+    cells = defaultdict(list)
+    for ent in vmf.by_class['info_particle_system']:
+        if ent['targetname', ''] != '@goo_mist':
+            continue
+        if ent['effect_name', ''] != 'water_mist_256':
+            continue
+        origin = Vec.from_str(ent['origin'])
+        cells[origin.z, origin.x // 512, origin.y // 512].append(ent)
+
+    for mists in cells.values():
+        if len(mists) < 2:
+            continue
+        # Center the larger particle over the ones it replaces.
+        center = Vec()
+        for mist in mists:
+            center += Vec.from_str(mist['origin'])
+        center /= len(mists)
+
+        first, *others = mists
+        first['effect_name'] = 'water_mist_512'
+        first['origin'] = center.join(' ')
+        first['angles'] = '0 0 0'
+        for mist in others:
+            mist.remove()
+
+
+def static_antlines(vmf: VMF):
+    """Make antlines static, and remove the toggles controlling them.
+
+    Antlines will no longer change when items are activated.
+    """
+    toggle_file = instanceLocs.resolve('<ITEM_INDICATOR_TOGGLE>')
+    for inst in vmf.by_class['func_instance']:
+        if inst['file'].casefold() not in toggle_file:
+            continue
+        overlay_name = inst.fixup['$indicator_name', '']
+        if not overlay_name:
+            continue
+        for overlay in list(vmf.by_target[overlay_name]):
+            if overlay['classname'] == 'info_overlay':
+                del overlay['targetname']
+        if not vmf.by_target[overlay_name]:
+            inst.remove()
+
+
+# Entity-saving changes, in order from least to most noticeable.
+# The last value is True if the change alters how the map looks or
+# behaves - those are only done if budget_lossy is enabled.
+TRANSFORMS = [
+    ('Merge triggers', merge_triggers, False),
+    ('Combine goo mist', combine_goo_mist, True),
+    ('Static antlines', static_antlines, True),
+]
+
+
+def optimise(vmf: VMF):
+    """Estimate the map's counts, and reduce entities if close to the limit.
+    """
+    LOGGER.info('Estimating entity counts...')
+    stats = InstanceStats()
+    margin = vbsp_options.get(float, 'budget_margin')
+    allow_lossy = vbsp_options.get(bool, 'budget_lossy')
+
+    counts = estimate(vmf, stats)
+    LOGGER.info(
+        'Estimated counts: {} entities, {} brushes, {} overlays',
+        counts['entity'],
+        counts['brush'],
+        counts['overlay'],
+    )
+
+    for name, func, lossy in TRANSFORMS:
+        if counts['entity'] < LIMITS['entity'] * margin:
+            break
+        if lossy and not allow_lossy:
+            continue
+        func(vmf)
+        new_counts = estimate(vmf, stats)
+        LOGGER.info(
+            '{}: saved {} entities ({} left)',
+            name,
+            counts['entity'] - new_counts['entity'],
+            new_counts['entity'],
+        )
+        counts = new_counts
+
+    for kind, limit in LIMITS.items():
+        if counts[kind] >= limit * margin:
+            LOGGER.warning(
+                'Map is close to the {} limit! ({}/{})',
+                kind,
+                counts[kind],
+                limit,
+            )
+    stats.save()
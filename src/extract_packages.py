@@ -21,7 +21,6 @@ LOGGER = utils.getLogger(__name__)
 UPDATE_INTERVAL = 500  # Number of miliseconds between each progress check
 
 files_done = False
-res_count = -1
 progress_var = tk.IntVar()
 zip_list = []
 currently_done = multiprocessing.Value('I')  # int value used to show status
@@ -37,6 +36,16 @@ def done_callback():
     pass
 
 
+def extract_images():
+    """Extract the package images in the background.
+
+    One image is extracted each time Tk is idle, so this doesn't hold up
+    the UI. Images shown before then are extracted by img.png().
+    """
+    if packageLoader.extract_next_image():
+        TK_ROOT.after_idle(extract_images)
+
+
 def do_copy(zip_list, done_files):
     cache_path = os.path.abspath('../cache/')
     music_samp = os.path.abspath('../sounds/music_samp/')
@@ -135,12 +144,12 @@ def update():
     """Check the progress of the copying until it's done.
     """
     progress_var.set(
-        1000 * currently_done.value / res_count,
+        1000 * currently_done.value / packageLoader.res_count,
     )
     export_btn_text.set(
         'Extracting Resources ({!s}/{!s})...'.format(
             currently_done.value,
-            res_count,
+            packageLoader.res_count,
         )
     )
     if not copy_process.is_alive():
@@ -5,33 +5,31 @@ Does stuff related to the actual games.
 - Modifying GameInfo to support our special content folder.
 - Generating and saving editoritems/vbsp_config
 """
-from tkinter import *  # ui library
-from tkinter import filedialog  # open/save as dialog creator
-from tkinter import messagebox  # simple, standard modal dialogs
-from tk_tools import TK_ROOT
-
 import os
 import os.path
 import shutil
 import math
 
 from BEE2_config import ConfigFile, GEN_OPTS
-from query_dialogs import ask_string
 from srctools import Vec, Property, NoKeyError, VPK, VMF, Output
-import backup
-import extract_packages
-import loadScreen
 import packageLoader
 import utils
 import srctools
 
-from typing import List, Optional
+from typing import List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from tkinter import IntVar, Menu
+    from loadScreen import LoadScreen
 
 LOGGER = utils.getLogger(__name__)
 
+# Tkinter is only imported by the functions which display UI, so configs
+# can be exported without it.
+
 all_games = [] # type: List[Game]
 selected_game = None  # type: Game
-selectedGame_radio = IntVar(value=0)
+selectedGame_radio = None  # type: IntVar
 game_menu = None  # type: Menu
 
 # Translated text from basemodui.txt.
@@ -73,16 +71,9 @@ EDITOR_SOUND_LINE = '// BEE2 SOUNDS BELOW'
 CONN_NORM = 'CONNECTION_STANDARD'
 CONN_FUNNEL = 'CONNECTION_TBEAM_POLARITY'
 
-# The progress bars used when exporting data into a game
-export_screen = loadScreen.LoadScreen(
-    ('BACK', 'Backup Original Files'),
-    (backup.AUTO_BACKUP_STAGE, 'Backup Puzzles'),
-    ('EXP', 'Export Configuration'),
-    ('COMP', 'Copy Compiler'),
-    ('RES', 'Copy Resources'),
-    ('MUS', 'Copy Music'),
-    title_text='Exporting',
-)
+# The progress bars used when exporting data into a game.
+# This is created by get_export_screen() when first needed.
+export_screen = None  # type: LoadScreen
 
 EXE_SUFFIX = (
     '.exe' if utils.WIN else
@@ -168,6 +159,33 @@ sp_a5_finale02_stage_end.wav\
 # want_you_gone_guitar_cover.wav
 
 
+def get_export_screen() -> 'LoadScreen':
+    """Return the loading screen used when exporting, creating it if needed."""
+    global export_screen
+    if export_screen is None:
+        import backup
+        import loadScreen
+        export_screen = loadScreen.LoadScreen(
+            ('BACK', 'Backup Original Files'),
+            (backup.AUTO_BACKUP_STAGE, 'Backup Puzzles'),
+            ('EXP', 'Export Configuration'),
+            ('COMP', 'Copy Compiler'),
+            ('RES', 'Copy Resources'),
+            ('MUS', 'Copy Music'),
+            title_text='Exporting',
+        )
+    return export_screen
+
+
+def get_game_radio() -> 'IntVar':
+    """Return the variable for the selected game, creating it if needed."""
+    global selectedGame_radio
+    if selectedGame_radio is None:
+        from tkinter import IntVar
+        selectedGame_radio = IntVar(value=0)
+    return selectedGame_radio
+
+
 def translate(string):
     return TRANS_DATA.get(string, string)
 
@@ -358,10 +376,10 @@ class Game:
         LOGGER.info("Cache invalid - copying..")
         return False
 
-    def refresh_cache(self):
+    def refresh_cache(self, screen: 'LoadScreen'):
         """Copy over the resource files into this game."""
 
-        screen_func = export_screen.step
+        screen_func = screen.step
         copy = shutil.copy
 
         def copy_func(src, dest):
@@ -411,6 +429,7 @@ class Game:
             style: packageLoader.Style,
             selected_objects: dict,
             should_refresh=False,
+            screen: 'LoadScreen'=None,
             ):
         """Generate the editoritems.txt and vbsp_config.
 
@@ -418,7 +437,14 @@ class Game:
         - For each object type, run its .export() function with the given
         - item.
         - Styles are a special case.
+
+        screen is an object to report progress to, with the same methods as
+        LoadScreen. If set, the export runs without any UI - errors are only
+        logged, and puzzles are not backed up.
         """
+        headless = screen is not None
+        if not headless:
+            screen = get_export_screen()
 
         LOGGER.info('-' * 20)
         LOGGER.info('Exporting Items and Style for "{}"!', self.name)
@@ -430,7 +456,7 @@ class Game:
                 LOGGER.info('{} = {}', obj, selected)
 
         # VBSP, VRAD, editoritems
-        export_screen.set_length('BACK', len(FILES_TO_BACKUP))
+        screen.set_length('BACK', len(FILES_TO_BACKUP))
         # files in compiler/
         try:
             num_compiler_files = len(os.listdir('../compiler'))
@@ -443,9 +469,9 @@ class Game:
 
         if num_compiler_files == 0:
             LOGGER.warning('No compiler files!')
-            export_screen.skip_stage('COMP')
+            screen.skip_stage('COMP')
         else:
-            export_screen.set_length('COMP', num_compiler_files)
+            screen.set_length('COMP', num_compiler_files)
 
         LOGGER.info('Should refresh: {}', should_refresh)
         if should_refresh:
@@ -453,23 +479,24 @@ class Game:
             should_refresh = not self.cache_valid()
 
         if should_refresh:
-            export_screen.set_length('RES', extract_packages.res_count)
+            screen.set_length('RES', packageLoader.res_count)
         else:
-            export_screen.skip_stage('RES')
-            export_screen.skip_stage('MUS')
+            screen.skip_stage('RES')
+            screen.skip_stage('MUS')
 
         # The items, plus editoritems, vbsp_config and the instance list.
-        export_screen.set_length('EXP', len(packageLoader.OBJ_TYPES) + 3)
+        screen.set_length('EXP', len(packageLoader.OBJ_TYPES) + 3)
 
-        export_screen.show()
-        export_screen.grab_set_global()  # Stop interaction with other windows
+        screen.show()
+        screen.grab_set_global()  # Stop interaction with other windows
 
         # Make the folders we need to copy files to, if desired.
         os.makedirs(self.abs_path('bin/bee2/'), exist_ok=True)
 
         # Start off with the style's data.
-        editoritems, vbsp_config = style.export()
-        export_screen.step('EXP')
+        with utils.span('export.object', type='Style'):
+            editoritems, vbsp_config = style.export()
+        screen.step('EXP')
 
         # Export each object type.
         for obj_name, obj_data in packageLoader.OBJ_TYPES.items():
@@ -479,14 +506,15 @@ class Game:
             LOGGER.info('Exporting "{}"', obj_name)
             selected = selected_objects.get(obj_name, None)
 
-            obj_data.cls.export(packageLoader.ExportData(
-                game=self,
-                selected=selected,
-                editoritems=editoritems,
-                vbsp_conf=vbsp_config,
-                selected_style=style,
-            ))
-            export_screen.step('EXP')
+            with utils.span('export.object', type=obj_name):
+                obj_data.cls.export(packageLoader.ExportData(
+                    game=self,
+                    selected=selected,
+                    editoritems=editoritems,
+                    vbsp_conf=vbsp_config,
+                    selected_style=style,
+                ))
+            screen.step('EXP')
 
         vbsp_config.set_key(
             ('Options', 'BEE2_loc'),
@@ -515,10 +543,12 @@ class Game:
             if os.path.isfile(item_path) and not os.path.isfile(backup_path):
                 LOGGER.info('Backing up original {}!', name)
                 shutil.copy(item_path, backup_path)
-            export_screen.step('BACK')
+            screen.step('BACK')
 
         # Backup puzzles, if desired
-        backup.auto_backup(selected_game, export_screen)
+        if not headless:
+            import backup
+            backup.auto_backup(selected_game, screen)
 
         # This is the connection "heart" and "error" models.
         # These have to come last, so we need to special case it.
@@ -543,28 +573,37 @@ class Game:
         self.edit_gameinfo(True)
 
         LOGGER.info('Writing instance list!')
-        with open(self.abs_path('bin/bee2/instances.cfg'), 'w') as inst_file:
+        with utils.span('export.instances'), open(
+                self.abs_path('bin/bee2/instances.cfg'), 'w') as inst_file:
             for line in self.build_instance_data(editoritems):
                 inst_file.write(line)
-        export_screen.step('EXP')
+        screen.step('EXP')
 
         # AtomicWriter writes to a temporary file, then renames in one step.
         # This ensures editoritems won't be half-written.
         LOGGER.info('Writing Editoritems!')
-        with srctools.AtomicWriter(self.abs_path(
-                'portal2_dlc2/scripts/editoritems.txt')) as editor_file:
+        with utils.span('export.editoritems'), srctools.AtomicWriter(
+                self.abs_path('portal2_dlc2/scripts/editoritems.txt'),
+                ) as editor_file:
             for line in editoritems.export():
                 editor_file.write(line)
-        export_screen.step('EXP')
+        screen.step('EXP')
 
         LOGGER.info('Writing VBSP Config!')
         os.makedirs(self.abs_path('bin/bee2/'), exist_ok=True)
-        with open(self.abs_path('bin/bee2/vbsp_config.cfg'), 'w') as vbsp_file:
+        with utils.span('export.vbsp_config'), open(
+                self.abs_path('bin/bee2/vbsp_config.cfg'), 'w') as vbsp_file:
             for line in vbsp_config.export():
                 vbsp_file.write(line)
-        export_screen.step('EXP')
+        screen.step('EXP')
 
         if num_compiler_files > 0:
+            # The compile daemon keeps the compiler running, which would
+            # stop us replacing the files.
+            import vbsp_daemon
+            with utils.span('export.stop_daemon'):
+                vbsp_daemon.stop(self.abs_path('bin'))
+
             LOGGER.info('Copying Custom Compiler!')
             for file in os.listdir('../compiler'):
                 src_path = os.path.join('../compiler', file)
@@ -587,8 +626,17 @@ class Game:
                 except PermissionError:
                     # We might not have permissions, if the compiler is currently
                     # running.
-                    export_screen.grab_release()
-                    export_screen.reset()
+                    LOGGER.error(
+                        'Copying compiler file {} failed! Is {} running?',
+                        file,
+                        self.name,
+                    )
+                    screen.grab_release()
+                    screen.reset()
+                    if headless:
+                        return False
+                    from tkinter import messagebox
+                    from tk_tools import TK_ROOT
                     messagebox.showerror(
                         title=_('BEE2 - Export Failed!'),
                         message=_('Copying compiler file {file} failed.'
@@ -599,21 +647,22 @@ class Game:
                         master=TK_ROOT,
                     )
                     return False
-                export_screen.step('COMP')
+                screen.step('COMP')
 
 
         if should_refresh:
             LOGGER.info('Copying Resources!')
-            self.refresh_cache()
-
-            self.copy_mod_music()
+            with utils.span('export.resources'):
+                self.refresh_cache(screen)
+            with utils.span('export.music'):
+                self.copy_mod_music(screen)
 
         if self.steamID == utils.STEAM_IDS['APERTURE TAG']:
             with open(self.abs_path('sdk_content/maps/instances/bee2/tag_coop_gun.vmf'), 'w') as f:
                 TAG_COOP_INST_VMF.export(f)
 
-        export_screen.grab_release()
-        export_screen.reset()  # Hide loading screen, we're done
+        screen.grab_release()
+        screen.reset()  # Hide loading screen, we're done
         return True
 
     @staticmethod
@@ -705,7 +754,7 @@ class Game:
         url = 'steam://rungameid/' + str(self.steamID)
         webbrowser.open(url)
 
-    def copy_mod_music(self):
+    def copy_mod_music(self, screen: 'LoadScreen'):
         """Copy music files from Tag and PS:Mel."""
         tag_dest = self.abs_path('bee2/sound/music/')
         # Mel's music has similar names to P2's, so put it in a subdir
@@ -723,7 +772,7 @@ class Game:
         if MUSIC_MEL_VPK is not None:
             file_count += len(MEL_MUSIC_NAMES)
 
-        export_screen.set_length('MUS', file_count)
+        screen.set_length('MUS', file_count)
 
         if copy_tag:
             os.makedirs(tag_dest, exist_ok=True)
@@ -731,14 +780,14 @@ class Game:
                 src_loc = os.path.join(MUSIC_TAG_LOC, filename)
                 if os.path.isfile(src_loc):
                     shutil.copy(src_loc, tag_dest)
-                    export_screen.step('MUS')
+                    screen.step('MUS')
 
         if MUSIC_MEL_VPK is not None:
             os.makedirs(mel_dest, exist_ok=True)
             for filename in MEL_MUSIC_NAMES:
                 with open(os.path.join(mel_dest, filename), 'wb') as dest:
                     dest.write(MUSIC_MEL_VPK['sound/music', filename].read())
-                export_screen.step('MUS')
+                screen.step('MUS')
 
     def init_trans(self):
         """Try and load a copy of basemodui from Portal 2 to translate.
@@ -929,6 +978,7 @@ def load():
             all_games.append(new_game)
             new_game.edit_gameinfo(True)
     if len(all_games) == 0:
+        import loadScreen
         # Hide the loading screen, since it appears on top
         loadScreen.main_loader.withdraw()
 
@@ -942,6 +992,9 @@ def load():
 
 def add_game(e=None, refresh_menu=True):
     """Ask for, and load in a game to export to."""
+    from tkinter import filedialog, messagebox
+    from tk_tools import TK_ROOT
+    from query_dialogs import ask_string
 
     messagebox.showinfo(
         message=_('Select the folder where the game executable is located '
@@ -1014,6 +1067,7 @@ def add_game(e=None, refresh_menu=True):
 def remove_game(e=None):
     """Remove the currently-chosen game from the game list."""
     global selected_game
+    from tkinter import messagebox
     lastgame_mess = (
         _("\n (BEE2 will quit, this is the last game set!)")
         if len(all_games) == 1 else
@@ -1036,13 +1090,14 @@ def remove_game(e=None):
             quit_application()  # If we have no games, nothing can be done
 
         selected_game = all_games[0]
-        selectedGame_radio.set(0)
+        get_game_radio().set(0)
         add_menu_opts(game_menu)
 
 
-def add_menu_opts(menu: Menu, callback=None):
+def add_menu_opts(menu: 'Menu', callback=None):
     """Add the various games to the menu."""
-    global selectedGame_radio, setgame_callback
+    global setgame_callback
+    from tkinter import END, RADIOBUTTON
     if callback is not None:
         setgame_callback = callback
 
@@ -1055,7 +1110,7 @@ def add_menu_opts(menu: Menu, callback=None):
     for val, game in enumerate(all_games):
         menu.add_radiobutton(
             label=game.name,
-            variable=selectedGame_radio,
+            variable=get_game_radio(),
             value=val,
             command=setGame,
         )
@@ -1064,24 +1119,26 @@ def add_menu_opts(menu: Menu, callback=None):
 
 def setGame():
     global selected_game
-    selected_game = all_games[selectedGame_radio.get()]
+    selected_game = all_games[get_game_radio().get()]
     setgame_callback(selected_game)
 
 
 def set_game_by_name(name):
-    global selected_game, selectedGame_radio
+    global selected_game
     for game in all_games:
         if game.name == name:
             selected_game = game
-            selectedGame_radio.set(all_games.index(game))
+            get_game_radio().set(all_games.index(game))
             setgame_callback(selected_game)
             break
 
 if __name__ == '__main__':
-    Button(TK_ROOT, text='Add', command=add_game).grid(row=0, column=0)
-    Button(TK_ROOT, text='Remove', command=remove_game).grid(row=0, column=1)
-    test_menu = Menu(TK_ROOT)
-    dropdown = Menu(test_menu)
+    import tkinter
+    from tk_tools import TK_ROOT
+    tkinter.Button(TK_ROOT, text='Add', command=add_game).grid(row=0, column=0)
+    tkinter.Button(TK_ROOT, text='Remove', command=remove_game).grid(row=0, column=1)
+    test_menu = tkinter.Menu(TK_ROOT)
+    dropdown = tkinter.Menu(test_menu)
     test_menu.add_cascade(menu=dropdown, label='Game')
     dropdown.game_pos = 0
     TK_ROOT['menu'] = test_menu
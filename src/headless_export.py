@@ -0,0 +1,324 @@
+"""Export configurations into games, without the UI.
+
+This reads a config file, where each section describes one export:
+
+    [DEFAULT]
+    style = BEE2_CLEAN
+    palette = Portal 2
+
+    [Clean Style]
+    game = C:/Program Files (x86)/Steam/steamapps/common/Portal 2
+
+    [Clean Style - Aperture Tag]
+    game = Aperture Tag
+    palette = Aperture Tag
+    stylevar_UnlockDefault = 1
+
+The keys are:
+- game: The folder containing the game executable, or the name of a game
+  added in the app.
+- style: The ID of the style to export.
+- palette: The name or filename of the palette to place on the menu.
+- music, skybox, voice, elevator: The selected IDs, or <NONE>. These
+  default to the style's suggestions.
+- stylevar_<id>: Set a StyleVar. Otherwise the values set in the app are used.
+- refresh_resources: If true, copy the extracted resources into the game.
+  The app must have already extracted the package resources.
+
+Item versions and properties are read from the app's item_configs.cfg.
+editoritems, vbsp_config, instances.cfg and the style VPK are then written
+the same way the Export button does.
+"""
+import argparse
+import os
+import sys
+
+import utils
+
+from typing import List, Dict
+
+if __name__ == '__main__':
+    utils.fix_cur_directory()
+    LOGGER = utils.init_logging('../logs/headless_export.log')
+    utils.setup_localisations(LOGGER)
+else:
+    LOGGER = utils.getLogger(__name__)
+
+from BEE2_config import ConfigFile, GEN_OPTS
+
+# Value for the selector windows to have nothing selected.
+NONE_ID = '<NONE>'
+
+# The keys for selector windows, the object type for each, and the index
+# in Style.suggested.
+SELECTORS = [
+    ('voice', 'QuotePack', 0),
+    ('music', 'Music', 1),
+    ('skybox', 'Skybox', 2),
+    ('elevator', 'Elevator', 3),
+]
+
+
+class LogScreen:
+    """Logs progress, in place of a LoadScreen."""
+    def __init__(self):
+        self.maxes = {}  # type: Dict[str, int]
+        self.values = {}  # type: Dict[str, int]
+
+    def set_length(self, stage: str, num: int):
+        """Set the number of items in a stage."""
+        self.maxes[stage] = num
+        self.values[stage] = 0
+
+    def step(self, stage: str):
+        """Increment a stage, logging when it finishes."""
+        self.values[stage] = self.values.get(stage, 0) + 1
+        if self.values[stage] == self.maxes.get(stage):
+            LOGGER.info('Stage {} done.', stage)
+
+    def skip_stage(self, stage: str):
+        """Skip over this stage of the loading process."""
+        LOGGER.debug('Skipping stage {}.', stage)
+
+    def show(self):
+        """Loading screens are never shown."""
+
+    def reset(self):
+        """Reset all the progress counts."""
+        self.maxes.clear()
+        self.values.clear()
+
+    def grab_set_global(self):
+        """There is no window to grab."""
+
+    def grab_release(self):
+        """There is no window to grab."""
+
+
+def find_game(name: str, location: str):
+    """Find the game to export to.
+
+    The location is either a game folder, or the name of a game in the app.
+    """
+    import gameMan
+    if os.path.isdir(location):
+        steam_id, game_name = gameMan.find_steam_info(location)
+        if steam_id is None:
+            raise ValueError('"{}" is not a valid game folder!'.format(location))
+        return gameMan.Game(name, steam_id, location)
+
+    if location not in gameMan.CONFIG:
+        raise ValueError('No game named "{}"!'.format(location))
+    return gameMan.Game.parse(location, gameMan.CONFIG)
+
+
+def find_palette(palettes: list, name: str):
+    """Find a palette by name, filename or translation ID."""
+    folded = name.casefold()
+    for pal in palettes:
+        if folded in (
+            pal.name.casefold(),
+            pal.trans_name.casefold(),
+            (pal.filename or '').casefold(),
+        ):
+            return pal
+    raise ValueError('No palette named "{}"!'.format(name))
+
+
+def get_selected(
+    config: ConfigFile,
+    name: str,
+    style,
+    pal_list: list,
+) -> dict:
+    """Build the selected objects for an export, like UI.export_editoritems()."""
+    import packageLoader
+    section = config[name]
+
+    selected = {}
+    for key, obj_type, sugg_ind in SELECTORS:
+        obj_id = section.get(key, style.suggested[sugg_ind])
+        if not obj_id or obj_id == NONE_ID:
+            selected[obj_type] = None
+            continue
+        # Check the ID is valid.
+        try:
+            packageLoader.OBJ_TYPES[obj_type].cls.by_id(obj_id)
+        except KeyError:
+            if key in section:
+                raise ValueError('No {} with ID "{}"!'.format(obj_type, obj_id))
+            # Suggestions may refer to packages which aren't installed.
+            LOGGER.warning('Suggested {} "{}" not found!', obj_type, obj_id)
+            obj_id = None
+        selected[obj_type] = obj_id
+
+    style_vars = {}
+    for var in packageLoader.styleOptions:
+        style_vars[var.id] = bool(var.default)
+    for var in packageLoader.StyleVar.all():
+        if var.applies_to_style(style):
+            style_vars[var.id] = var.default
+    for var_id, default in style_vars.items():
+        # Use the value from the app, unless overridden.
+        style_vars[var_id] = config.get_bool(
+            name,
+            'stylevar_' + var_id,
+            GEN_OPTS.get_bool('StyleVar', var_id, default),
+        )
+    selected['StyleVar'] = style_vars
+
+    # The versions and properties chosen in the app.
+    item_opts = ConfigFile('item_configs.cfg')
+    item_versions = {}
+    item_properties = {}
+    for item in packageLoader.Item.all():
+        version = item_opts.get_val(item.id, 'sel_version', item.def_ver['id'])
+        if version not in item.versions:
+            version = item.def_ver['id']
+        item_versions[item.id] = version
+        item_properties[item.id] = {
+            key[5:]: value
+            for key, value in
+            item_opts[item.id].items()
+            if key.startswith('prop_')
+        }
+    selected['Item'] = (pal_list, item_versions, item_properties)
+    return selected
+
+
+def export(config: ConfigFile, name: str, game, palettes: list) -> bool:
+    """Perform a single export."""
+    import packageLoader
+    section = config[name]
+
+    LOGGER.info('Exporting "{}"...', name)
+    style_id = section.get('style')
+    pal_name = section.get('palette')
+    if not style_id or not pal_name:
+        raise ValueError('No style or palette set for "{}"!'.format(name))
+    try:
+        style = packageLoader.Style.by_id(style_id)
+    except KeyError:
+        raise ValueError('No style with ID "{}"!'.format(style_id))
+    palette = find_palette(palettes, pal_name)
+
+    # Skip items which aren't in the loaded packages.
+    item_ids = {item.id for item in packageLoader.Item.all()}
+    pal_list = [
+        (item_id, subtype)
+        for item_id, subtype in palette.pos
+        if item_id in item_ids
+    ]
+    if len(pal_list) != len(palette.pos):
+        LOGGER.warning(
+            'Palette "{}" has {} unknown items!',
+            palette.name,
+            len(palette.pos) - len(pal_list),
+        )
+
+    return game.export(
+        style=style,
+        selected_objects=get_selected(config, name, style, pal_list),
+        should_refresh=config.get_bool(name, 'refresh_resources', False),
+        screen=LogScreen(),
+    )
+
+
+def main(argv: List[str]) -> int:
+    """Load packages, then perform each export."""
+    parser = argparse.ArgumentParser(
+        description='Export configurations into games, without the UI.',
+    )
+    parser.add_argument('config', help='The config file listing exports.')
+    parser.add_argument('exports', nargs='*',
+                        help='The sections to export. By default all are.')
+    # Skip the lang= argument setup_localisations() reads.
+    args = parser.parse_args([
+        arg for arg in argv
+        if not arg.casefold().startswith('lang=')
+    ])
+
+    conf_path = os.path.abspath(args.config)
+    if not os.path.isfile(conf_path):
+        parser.error('Config "{}" does not exist!'.format(args.config))
+    config = ConfigFile(
+        os.path.basename(conf_path),
+        root=os.path.dirname(conf_path),
+    )
+    export_names = args.exports or config.sections()
+    for export_name in export_names:
+        if not config.has_section(export_name):
+            parser.error('No export named "{}"!'.format(export_name))
+
+    import packageLoader
+    import paletteLoader
+    import gameMan
+
+    games = {}
+    for export_name in export_names:
+        try:
+            games[export_name] = find_game(
+                export_name,
+                config[export_name]['game'],
+            )
+        except KeyError:
+            LOGGER.error('No game set for "{}"!', export_name)
+            return 1
+        except ValueError as exc:
+            LOGGER.error('{}', exc)
+            return 1
+
+    pak_dir = GEN_OPTS.get_val('Directories', 'package', 'packages/')
+    if not os.path.isdir(os.path.join('..', pak_dir)):
+        LOGGER.error('The packages directory "{}" is not present!', pak_dir)
+        return 1
+
+    # Find the music used by Tag and Mel packages.
+    gameMan.all_games.extend(games.values())
+    gameMan.scan_music_locs()
+
+    LOGGER.info('Loading Packages...')
+    packageLoader.load_packages(
+        pak_dir,
+        log_item_fallbacks=GEN_OPTS.get_bool(
+            'Debug', 'log_item_fallbacks'),
+        log_missing_styles=GEN_OPTS.get_bool(
+            'Debug', 'log_missing_styles'),
+        log_missing_ent_count=GEN_OPTS.get_bool(
+            'Debug', 'log_missing_ent_count'),
+        log_incorrect_packfile=GEN_OPTS.get_bool(
+            'Debug', 'log_incorrect_packfile'),
+        has_tag_music=gameMan.MUSIC_TAG_LOC is not None,
+        has_mel_music=gameMan.MUSIC_MEL_VPK is not None,
+        loader=LogScreen(),
+    )
+
+    LOGGER.info('Loading Palettes...')
+    palettes = paletteLoader.load_palettes(
+        GEN_OPTS.get_val('Directories', 'palette', 'palettes/'),
+    )
+
+    failed = []
+    for export_name in export_names:
+        try:
+            success = export(
+                config,
+                export_name,
+                games[export_name],
+                palettes,
+            )
+        except ValueError as exc:
+            LOGGER.error('{}', exc)
+            success = False
+        if not success:
+            failed.append(export_name)
+
+    if failed:
+        LOGGER.error('Failed exports: {}', ', '.join(failed))
+        return 1
+    LOGGER.info('All exports done!')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -34,7 +34,7 @@ def png(path, resize_to=0, error=None, algo=Image.NEAREST):
 
     - The .png suffix will automatically be added.
     - Images will be loaded from both the inbuilt files and the extracted
-    zip cache.
+    zip cache. Package images are extracted if that hasn't happened yet.
     - If resize_to is set, the image will be resized to that size using the algo
     algorithm.
     - This caches images, so it won't be deleted (Tk doesn't keep a reference
@@ -70,7 +70,10 @@ def png(path, resize_to=0, error=None, algo=Image.NEAREST):
     if os.path.isfile(base_path):
         path = base_path
     else:
-        # If not in the main folder, load from the zip-cache
+        # If not in the main folder, load from the zip-cache. That's
+        # extracted in the background, so it might not be there yet.
+        import packageLoader
+        packageLoader.extract_image(orig_path)
         path = cache_path
 
     try:
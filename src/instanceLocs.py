@@ -6,12 +6,11 @@ multiple styles.
 import logging
 import re
 from collections import defaultdict
-from functools import lru_cache
 
 import utils
 from srctools import Property
 
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple, Union, FrozenSet
 
 LOGGER = utils.getLogger(__name__)
 
@@ -127,6 +126,20 @@ SPECIAL_INST = {
 # The resolved versions of SPECIAL_INST
 INST_SPECIAL = None  # type: dict
 
+# Precomputed in load_conf(): (item_id, subitem) -> instances.
+# The subitem is '' for the whole item, or a casefolded index, SUBITEMS name
+# or bee2_ custom instance name.
+ITEM_SUBITEMS = {}  # type: Dict[Tuple[str, str], Tuple[str, ...]]
+
+# Instance filename -> (item_id, index or custom instance name).
+INST_ITEM = {}  # type: Dict[str, Tuple[str, Union[int, str]]]
+
+# Each path string passed to resolve(), and the result.
+# These are constant, and there's only as many as used in configs.
+_RESOLVED = {}  # type: Dict[str, Tuple[str, ...]]
+# The same, for resolve_set().
+_RESOLVED_SETS = {}  # type: Dict[str, FrozenSet[str]]
+
 # Gives names to reusable instance fields, so you don't need to remember
 # indexes
 SUBITEMS = {
@@ -212,6 +225,12 @@ SPECIAL_INST_FOLDED = {
 def load_conf(prop_block: Property):
     """Read the config and build our dictionaries."""
     global INST_SPECIAL
+    INSTANCE_FILES.clear()
+    CUST_INST_FILES.clear()
+    ITEM_SUBITEMS.clear()
+    INST_ITEM.clear()
+    _RESOLVED.clear()
+    _RESOLVED_SETS.clear()
 
     for prop in prop_block.find_key('Allinstances', []):
         INSTANCE_FILES[prop.name] = [
@@ -227,6 +246,8 @@ def load_conf(prop_block: Property):
             prop
         }
 
+    build_tables()
+
     INST_SPECIAL = {
         key.casefold(): resolve(val_string, silent=True)
         for key, val_string in
@@ -234,6 +255,42 @@ def load_conf(prop_block: Property):
     }
 
 
+def build_tables():
+    """Compute every item and subitem lookup, so resolve() doesn't need to."""
+    for item_id, item_inst in INSTANCE_FILES.items():
+        ITEM_SUBITEMS[item_id, ''] = tuple(filter(None, item_inst))
+
+        for ind, filename in enumerate(item_inst):
+            ITEM_SUBITEMS[item_id, str(ind)] = (filename, ) if filename else ()
+            if filename:
+                # The first item using an instance is the one we report.
+                INST_ITEM.setdefault(filename, (item_id, ind))
+
+        for name, inds in SUBITEMS.items():
+            if not isinstance(inds, tuple):
+                inds = (inds, )
+            ITEM_SUBITEMS[item_id, name] = tuple(
+                item_inst[ind]
+                for ind in inds
+                if ind < len(item_inst) and item_inst[ind]
+            )
+
+    for item_id, cust_inst in CUST_INST_FILES.items():
+        for name, filename in cust_inst.items():
+            ITEM_SUBITEMS[item_id, 'bee2_' + name] = (filename, )
+            if filename:
+                INST_ITEM.setdefault(filename, (item_id, name))
+
+
+def get_item(filename: str) -> Optional[Tuple[str, Union[int, str]]]:
+    """Find the item which uses the given instance.
+
+    This returns (item_id, subitem), where the subitem is the index or the
+    name of the custom instance. If not found, None is returned.
+    """
+    return INST_ITEM.get(filename.casefold())
+
+
 def resolve(path, silent=False) -> List[str]:
     """Resolve an instance path into the values it refers to.
 
@@ -257,22 +314,34 @@ def resolve(path, silent=False) -> List[str]:
     If silent is True, no error messages will be output (for use with hardcoded
     names).
     """
+    try:
+        return list(_RESOLVED[path])
+    except KeyError:
+        pass
+
     if silent:
         # Ignore messages < ERROR (warning and info)
         LOGGER.setLevel(logging.ERROR)
         val = _resolve(path)
         LOGGER.setLevel(logging.NOTSET)
-        return val
     else:
-        return _resolve(path)
+        val = _resolve(path)
+
+    _RESOLVED[path] = tuple(val)
+    return val
+
+
+def resolve_set(path) -> FrozenSet[str]:
+    """Resolve an instance path, for checking if instances match it."""
+    try:
+        return _RESOLVED_SETS[path]
+    except KeyError:
+        inst_set = _RESOLVED_SETS[path] = frozenset(resolve(path))
+        return inst_set
 
 
-# Cache the return values, since they're constant.
-@lru_cache(maxsize=256)
 def _resolve(path):
-    """Use a secondary function to allow caching values, while ignoring the
-    'silent' parameter.
-    """
+    """Parse and evaluate a path, if it hasn't been cached."""
     groups = _RE_DEFS.findall(path)
     if groups:
         out = []
@@ -292,7 +361,7 @@ def _resolve(path):
                     out.extend(get_subitems(subitems, item_inst, item_id))
                 else:
                     # It's just the <item_id>, return all the values
-                    out.extend(item_inst)
+                    out.extend(ITEM_SUBITEMS[item_id, ''])
 
             elif group[0] == '[':
                 special_name = group[1:-1].casefold()
@@ -314,6 +383,12 @@ def get_subitems(comma_list, item_inst, item_id) -> List[str]:
     output = []
     for val in comma_list.split(','):
         folded_value = val.strip().casefold()
+        try:
+            output.extend(ITEM_SUBITEMS[item_id, folded_value])
+            continue
+        except KeyError:
+            pass  # Invalid, or out of range - produce the errors.
+
         if folded_value.startswith('bee2_'):
             # A custom value...
             bee_inst = CUST_INST_FILES[item_id]
@@ -369,11 +444,6 @@ def get_subitems(comma_list, item_inst, item_id) -> List[str]:
     return inst_out
 
 
-# Copy over the lru_cache() functions to make them easily acessable.
-resolve.cache_info = _resolve.cache_info
-resolve.cache_clear = _resolve.cache_clear
-
-
 def get_cust_inst(item_id: str, inst: str) -> Optional[str]:
     """Get the filename used for a custom instance defined in editoritems.
 
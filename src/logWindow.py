@@ -3,6 +3,7 @@
 from tkinter import ttk
 import tkinter as tk
 
+from collections import deque
 import logging
 
 import srctools
@@ -40,6 +41,12 @@ level_selector = None  # type: ttk.Combobox
 START = '1.0'  # Row 1, column 0 = first character
 END = tk.END
 
+# How often to add new messages to the window, in milliseconds.
+FLUSH_DELAY = 100
+# The maximum number of lines to keep in the window.
+# Older lines are removed.
+MAX_LINES = 5000
+
 
 class TextHandler(logging.Handler):
     """Log all data to a Tkinter Text widget."""
@@ -68,51 +75,74 @@ class TextHandler(logging.Handler):
         )
 
         self.has_text = False
+        # Formatted messages waiting to be added. This may be appended to
+        # from other threads, so only the main thread touches the widget.
+        # If too many build up, the oldest are discarded.
+        self.pending = deque(maxlen=MAX_LINES)
 
         widget['state'] = "disabled"
+        widget.after(FLUSH_DELAY, self.poll)
 
     def emit(self, record: logging.LogRecord):
-        """Add a logging message."""
+        """Queue a logging message to be added to the window."""
 
         msg = record.msg
         if isinstance(record.msg, utils.LogMessage):
             # Ensure we don't use the extra ASCII indents here.
             record.msg = record.msg.format_msg()
 
+        self.pending.append((self.format(record), record.levelname))
+
+        # Undo the record overwrite, so other handlers get the correct object.
+        record.msg = msg
+
+    def poll(self):
+        """Add all waiting messages to the widget, then reschedule."""
+        try:
+            if self.pending:
+                self.write_pending()
+        finally:
+            self.widget.after(FLUSH_DELAY, self.poll)
+
+    def write_pending(self):
+        """Add all waiting messages to the widget in one insert() call."""
+        args = []
+        while self.pending:
+            try:
+                text, levelname = self.pending.popleft()
+            except IndexError:
+                break
+            # We don't want to indent the first line.
+            firstline, *lines = text.split('\n')
+
+            if self.has_text:
+                # Start with a newline so it doesn't end with one.
+                args += ('\n', ())
+            args += (firstline, (levelname,))
+            for line in lines:
+                args += (
+                    '\n',
+                    ('INDENT',),
+                    line,
+                    # Indent following lines.
+                    (levelname, 'INDENT'),
+                )
+            self.has_text = True
+
         self.widget['state'] = "normal"
-        # We don't want to indent the first line.
-        firstline, *lines = self.format(record).split('\n')
-
-        if self.has_text:
-            # Start with a newline so it doesn't end with one.
-            self.widget.insert(
-                END,
-                '\n',
-                (),
+        self.widget.insert(END, *args)
+
+        # Remove old lines, if there's too many.
+        line_count = int(self.widget.index('end-1c').split('.')[0])
+        if line_count > MAX_LINES:
+            self.widget.delete(
+                START,
+                '{}.0'.format(line_count - MAX_LINES + 1),
             )
 
-        self.widget.insert(
-            END,
-            firstline,
-            (record.levelname,),
-        )
-        for line in lines:
-            self.widget.insert(
-                END,
-                '\n',
-                ('INDENT',),
-                line,
-                # Indent following lines.
-                (record.levelname, 'INDENT'),
-            )
         self.widget.see(END)  # Scroll to the end
         self.widget['state'] = "disabled"
 
-        self.has_text = True
-
-        # Undo the record overwrite, so other handlers get the correct object.
-        record.msg = msg
-
 
 def set_visible(is_visible: bool):
     """Show or hide the window."""
@@ -5,18 +5,15 @@ import operator
 import os
 import os.path
 import shutil
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 from contextlib import ExitStack
 from zipfile import ZipFile
 
-import extract_packages
 import srctools
 import tkMarkdown
 import utils
+from BEE2_config import ConfigFile
 from FakeZip import FakeZip, zip_names, zip_open_bin
-from loadScreen import main_loader as loader
-from packageMan import PACK_CONFIG
-from selectorWin import SelitemData
 from srctools import (
     Property, NoKeyError,
     Vec, EmptyMapping,
@@ -27,7 +24,7 @@ from srctools import (
 from typing import (
     Union, Optional, Any, TYPE_CHECKING,
     Iterator, Iterable, Type,
-    Dict, List, Tuple, NamedTuple,
+    Dict, List, Tuple, Set, NamedTuple,
 )
 
 if TYPE_CHECKING:
@@ -42,8 +39,26 @@ OBJ_TYPES = {}
 
 data = {}
 
+# The number of resource files in all packages, for the extraction
+# progress bars.
 res_count = -1
 
+# Images in resources/BEE2/ aren't extracted when loading, only when first
+# used or in the background once the UI is shown. This maps the path in
+# images/cache/ to the package filename and the path in the package.
+IMG_CACHE = os.path.join('..', 'images', 'cache')
+cache_images = {}  # type: Dict[str, Tuple[str, str]]
+# Images which have been extracted since packages were loaded.
+extracted_images = set()  # type: Set[str]
+# Images still to be extracted by extract_next_image().
+_pending_images = []  # type: List[str]
+# The packages opened to extract images from.
+_image_zips = {}  # type: Dict[str, Union[ZipFile, FakeZip]]
+
+# Whether each package is enabled, and the modification time when it
+# was last extracted.
+PACK_CONFIG = ConfigFile('packages.cfg')
+
 # Don't change face IDs when copying to here.
 # This allows users to refer to the stuff in templates specifically.
 # The combined VMF isn't to be compiled or edited outside of us, so it's fine
@@ -84,6 +99,71 @@ ExportData = NamedTuple('ExportData', [
     ('game', 'Game'),
 ])
 
+# The common data for all selectable objects, used by selectorWin.
+SelitemData = namedtuple(
+    'SelitemData',
+    'name, short_name, auth, icon, large_icon, desc, group, sort_key',
+)
+
+stylevar = namedtuple('stylevar', 'id name default desc')
+
+# Special StyleVars that are hardcoded into the BEE2
+# These are effectively attributes of Portal 2 itself, and always work
+# in every style.
+styleOptions = [
+    # ID, Name, default value
+    stylevar(
+        id='MultiverseCave',
+        name=_('Multiverse Cave'),
+        default=1,
+        desc=_('Play the Workshop Cave Johnson lines on map start.')
+    ),
+
+    stylevar(
+        id='FixFizzlerBump',
+        name=_('Prevent Portal Bump (fizzler)'),
+        default=0,
+        desc=_('Add portal bumpers to make it more difficult to portal across '
+               'fizzler edges. This can prevent placing portals in tight '
+               'spaces near fizzlers, or fizzle portals on activation.')
+    ),
+
+    stylevar(
+        id='NoMidVoices',
+        name=_('Suppress Mid-Chamber Dialogue'),
+        default=0,
+        desc=_('Disable all voicelines other than entry and exit lines.')
+    ),
+
+    stylevar(
+        id='UnlockDefault',
+        name=_('Unlock Default Items'),
+        default=0,
+        desc=_('Allow placing and deleting the mandatory Entry/Exit Doors and '
+               'Large Observation Room. Use with caution, this can have weird '
+               'results!')
+    ),
+
+    stylevar(
+        id='AllowGooMist',
+        name=_('Allow Adding Goo Mist'),
+        default=1,
+        desc=_('Add mist particles above Toxic Goo in certain styles. This can '
+               'increase the entity count significantly with large, complex '
+               'goo pits, so disable if needed.')
+    ),
+
+    stylevar(
+        id='FunnelAllowSwitchedLights',
+        name=_('Light Reversible Excursion Funnels'),
+        default=1,
+        desc=_('Funnels emit a small amount of light. However, if multiple funnels'
+               'are near each other and can reverse polarity, this can cause '
+               'lighting issues. Disable this to prevent that by disabling '
+               'lights. Non-reversible Funnels do not have this issue.'),
+    )
+]
+
 # This package contains necessary components, and must be available.
 CLEAN_PACKAGE = 'BEE2_CLEAN_STYLE'
 
@@ -317,9 +397,16 @@ def load_packages(
         log_incorrect_packfile=False,
         has_mel_music=False,
         has_tag_music=False,
+        loader=None,
         ):
-    """Scan and read in all packages in the specified directory."""
+    """Scan and read in all packages in the specified directory.
+
+    loader is the loading screen to show progress on. If not set, the main
+    loading screen is used.
+    """
     global LOG_ENT_COUNT, CHECK_PACKFILE_CORRECTNESS
+    if loader is None:
+        from loadScreen import main_loader as loader
     pak_dir = os.path.abspath(os.path.join(os.getcwd(), '..', pak_dir))
 
     if not os.path.isdir(pak_dir):
@@ -347,7 +434,8 @@ def load_packages(
 
     # Use ExitStack to dynamically manage the zipfiles we find and open.
     with ExitStack() as zip_stack:
-        find_packages(pak_dir, zips, zip_stack, data['zips'])
+        with utils.span('packages.find'):
+            find_packages(pak_dir, zips, zip_stack, data['zips'])
 
         pack_count = len(packages)
         loader.set_length("PAK", pack_count)
@@ -357,7 +445,9 @@ def load_packages(
             obj_override[obj_type] = defaultdict(list)
             data[obj_type] = []
 
-        images = 0
+        close_image_zips()
+        cache_images.clear()
+        extracted_images.clear()
         for pak_id, pack in packages.items():
             if not pack.enabled:
                 LOGGER.info('Package {id} disabled!', id=pak_id)
@@ -366,8 +456,8 @@ def load_packages(
                 continue
 
             LOGGER.info('Reading objects from "{id}"...', id=pak_id)
-            img_count = parse_package(pack, has_tag_music, has_mel_music)
-            images += img_count
+            with utils.span('packages.read', package=pak_id):
+                parse_package(pack, has_tag_music, has_mel_music)
             loader.step("PAK")
 
         # If new packages were added, update the config!
@@ -378,7 +468,6 @@ def load_packages(
             for obj_type in
             all_obj.values()
         ))
-        loader.set_length("IMG_EX", images)
 
         # The number of images we need to load is the number of objects,
         # excluding some types like Stylevars or PackLists.
@@ -393,84 +482,69 @@ def load_packages(
         )
 
         for obj_type, objs in all_obj.items():
-            for obj_id, obj_data in objs.items():
-                LOGGER.debug('Loading {type} "{id}"!', type=obj_type, id=obj_id)
-                obj_class = OBJ_TYPES[obj_type].cls  # type: Type[PakObject]
-                # parse through the object and return the resultant class
-                try:
-                    object_ = obj_class.parse(
-                        ParseData(
-                            obj_data.zip_file,
-                            obj_id,
-                            obj_data.info_block,
-                            obj_data.pak_id,
-                            False,
+            with utils.span('packages.parse', type=obj_type):
+                for obj_id, obj_data in objs.items():
+                    LOGGER.debug('Loading {type} "{id}"!', type=obj_type, id=obj_id)
+                    obj_class = OBJ_TYPES[obj_type].cls  # type: Type[PakObject]
+                    # parse through the object and return the resultant class
+                    try:
+                        object_ = obj_class.parse(
+                            ParseData(
+                                obj_data.zip_file,
+                                obj_id,
+                                obj_data.info_block,
+                                obj_data.pak_id,
+                                False,
+                            )
                         )
-                    )
-                except (NoKeyError, IndexError) as e:
-                    reraise_keyerror(e, obj_id)
+                    except (NoKeyError, IndexError) as e:
+                        reraise_keyerror(e, obj_id)
 
-                if not hasattr(object_, 'id'):
-                    raise ValueError(
-                        '"{}" object {} has no ID!'.format(obj_type, object_)
-                    )
-
-                obj_class._id_to_obj[object_.id.casefold()] = object_
-
-                object_.pak_id = obj_data.pak_id
-                object_.pak_name = obj_data.disp_name
-                for override_data in obj_override[obj_type].get(obj_id, []):
-                    override = OBJ_TYPES[obj_type].cls.parse(
-                        override_data
-                    )
-                    object_.add_over(override)
-                data[obj_type].append(object_)
-                loader.step("OBJ")
+                    if not hasattr(object_, 'id'):
+                        raise ValueError(
+                            '"{}" object {} has no ID!'.format(obj_type, object_)
+                        )
 
-        # Extract all resources/BEE2/ images.
+                    obj_class._id_to_obj[object_.id.casefold()] = object_
 
-        img_dest = '../images/cache'
+                    object_.pak_id = obj_data.pak_id
+                    object_.pak_name = obj_data.disp_name
+                    for override_data in obj_override[obj_type].get(obj_id, []):
+                        override = OBJ_TYPES[obj_type].cls.parse(
+                            override_data
+                        )
+                        object_.add_over(override)
+                        utils.count('packages.overrides')
+                    data[obj_type].append(object_)
+                    loader.step("OBJ")
+            utils.gauge('packages.objects', len(objs), type=obj_type)
 
-        shutil.rmtree(img_dest, ignore_errors=True)
-        img_loc = os.path.join('resources', 'bee2')
-        for zip_file in zips:
-            for path in zip_names(zip_file):
-                loc = os.path.normcase(path).casefold()
-                if not loc.startswith(img_loc):
-                    continue
-                # Strip resources/BEE2/ from the path and move to the
-                # cache folder.
-                dest_loc = os.path.join(
-                    img_dest,
-                    os.path.relpath(loc, img_loc)
-                )
-                # Make the destination directory and copy over the image
-                os.makedirs(os.path.dirname(dest_loc), exist_ok=True)
-                with zip_open_bin(zip_file, path) as src:
-                    with open(dest_loc, mode='wb') as dest:
-                        shutil.copyfileobj(src, dest)
-                loader.step("IMG_EX")
+    # Images are extracted once the UI is up, or when first used.
+    _pending_images[:] = cache_images
+    utils.gauge('packages.images', len(cache_images))
 
     LOGGER.info('Allocating styled items...')
-    setup_style_tree(
-        Item.all(),
-        Style.all(),
-        log_item_fallbacks,
-        log_missing_styles,
-    )
+    with utils.span('packages.style_tree'):
+        setup_style_tree(
+            Item.all(),
+            Style.all(),
+            log_item_fallbacks,
+            log_missing_styles,
+        )
     return data
 
 
 def parse_package(pack: 'Package', has_tag=False, has_mel=False):
     """Parse through the given package to find all the components."""
+    global res_count
     for pre in Property.find_key(pack.info, 'Prerequisites', []):
         # Special case - disable these packages when the music isn't copied.
         if pre.value == '<TAG_MUSIC>':
             if not has_tag:
-                return 0
+                return
         elif pre.value == '<MEL_MUSIC>':
             if not has_mel:
-                return 0
+                return
         elif pre.value not in packages:
             LOGGER.warning(
                 'Package "{pre}" required for "{id}" - '
@@ -478,7 +552,7 @@ def parse_package(pack: 'Package', has_tag=False, has_mel=False):
                 pre=pre.value,
                 id=pack.id,
             )
-            return 0
+            return
 
     # First read through all the components we have, so we can match
     # overrides to the originals
@@ -510,15 +584,78 @@ def parse_package(pack: 'Package', has_tag=False, has_mel=False):
                 pack.disp_name,
             )
 
-    img_count = 0
     img_loc = os.path.join('resources', 'bee2')
     for item in zip_names(pack.zip):
-        item = os.path.normcase(item).casefold()
-        if item.startswith("resources"):
-            extract_packages.res_count += 1
-            if item.startswith(img_loc):
-                img_count += 1
-    return img_count
+        loc = os.path.normcase(item).casefold()
+        if loc.startswith("resources"):
+            res_count += 1
+            if loc.startswith(img_loc):
+                # Later packages override images in earlier ones.
+                cache_images[os.path.relpath(loc, img_loc)] = pack.name, item
+
+
+def extract_image(path: str) -> bool:
+    """Extract an image from the packages to images/cache/.
+
+    path is relative to resources/BEE2/. Each image is only extracted once
+    after packages are loaded. This returns False if no package has
+    the image.
+    """
+    path = os.path.normcase(path).casefold()
+    if path in extracted_images:
+        return True
+    try:
+        zip_path, zip_name = cache_images[path]
+    except KeyError:
+        return False
+
+    try:
+        zip_file = _image_zips[zip_path]
+    except KeyError:
+        if os.path.isfile(zip_path):
+            zip_file = ZipFile(zip_path)
+        else:
+            zip_file = FakeZip(zip_path)
+        _image_zips[zip_path] = zip_file
+
+    dest_loc = os.path.join(IMG_CACHE, path)
+    os.makedirs(os.path.dirname(dest_loc), exist_ok=True)
+    with zip_open_bin(zip_file, zip_name) as src:
+        with open(dest_loc, mode='wb') as dest:
+            shutil.copyfileobj(src, dest)
+    extracted_images.add(path)
+    utils.count('packages.images_extracted')
+    return True
+
+
+def extract_next_image() -> bool:
+    """Extract one of the images which haven't been used yet.
+
+    This returns False once all images are extracted. Then the packages
+    are closed, and images from removed packages are deleted.
+    """
+    while _pending_images:
+        path = _pending_images.pop()
+        if path not in extracted_images:
+            extract_image(path)
+            return True
+
+    close_image_zips()
+    for folder, dirs, files in os.walk(IMG_CACHE):
+        for file in files:
+            full_path = os.path.join(folder, file)
+            rel_path = os.path.relpath(full_path, IMG_CACHE)
+            if os.path.normcase(rel_path).casefold() not in cache_images:
+                os.remove(full_path)
+    return False
+
+
+def close_image_zips():
+    """Close the packages opened to extract images."""
+    for zip_file in _image_zips.values():
+        if isinstance(zip_file, ZipFile):
+            zip_file.close()
+    _image_zips.clear()
 
 
 def setup_style_tree(
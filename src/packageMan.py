@@ -6,17 +6,15 @@ import tkinter as tk
 from tk_tools import TK_ROOT
 
 from CheckDetails import CheckDetails, Item as CheckItem
-from BEE2_config import ConfigFile
 import packageLoader
 import utils
+from packageLoader import PACK_CONFIG
 
 window = tk.Toplevel(TK_ROOT)
 window.withdraw()
 
 UI = {}
 
-PACK_CONFIG = ConfigFile('packages.cfg')
-
 pack_items = {}
 
 HEADERS = ['Name']
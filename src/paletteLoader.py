@@ -1,4 +1,5 @@
 import os.path
+import json
 import shutil
 import zipfile
 import random
@@ -7,7 +8,7 @@ import utils
 import srctools
 from srctools import Property
 
-from typing import List, Tuple
+from typing import List, Tuple, Dict, Optional
 
 
 LOGGER = utils.getLogger(__name__)
@@ -16,6 +17,13 @@ PAL_DIR = "palettes\\"
 
 PAL_EXT = '.bee2_palette'
 
+# The index caches the contents of every palette file, so they don't all
+# need to be parsed at startup. The files remain the source of truth -
+# each is only re-parsed if its size or modification time changes.
+PAL_INDEX = os.path.join('..', 'config', 'palettes_index.json')
+# Increment if the layout of the index changes.
+PAL_INDEX_VERSION = 2
+
 pal_list = []  # type: List[Palette]
 
 # Allow translating the names of the built-in palettes
@@ -135,11 +143,100 @@ class Palette:
         with file:
             for line in props.export():
                 file.write(line)
+        write_index()
 
     def delete_from_disk(self):
         """Delete this palette from disk."""
         if self.filename is not None:
             os.remove(os.path.join(PAL_DIR, self.filename))
+            write_index()
+
+
+def read_index(pal_dir: str) -> Tuple[Optional[int], Dict[str, dict]]:
+    """Read the palette index.
+
+    This returns the directory modification time it was made with, and a
+    dict mapping filenames to the mtime, size, name, trans_name, readonly
+    and items for that palette. If the index is missing or for another
+    directory, (None, {}) is returned.
+    """
+    try:
+        with open(PAL_INDEX, encoding='utf8') as f:
+            index = json.load(f)
+        version = index['version']
+        index_dir = index['dir']
+        dir_mtime = index['dir_mtime']
+        files = index['files']
+    except FileNotFoundError:
+        return None, {}
+    except (ValueError, KeyError, TypeError, OSError):
+        LOGGER.warning('Palette index is invalid, ignoring.', exc_info=True)
+        return None, {}
+
+    if (
+        version != PAL_INDEX_VERSION or
+        index_dir != pal_dir or
+        not isinstance(files, dict)
+    ):
+        return None, {}
+    return dir_mtime, files
+
+
+def write_index():
+    """Save the contents of all palettes into the index."""
+    files = {}
+    for pal in pal_list:
+        if pal.filename is None:
+            continue
+        filename = os.path.basename(pal.filename)
+        try:
+            stat = os.stat(os.path.join(PAL_DIR, filename))
+        except FileNotFoundError:
+            # Deleted, or not saved yet.
+            continue
+        files[filename] = {
+            'mtime': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'name': pal.name,
+            'trans_name': pal.trans_name,
+            'readonly': pal.prevent_overwrite,
+            'items': list(pal.pos),
+        }
+
+    try:
+        dir_mtime = os.stat(PAL_DIR).st_mtime_ns
+        os.makedirs(os.path.dirname(PAL_INDEX), exist_ok=True)
+        with open(PAL_INDEX, 'w', encoding='utf8') as f:
+            json.dump({
+                'version': PAL_INDEX_VERSION,
+                'dir': PAL_DIR,
+                'dir_mtime': dir_mtime,
+                'files': files,
+            }, f)
+    except OSError:
+        LOGGER.warning('Could not write palette index!', exc_info=True)
+
+
+def load_indexed(path: str, filename: str, data: dict) -> Optional[Palette]:
+    """Build a palette from the index, if the file hasn't changed."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    try:
+        if stat.st_mtime_ns != data['mtime'] or stat.st_size != data['size']:
+            return None
+        items = [(str(item_id), int(sub)) for item_id, sub in data['items']]
+        return Palette(
+            str(data['name']),
+            items,
+            trans_name=str(data['trans_name']),
+            prevent_overwrite=bool(data['readonly']),
+            filename=filename,
+        )
+    except (KeyError, TypeError, ValueError):
+        # Bad entry, parse the file instead.
+        return None
 
 
 def load_palettes(pal_dir):
@@ -148,9 +245,26 @@ def load_palettes(pal_dir):
     PAL_DIR = os.path.abspath(os.path.join('..', pal_dir))
     full_dir = os.path.join(os.getcwd(), PAL_DIR)
 
-    for name in os.listdir(full_dir):  # this is both files and dirs
-        LOGGER.info('Loading "{}"', name)
+    index_mtime, index = read_index(PAL_DIR)
+    index_changed = False
+
+    if index_mtime is not None and index_mtime == os.stat(full_dir).st_mtime_ns:
+        # No files were added or removed, so the index has the full list.
+        filenames = list(index)
+    else:
+        filenames = os.listdir(full_dir)
+        index_changed = True
+
+    for name in filenames:  # this is both files and dirs
         path = os.path.join(full_dir, name)
+        if name in index:
+            pal = load_indexed(path, name, index[name])
+            if pal is not None:
+                pal_list.append(pal)
+                continue
+        index_changed = True
+
+        LOGGER.info('Loading "{}"', name)
         pos_file, prop_file = None, None
         try:
             if name.endswith(PAL_EXT):
@@ -196,6 +310,8 @@ def load_palettes(pal_dir):
 
     # Ensure the list has a defined order..
     pal_list.sort(key=str)
+    if index_changed:
+        write_index()
     return pal_list
 
 
@@ -13,6 +13,7 @@ from tk_tools import TK_ROOT
 from collections import namedtuple, defaultdict
 from operator import itemgetter
 from enum import Enum
+from bisect import bisect_left, bisect_right
 import functools
 import math
 
@@ -21,11 +22,12 @@ from richTextBox import tkRichText
 from tooltip import add_tooltip
 from srctools import Vec, EmptyMapping
 import tkMarkdown
+from packageLoader import SelitemData
 import sound
 import utils
 import tk_tools
 
-from typing import Callable, Union
+from typing import Callable, Union, List, Set, Optional
 
 LOGGER = utils.getLogger(__name__)
 
@@ -34,6 +36,9 @@ ICON_SIZE_LRG = (256, 192)  # Size of the larger icon shown in description.
 ITEM_WIDTH = ICON_SIZE + (32 if utils.MAC else 16)
 ITEM_HEIGHT = ICON_SIZE + 51
 
+# Delay in milliseconds after the last resize event before we reflow items.
+FLOW_DELAY = 50
+
 # The larger error icons used if an image is not found
 err_icon = img.png('BEE2/error_96', resize_to=ICON_SIZE)
 err_icon_lrg = img.png('BEE2/error_96', resize_to=ICON_SIZE_LRG)
@@ -127,12 +132,6 @@ def {l_name}(cls, id: str, desc='', default=None):
         ), globals(), locals())
     del _member_name
 
-SelitemData = namedtuple(
-    'SelitemData',
-    'name, short_name, auth, icon, large_icon, desc, group, sort_key',
-)
-
-
 class GroupHeader(ttk.Frame):
     """The widget used for group headers."""
     def __init__(self, win: 'selWin', title):
@@ -245,14 +244,20 @@ class Item:
     - group: Items with the same group name will be shown together.
     - attrs: a dictionary containing the attribute values for this item.
 
-    - button, win: Set later, the button and window TK objects for this item
+    - win: Set later, the window TK object for this item.
+    - button: The button currently displaying this item, or None if it's
+      scrolled out of view. Buttons are reused between items.
+    - win_x, win_y: The position of the item in the window, or None if
+      it's in a collapsed group.
     """
     __slots__ = [
         'name',
         'shortName',
         'longName',
-        'icon',
-        'large_icon',
+        '_icon',
+        '_large_icon',
+        '_icon_name',
+        '_large_icon_name',
         'desc',
         'authors',
         'group',
@@ -291,11 +296,10 @@ class Item:
         else:
             self.context_lbl = self.longName
 
-        if icon is not None:
-            self.icon = get_icon(icon, ICON_SIZE, err_icon)
-        else:
-            self.icon = img.color_square(img.PETI_ITEM_BG, ICON_SIZE)
-        self.large_icon = get_icon(large_icon, ICON_SIZE_LRG, err_icon_lrg)
+        # The icons are loaded when first displayed.
+        self._icon_name = icon
+        self._large_icon_name = large_icon
+        self._icon = self._large_icon = None
 
         if isinstance(desc, str):
             self.desc = tkMarkdown.convert(desc)
@@ -314,6 +318,27 @@ class Item:
     def __repr__(self):
         return '<Item:' + self.name + '>'
 
+    @property
+    def icon(self):
+        """The icon for the item, loading it if needed."""
+        if self._icon is None:
+            if self._icon_name is not None:
+                self._icon = get_icon(self._icon_name, ICON_SIZE, err_icon)
+            else:
+                self._icon = img.color_square(img.PETI_ITEM_BG, ICON_SIZE)
+        return self._icon
+
+    @property
+    def large_icon(self):
+        """The larger icon for the item, or None if not set."""
+        if self._large_icon is None and self._large_icon_name is not None:
+            self._large_icon = get_icon(
+                self._large_icon_name,
+                ICON_SIZE_LRG,
+                err_icon_lrg,
+            )
+        return self._large_icon
+
     @classmethod
     def from_data(cls, obj_id, data: SelitemData, attrs=None):
         """Create a selector Item from a SelitemData tuple."""
@@ -331,14 +356,14 @@ class Item:
         )
 
     def set_pos(self, x=None, y=None):
-        """Place the item on the palette."""
+        """Set the location of the item on the palette.
+
+        This doesn't place the button - that's done once it's scrolled
+        into view.
+        """
         if x is None or y is None:
-            # Remove from the window.
-            self.button.place_forget()
             self.win_x = self.win_y = None
         else:
-            self.button.place(x=x, y=y)
-            self.button.lift()  # Force a particular stacking order for widgets
             self.win_x = x
             self.win_y = y
 
@@ -497,6 +522,22 @@ class selWin:
         # The maximum number of items that fits per row (set in flow_items)
         self.item_width = 1
 
+        # Only the items in view have buttons. These are the visible items,
+        # in the order they're placed, along with their y positions for
+        # searching.
+        self._placed_items = []  # type: List[Item]
+        self._placed_y = []  # type: List[int]
+        # Items which currently have a button.
+        self._shown_items = set()  # type: Set[Item]
+        # Buttons not currently used by any item.
+        self._button_pool = []  # type: List[ttk.Button]
+        # The total height of the palette.
+        self._pal_height = 1
+        # Height of the group headers, computed when first needed.
+        self._header_height = None  # type: Optional[int]
+        # The pending after() callback to reflow items.
+        self._flow_after = None
+
         if desc:
             self.desc_label = ttk.Label(
                 self.win,
@@ -539,7 +580,7 @@ class selWin:
             command=self.wid_canvas.yview,
         )
         self.wid_scroll.grid(row=0, column=1, sticky="NS")
-        self.wid_canvas['yscrollcommand'] = self.wid_scroll.set
+        self.wid_canvas['yscrollcommand'] = self._scroll_moved
 
         utils.add_mousewheel(self.wid_canvas, self.win)
 
@@ -712,18 +753,8 @@ class selWin:
 
         for ind, item in enumerate(self.item_list):  # type: int, Item
             if item == self.noneItem:
-                item.button = ttk.Button(
-                    self.pal_frame,
-                    image=item.icon,
-                )
                 item.context_lbl = '<None>'
-            else:
-                item.button = ttk.Button(
-                    self.pal_frame,
-                    text=item.shortName,
-                    image=item.icon,
-                    compound='top',
-                )
+            item.button = None
 
             group_key = item.group.casefold()
             self.grouped_items[group_key].append(item)
@@ -752,19 +783,6 @@ class selWin:
 
             item.win = self.win
 
-            @utils.bind_leftclick(item.button)
-            def click_item(event=None, *, _item=item):
-                """Handle clicking on the item.
-
-                If it's already selected, save and close the window.
-                """
-                # We need to capture the item in a default, since it's
-                # the same variable in different iterations
-                if _item is self.selected:
-                    self.save()
-                else:
-                    self.sel_item(_item)
-
         # Convert to a normal dictionary, after adding all items.
         self.grouped_items = dict(self.grouped_items)
 
@@ -1032,9 +1050,11 @@ class selWin:
 
         self.prop_desc.set_text(item.desc)
 
-        self.selected.button.state(('!alternate',))
+        if self.selected.button is not None:
+            self.selected.button.state(('!alternate',))
         self.selected = item
-        item.button.state(('alternate',))
+        if item.button is not None:
+            item.button.state(('alternate',))
         self.scroll_to(item)
 
         if self.sampler:
@@ -1225,9 +1245,20 @@ class selWin:
     def flow_items(self, e=None):
         """Reposition all the items to fit in the current geometry.
 
-        Called on the <Configure> event.
+        Called on the <Configure> event. While resizing many events are
+        produced, so we wait until they stop before reflowing.
         """
-        self.pal_frame.update_idletasks()
+        if self._flow_after is not None:
+            self.win.after_cancel(self._flow_after)
+            self._flow_after = None
+        if e is None:
+            self._flow_items()
+        else:
+            self._flow_after = self.win.after(FLOW_DELAY, self._flow_items)
+
+    def _flow_items(self):
+        """Compute the positions for all items, then show the visible ones."""
+        self._flow_after = None
         self.pal_frame['width'] = self.wid_canvas.winfo_width()
         self.prop_name['wraplength'] = self.prop_desc.winfo_width()
         if self.desc_label is not None:
@@ -1238,12 +1269,26 @@ class selWin:
             width = 1  # we got way too small, prevent division by zero
         self.item_width = width
 
+        if self._header_height is None:
+            # The headers are all the same height, so only measure once.
+            self.pal_frame.update_idletasks()
+            self._header_height = max(
+                (
+                    header.winfo_reqheight()
+                    for header in self.group_widgets.values()
+                ),
+                default=0,
+            )
+
         # The offset for the current group
         y_off = 0
 
         # Hide suggestion indicator if the item's not visible.
         self.sugg_lbl.place_forget()
 
+        self._placed_items.clear()
+        self._placed_y.clear()
+
         for group_key in self.group_order:
             items = self.grouped_items[group_key]
             group_wid = self.group_widgets[group_key]  # type: GroupHeader
@@ -1252,8 +1297,7 @@ class selWin:
                 y=y_off,
                 width=width * ITEM_WIDTH,
             )
-            group_wid.update_idletasks()
-            y_off += group_wid.winfo_reqheight()
+            y_off += self._header_height
 
             if not group_wid.visible:
                 # Hide everything!
@@ -1268,11 +1312,12 @@ class selWin:
                         x=(i % width) * ITEM_WIDTH + 1,
                         y=(i // width) * ITEM_HEIGHT + y_off,
                     )
-                    self.sugg_lbl['width'] = item.button.winfo_width()
                 item.set_pos(
                     x=(i % width) * ITEM_WIDTH + 1,
                     y=(i // width) * ITEM_HEIGHT + y_off + 20,
                 )
+                self._placed_items.append(item)
+                self._placed_y.append(item.win_y)
 
             # Increase the offset by the total height of this item section
             y_off += math.ceil(len(items) / width) * ITEM_HEIGHT + 5
@@ -1284,12 +1329,102 @@ class selWin:
             y_off,
         )
         self.pal_frame['height'] = y_off
+        self._pal_height = max(y_off, 1)
+
+        # Buttons may now be in the wrong place, so redo all of them.
+        for item in list(self._shown_items):
+            self._hide_item(item)
+        self._show_visible()
+
+    def _scroll_moved(self, first, last):
+        """Called when the canvas is scrolled, to update the visible items."""
+        self.wid_scroll.set(first, last)
+        self._show_visible()
+
+    def _show_visible(self):
+        """Make sure only the items in view have buttons.
+
+        We include an extra row above and below, so they're ready when
+        scrolling.
+        """
+        top, bottom = self.wid_canvas.yview()
+        top = top * self._pal_height - ITEM_HEIGHT
+        bottom = bottom * self._pal_height + ITEM_HEIGHT
+
+        start = bisect_left(self._placed_y, top)
+        end = bisect_right(self._placed_y, bottom)
+        visible = set(self._placed_items[start:end])
+
+        for item in self._shown_items - visible:
+            self._hide_item(item)
+        for item in self._placed_items[start:end]:
+            if item not in self._shown_items:
+                self._show_item(item)
+
+    def _show_item(self, item: Item):
+        """Give an item a button, and place it."""
+        try:
+            button = self._button_pool.pop()
+        except IndexError:
+            button = ttk.Button(self.pal_frame)
+            utils.bind_leftclick(
+                button,
+                functools.partial(self._click_button, button),
+            )
+
+        if item == self.noneItem:
+            button.configure(text='', image=item.icon, compound='image')
+        else:
+            button.configure(
+                text=item.shortName,
+                image=item.icon,
+                compound='top',
+            )
+        if item is self.selected:
+            button.state(('alternate',))
+        else:
+            button.state(('!alternate',))
+        # Keep track of the item this is showing.
+        button.item = item
+        item.button = button
+        self._shown_items.add(item)
+
+        button.place(x=item.win_x, y=item.win_y)
+        button.lift()  # Force a particular stacking order for widgets
+        if item == self.suggested:
+            self.sugg_lbl['width'] = button.winfo_reqwidth()
+
+    def _hide_item(self, item: Item):
+        """Remove the button from an item, so it can be reused."""
+        button = item.button
+        item.button = None
+        self._shown_items.discard(item)
+        if button is not None:
+            button.place_forget()
+            button.item = None
+            self._button_pool.append(button)
+
+    def _click_button(self, button: ttk.Button, event=None):
+        """Handle clicking on an item.
+
+        If it's already selected, save and close the window.
+        """
+        item = button.item
+        if item is None:
+            return
+        if item is self.selected:
+            self.save()
+        else:
+            self.sel_item(item)
 
     def scroll_to(self, item: Item):
         """Scroll to an item so it's visible."""
         canvas = self.wid_canvas
 
-        height = canvas.bbox(ALL)[3]  # Returns (x, y, width, height)
+        if item.win_y is None:
+            return  # In a collapsed group.
+
+        height = self._pal_height
 
         bottom, top = canvas.yview()
         # The sizes are returned in fractions, but we use the pixel values
@@ -1297,7 +1432,7 @@ class selWin:
         bottom *= height
         top *= height
 
-        y = item.button.winfo_y()
+        y = item.win_y
 
         if bottom <= y - 8 and y + ICON_SIZE + 8 <= top:
             return  # Already in view
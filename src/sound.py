@@ -54,16 +54,30 @@ else:
     # Succeeded in loading PyGame
     initiallised = True
 
-    def load_snd():
-        """Load in sound FX."""
-        for key, filename in SOUNDS.items():
+    def _load(key):
+        """Load a single sound, replacing the filename in SOUNDS."""
+        filename = SOUNDS[key]
+        if isinstance(filename, str):
             LOGGER.debug('Loading {}', filename)
             SOUNDS[key] = pyglet.media.load('../sounds/' + filename + '.ogg', streaming=False)
+        return SOUNDS[key]
+
+    def load_snd():
+        """Load in sound FX in the background.
+
+        One sound is loaded each time Tk is idle, so this doesn't hold up
+        the UI. Sounds used before then are loaded by fx() immediately.
+        """
+        for key, filename in SOUNDS.items():
+            if isinstance(filename, str):
+                _load(key)
+                TK_ROOT.after_idle(load_snd)
+                return
 
     def fx(name, e=None):
         """Play a sound effect stored in the sounds{} dict."""
         if play_sound and name in SOUNDS:
-            SOUNDS[name].play()
+            _load(name).play()
 
     class SamplePlayer:
         """Handles playing a single audio file, and allows toggling it on/off."""
@@ -9,6 +9,8 @@ from collections import defaultdict
 from enum import Enum
 import string
 
+from typing import Dict, Tuple
+
 import sound as snd
 import optionWindow
 import StyleVarPane
@@ -20,10 +22,6 @@ is_expanded = False
 wid = {}
 
 TAG_MODE = tk.StringVar(value='ALL')  # The combining mode for the vars
-TAG_MODES = {
-    'ALL': all,
-    'ANY': any,
-}
 
 # A list of all tags, mapped to their current state.
 TAGS = {}
@@ -41,6 +39,14 @@ TAG_REP_TRANSLATE = str.maketrans(
 # A list of tags, sorted into sections
 TAG_BY_SECTION = defaultdict(list)
 
+# For filtering, each tag maps to a bitset of the indexes in UI.pal_items
+# which have the tag.
+TAG_INDEX = {}  # type: Dict[Tuple[Section, str], int]
+# A bitset of the items which are only visible if unlocked.
+UNLOCK_MASK = 0
+# The number of items the index was built for.
+INDEX_SIZE = -1
+
 BOLD_FONT = font.nametofont('TkDefaultFont').copy()
 BOLD_FONT.configure(weight='bold')
 
@@ -58,12 +64,26 @@ class Section(Enum):
 Section.index = [Section[key] for key in Section.__members__.keys()].index
 
 
+def build_index():
+    """Build the tag index used for filtering items."""
+    global UNLOCK_MASK, INDEX_SIZE
+    TAG_INDEX.clear()
+    UNLOCK_MASK = 0
+    for ind, item in enumerate(UI.pal_items):
+        bit = 1 << ind
+        if item.needs_unlock:
+            UNLOCK_MASK |= bit
+        for tag in item.item.filter_tags:
+            TAG_INDEX[tag] = TAG_INDEX.get(tag, 0) | bit
+    INDEX_SIZE = len(UI.pal_items)
+
+
 def filter_items():
     """Update items based on selected tags."""
     style_unlocked = StyleVarPane.tk_vars['UnlockDefault'].get() == 1
 
-    # any() or all()
-    func = TAG_MODES[TAG_MODE.get()]
+    if INDEX_SIZE != len(UI.pal_items):
+        build_index()
 
     sel_tags = [
         tag
@@ -71,23 +91,32 @@ def filter_items():
         in TAGS.items()
         if enabled
     ]
-    no_tags = len(sel_tags) == 0
-
-    for item in UI.pal_items:
-        if item.needs_unlock and not style_unlocked:
-            item.visible = False
-            continue
-
-        if no_tags:
-            item.visible = True
-        else:
-            item_tags = item.item.filter_tags
-            item.visible = func(
-                tag in item_tags
-                for tag in
-                sel_tags
-            )
-    UI.flow_picker()
+
+    all_items = (1 << len(UI.pal_items)) - 1
+    if not sel_tags:
+        visible = all_items
+    elif TAG_MODE.get() == 'ALL':
+        visible = all_items
+        for tag in sel_tags:
+            visible &= TAG_INDEX.get(tag, 0)
+    else:
+        visible = 0
+        for tag in sel_tags:
+            visible |= TAG_INDEX.get(tag, 0)
+
+    if not style_unlocked:
+        visible &= ~UNLOCK_MASK
+
+    changed = False
+    for ind, item in enumerate(UI.pal_items):
+        is_visible = bool(visible >> ind & 1)
+        if item.visible != is_visible:
+            item.visible = is_visible
+            changed = True
+
+    # Only re-layout if something actually changed.
+    if changed:
+        UI.flow_picker()
 
 # When exiting settings, we need to hide/show WIP items.
 optionWindow.refresh_callbacks.append(filter_items)
@@ -147,6 +176,7 @@ def add_tag(section: Section, tag: str, pretty: str=None):
     TAGS[key] = False
     TAG_BY_SECTION[section].append(tag)
     PRETTY_TAG[key] = pretty
+    return key
 
 
 def init(frm):
@@ -251,7 +281,12 @@ def init(frm):
 
 
 def refresh_tags():
-    """Fill in both textboxes, adding the tags to the list."""
+    """Fill in both textboxes, adding the tags to the list.
+
+    This also rebuilds the index used to filter items.
+    """
+    build_index()
+
     all_text = wid['tag_list']  # type: tk.Text
     sel_text = wid['cur_tags']  # type: tk.Text
 
@@ -1,15 +1,17 @@
 # coding=utf-8
 import collections
 import functools
+import json
 import logging
 import os.path
 import stat
 import shutil
 import sys
+import time
 from enum import Enum
 
 from typing import (
-    Tuple, List, Iterator,
+    Tuple, List, Iterator, Optional,
 )
 
 
@@ -716,6 +718,14 @@ def init_logging(filename: str=None, main_logger='', on_error=None) -> logging.L
 
         logger.addHandler(log_handler)
 
+        # Metrics are written next to the log, if enabled.
+        metrics_mode = os.environ.get('BEE2_METRICS', '')
+        if metrics_mode:
+            init_metrics(
+                os.path.splitext(filename)[0] + '.metrics.jsonl',
+                trace_memory=metrics_mode.casefold() == 'memory',
+            )
+
     # This is needed for multiprocessing, since it tries to flush stdout.
     # That'll fail if it is None.
     class NullStream(io.IOBase):
@@ -795,3 +805,295 @@ def getLogger(name: str='', alias: str=None) -> logging.Logger:
         return LoggerAdapter(logging.getLogger('BEE2'), alias)
 
 
+
+
+# Modules imported while the import timer is active.
+# Each is (depth, name, self time, cumulative time), in the order
+# the imports finished - like 'python -X importtime'.
+_import_times = []  # type: List[Tuple[int, str, float, float]]
+# Total time spent in child imports, for each import in progress.
+_import_stack = []  # type: List[float]
+_orig_import = None
+_orig_import_module = None
+
+
+def _record_import(name: str, func, *args):
+    """Call an import function, and record the time it took."""
+    mod_count = len(sys.modules)
+    _import_stack.append(0.0)
+    start = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        total = time.perf_counter() - start
+        child_time = _import_stack.pop()
+        if _import_stack:
+            _import_stack[-1] += total
+        # Only record imports which actually loaded a module.
+        if len(sys.modules) > mod_count:
+            _import_times.append((
+                len(_import_stack),
+                name,
+                total - child_time,
+                total,
+            ))
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    """Replacement for __import__(), which records the time taken."""
+    full_name = name
+    if level and globals:
+        # Relative import - show the full name.
+        package = globals.get('__package__') or ''
+        package = package.rsplit('.', level - 1)[0]
+        full_name = package + '.' + name if name else package
+    return _record_import(
+        full_name,
+        _orig_import,
+        name, globals, locals, fromlist, level,
+    )
+
+
+def _timed_import_module(name, package=None):
+    """Replacement for importlib.import_module(), which records the time taken.
+
+    That doesn't go through __import__(), so it needs to be timed separately.
+    This is used to load the conditions modules.
+    """
+    if name.startswith('.'):
+        import importlib.util
+        full_name = importlib.util.resolve_name(name, package)
+    else:
+        full_name = name
+    return _record_import(full_name, _orig_import_module, name, package)
+
+
+def start_import_timer():
+    """Begin recording how long each newly-imported module takes to load."""
+    global _orig_import, _orig_import_module
+    if _orig_import is not None:
+        return  # Already running.
+    import builtins
+    import importlib
+    import importlib.util  # Used by _timed_import_module().
+    _orig_import = builtins.__import__
+    _orig_import_module = importlib.import_module
+    builtins.__import__ = _timed_import
+    importlib.import_module = _timed_import_module
+
+
+def log_import_times(logger: logging.Logger, budget: float=None):
+    """Stop the import timer, and log the time taken by each module.
+
+    The full tree is logged at DEBUG level. If the total time exceeds
+    budget (in seconds), a warning is produced. If metrics are enabled,
+    each module is also recorded as an 'import' span.
+    """
+    global _orig_import, _orig_import_module
+    if _orig_import is None:
+        return
+    import builtins
+    import importlib
+    builtins.__import__ = _orig_import
+    importlib.import_module = _orig_import_module
+    _orig_import = _orig_import_module = None
+
+    lines = ['Import times:', '  self [ms] | cumulative | module']
+    total = 0.0
+    for depth, name, self_time, cumulative in _import_times:
+        if depth == 0:
+            total += cumulative
+        lines.append('{:>11.2f} | {:>10.2f} | {}{}'.format(
+            self_time * 1000,
+            cumulative * 1000,
+            '  ' * depth,
+            name,
+        ))
+        if _metrics_file is not None:
+            _write_metric(
+                'span',
+                'import',
+                {'module': name, 'depth': depth},
+                self=round(self_time, 6),
+                duration=round(cumulative, 6),
+            )
+    _import_times.clear()
+
+    logger.debug('\n'.join(lines))
+    if budget is not None and total > budget:
+        logger.warning(
+            'Imports took {:.3f}s, over the budget of {:.3f}s!',
+            total,
+            budget,
+        )
+    else:
+        logger.info('Imports took {:.3f}s.', total)
+
+
+# Structured metrics - spans, counters and gauges, written as JSON lines.
+# These are only recorded if init_metrics() was called, which init_logging()
+# does if the BEE2_METRICS environment variable is set. Set it to 'memory'
+# to also record tracemalloc memory usage for each span.
+_metrics_file = None
+_metrics_memory = False
+# Counters are totalled, then written by flush_metrics().
+_metrics_counts = collections.Counter()
+# The process which owns the counts - forked processes start again.
+_metrics_pid = 0
+_metrics_start = 0.0
+
+
+def init_metrics(filename: str, trace_memory: bool=False):
+    """Start writing metrics to the given file.
+
+    Each record is a JSON object on its own line, and records are appended
+    so runs can be compared. If trace_memory is set, tracemalloc is started
+    and each span records the memory in use.
+    """
+    global _metrics_file, _metrics_memory, _metrics_pid, _metrics_start
+    import atexit
+    if _metrics_file is not None:
+        flush_metrics()
+        _metrics_file.close()
+    else:
+        atexit.register(flush_metrics)
+
+    # Line-buffered, so each record is written in one go.
+    _metrics_file = open(filename, 'a', buffering=1, encoding='utf8')
+    _metrics_memory = trace_memory
+    _metrics_pid = os.getpid()
+    _metrics_start = time.perf_counter()
+    _metrics_counts.clear()
+    if trace_memory:
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    _write_metric(
+        'start',
+        os.path.basename(sys.argv[0]),
+        None,
+        version=BEE_VERSION,
+        argv=sys.argv[1:],
+        time=time.time(),
+    )
+
+
+def stop_metrics():
+    """Write the counters, stop recording metrics and close the file."""
+    global _metrics_file
+    if _metrics_file is not None:
+        flush_metrics()
+        _metrics_file.close()
+        _metrics_file = None
+
+
+def _write_metric(kind: str, name: str, tags: Optional[dict], **fields):
+    """Write a single metrics record.
+
+    The caller's tags are kept under their own key, so they can't replace
+    the standard fields.
+    """
+    fields['type'] = kind
+    fields['name'] = name
+    fields['pid'] = os.getpid()
+    fields['t'] = round(time.perf_counter() - _metrics_start, 6)
+    if tags:
+        fields['tags'] = tags
+    _metrics_file.write(json.dumps(fields, default=str) + '\n')
+
+
+class _Span:
+    """Records the time (and memory) taken by a block of code.
+
+    tracemalloc's peak can't be reset (before Python 3.9), so spans record
+    the memory in use and how much it changed, not a peak.
+    """
+    __slots__ = ['name', 'tags', 'start', 'mem_start', 'blocks_start']
+
+    def __init__(self, name: str, tags: dict):
+        self.name = name
+        self.tags = tags
+        self.start = 0.0
+        self.mem_start = 0
+        self.blocks_start = 0
+
+    def __enter__(self):
+        if _metrics_memory:
+            import tracemalloc
+            self.mem_start = tracemalloc.get_traced_memory()[0]
+            self.blocks_start = sys.getallocatedblocks()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        duration = time.perf_counter() - self.start
+        if _metrics_file is None:
+            return  # Metrics were stopped.
+        fields = {'duration': round(duration, 6)}
+        if exc_type is not None:
+            fields['error'] = exc_type.__name__
+        if _metrics_memory:
+            import tracemalloc
+            current = tracemalloc.get_traced_memory()[0]
+            fields['mem_kb'] = current // 1024
+            fields['mem_delta_kb'] = (current - self.mem_start) // 1024
+            # Blocks allocated minus blocks freed.
+            fields['net_blocks'] = sys.getallocatedblocks() - self.blocks_start
+        _write_metric('span', self.name, self.tags, **fields)
+
+
+class _NullSpan:
+    """Used in place of a span when metrics are disabled."""
+    __slots__ = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str, **tags):
+    """Time a block of code, for use in a with statement.
+
+    The tags are recorded along with the duration.
+    If metrics are disabled, this does nothing.
+    """
+    if _metrics_file is None:
+        return _NULL_SPAN
+    return _Span(name, tags)
+
+
+def count(name: str, amount: float=1):
+    """Add to a counter. The totals are written by flush_metrics()."""
+    global _metrics_pid
+    if _metrics_file is None:
+        return
+    if _metrics_pid != os.getpid():
+        # We're in a forked process - the parent writes its own counts.
+        _metrics_counts.clear()
+        _metrics_pid = os.getpid()
+    _metrics_counts[name] += amount
+
+
+def gauge(name: str, value: float, **tags):
+    """Record the current value of something, like the number of entities."""
+    if _metrics_file is not None:
+        _write_metric('gauge', name, tags, value=value)
+
+
+def flush_metrics():
+    """Write out the counter totals, then reset them.
+
+    This is done automatically at exit, but processes which quit with
+    os._exit() (like multiprocessing workers) need to call it themselves.
+    """
+    if _metrics_file is None or _metrics_pid != os.getpid():
+        return
+    for name, value in sorted(_metrics_counts.items()):
+        _write_metric('count', name, None, value=value)
+    _metrics_counts.clear()
+
@@ -2,7 +2,9 @@
 import utils
 # Do this very early, so we log the startup sequence.
 LOGGER = utils.init_logging('bee2/vbsp.log')
+utils.start_import_timer()
 
+import io
 import os
 import os.path
 import sys
@@ -17,11 +19,11 @@ from srctools import Property, Vec, AtomicWriter, Entity
 from BEE2_config import ConfigFile
 import srctools.vmf as VLib
 import srctools
-import voiceLine
 import vbsp_options
+import vmf_fast
+import brushMerge
+import entityBudget
 import instanceLocs
-import brushLoc
-import bottomlessPit
 import conditions
 import comp_consts as consts
 
@@ -44,6 +46,20 @@ settings = {
     "packtrigger":    defaultdict(list),
 }
 
+# If importing modules takes longer than this (in seconds), warn in the log.
+IMPORT_BUDGET = 1.0
+
+# Goo mist particles, from largest to smallest.
+# These are (width, height, particle, angles), with sizes in 128 unit cells.
+GOO_MIST_SIZES = [
+    (8, 4, 'water_mist_1024_512', '0 0 0'),
+    (4, 8, 'water_mist_1024_512', '0 90 0'),
+    (4, 4, 'water_mist_512', '0 0 0'),
+    (2, 2, 'water_mist_256', '0 0 0'),
+    # There isn't a 128 particle so use 256 centered
+    (1, 1, 'water_mist_256', '0 0 0'),
+]
+
 
 TEX_VALVE = {
     # all the non-wall textures produced by the Puzzlemaker, and their
@@ -224,6 +240,18 @@ IND_ITEM_NAMES = set() # And both combined
 
 PRESET_CLUMPS = []  # Additional clumps set by conditions, for certain areas.
 
+# Set once load_config() has run.
+CONFIG_LOADED = False
+
+# Set by vbsp_batch when several maps are converted at once. The files
+# shared by every map (the counts in compile.cfg, and bee2/inject/) are
+# not written then, since the maps would overwrite each other's.
+BATCH_MODE = False
+
+# The containers filled in while converting a map, along with a copy of
+# their contents once the configs are loaded. See reset_map_state().
+MAP_STATE = []  # type: List[tuple]
+
 ##################
 # UTIL functions #
 ##################
@@ -250,18 +278,18 @@ def alter_mat(face, seed=None, texture_lock=True):
         random.seed(seed)
 
     if mat in TEX_VALVE:  # should we convert it?
-        face.mat = get_tex(TEX_VALVE[mat])
+        conditions.FACES.set_mat(face, get_tex(TEX_VALVE[mat]))
         return True
     elif mat in consts.BlackPan or mat in consts.WhitePan:
         orient = get_face_orient(face)
-        face.mat = get_tex(get_tile_type(mat, orient))
+        conditions.FACES.set_mat(face, get_tex(get_tile_type(mat, orient)))
 
         if not texture_lock:
             face.offset = 0
 
         return True
     elif mat in TEX_FIZZLER:
-        face.mat = settings['fizzler'][TEX_FIZZLER[mat]]
+        conditions.FACES.set_mat(face, settings['fizzler'][TEX_FIZZLER[mat]])
     else:
         return False
 
@@ -294,7 +322,8 @@ def get_tile_type(mat, orient):
 
 def load_settings():
     """Load in all our settings from vbsp_config."""
-    global BEE2_config
+    import voiceLine
+    import bottomlessPit
     try:
         with open("bee2/vbsp_config.cfg") as config:
             conf = Property.parse(config, 'bee2/vbsp_config.cfg')
@@ -413,8 +442,16 @@ def load_settings():
         'tonemap_exp_max': fog_config['tonemap_exposure_max', '3'],
     })
 
-    # Find the location of the BEE2 app, and load the options
-    # set in the 'Compiler Pane'.
+    LOGGER.info("Settings Loaded!")
+
+
+def load_compile_config():
+    """Find the location of the BEE2 app, and load the options set in the
+    'Compiler Pane'.
+
+    These can change between compiles, so this is reloaded for every map.
+    """
+    global BEE2_config
     if vbsp_options.get(str, 'BEE2_loc'):
         BEE2_config = ConfigFile(
             'config/compile.cfg',
@@ -423,12 +460,20 @@ def load_settings():
     else:
         BEE2_config = ConfigFile(None)
 
-    LOGGER.info("Settings Loaded!")
-
 
 def load_map(map_path):
     """Load in the VMF file."""
     global VMF
+    if vbsp_options.get(bool, 'fast_vmf_load'):
+        LOGGER.info("Parsing Map (fast)...")
+        try:
+            VMF = vmf_fast.load_vmf(map_path)
+        except vmf_fast.FastParseError as exc:
+            LOGGER.warning('Falling back to full parser: {}', exc)
+        else:
+            LOGGER.info("Loading complete!")
+            return
+
     with open(map_path) as file:
         LOGGER.info("Parsing Map...")
         props = Property.parse(file, map_path)
@@ -440,6 +485,7 @@ def load_map(map_path):
 @conditions.meta_cond(priority=100)
 def add_voice():
     """Add voice lines to the map."""
+    import voiceLine
     voiceLine.add_voice(
         has_items=settings['has_attr'],
         style_vars_=settings['style_vars'],
@@ -596,7 +642,7 @@ def fix_fizz_models(inst: Entity):
 @conditions.meta_cond(priority=-100, only_once=False)
 def static_pan(inst: Entity):
     """Switches glass angled panels to static instances, if needed."""
-    if inst['file'].casefold() in instanceLocs.resolve('<ITEM_PANEL_CLEAR>'):
+    if inst['file'].casefold() in instanceLocs.resolve_set('<ITEM_PANEL_CLEAR>'):
         # white/black are found via the func_brush
         make_static_pan(inst, "glass")
 
@@ -754,7 +800,7 @@ def make_bullseye_face(
     if mat == '':
         return False
     else:
-        face.mat = mat
+        conditions.FACES.set_mat(face, mat)
         IGNORED_FACES.add(face)
         return True
 
@@ -874,10 +920,13 @@ def set_player_model():
     model_path, pgun_skin = PLAYER_MODELS[chosen_model]
 
     # Plug leaks
-    VMF.add_brushes(VMF.make_hollow(
+    leak_plug = VMF.make_hollow(
         loc - (32, 32, 64),
         loc + (32, 32, 64),
-    ))
+    )
+    VMF.add_brushes(leak_plug)
+    for solid in leak_plug:
+        conditions.FACES.add_solid(solid)
 
     # Precache the model, so we can switch to it.
     VMF.create_ent(
@@ -1527,83 +1576,92 @@ def add_goo_mist(sides):
     """Add water_mist* particle systems to goo.
 
     This uses larger particles when needed to save ents.
+    Each layer of goo is converted into a bitmap of 128x128 cells, which
+    is then covered with the largest particles that fit. Scanning by rows
+    and by columns gives different results, so the best is used.
     """
-    needs_mist = set(sides)  # Locations that still need mist
-    sides = sorted(sides)
-    fit_goo_mist(
-        sides, needs_mist,
-        grid_x=1024,
-        grid_y=512,
-        particle='water_mist_1024_512',
-        angles='0 0 0',
-    )
-
-    fit_goo_mist(
-        sides, needs_mist,
-        grid_x=512,
-        grid_y=1024,
-        particle='water_mist_1024_512',
-        angles='0 90 0',
-    )
-
-    fit_goo_mist(
-        sides, needs_mist,
-        grid_x=512,
-        grid_y=512,
-        particle='water_mist_512',
-    )
-
-    fit_goo_mist(
-        sides, needs_mist,
-        grid_x=256,
-        grid_y=256,
-        particle='water_mist_256',
-    )
-
-    # There isn't a 128 particle so use 256 centered
-    fit_goo_mist(
-        sides, needs_mist,
-        grid_x=128,
-        grid_y=128,
-        particle='water_mist_256',
-    )
-
+    layers = defaultdict(list)
+    for x, y, z in sides:
+        layers[z].append((x, y))
+
+    for z, cells in layers.items():
+        min_x = min(x for x, y in cells)
+        min_y = min(y for x, y in cells)
+        width = round((max(x for x, y in cells) - min_x) / 128) + 1
+        height = round((max(y for x, y in cells) - min_y) / 128) + 1
+        cell_pos = [
+            (round((x - min_x) / 128), round((y - min_y) / 128))
+            for x, y in cells
+        ]
 
-def fit_goo_mist(
-        sides,
-        needs_mist,
-        grid_x,
-        grid_y,
-        particle,
-        angles='0 0 0',
-        ):
-    """Try to add particles of the given size.
+        best_particles = None
+        for transpose in (False, True):
+            # Rows of cells, 1 where mist is still needed.
+            if transpose:
+                grid = [bytearray(height) for _ in range(width)]
+                for x, y in cell_pos:
+                    grid[x][y] = 1
+            else:
+                grid = [bytearray(width) for _ in range(height)]
+                for x, y in cell_pos:
+                    grid[y][x] = 1
+
+            particles = []
+            for size_x, size_y, particle, angles in GOO_MIST_SIZES:
+                if transpose:
+                    fits = fit_goo_mist(grid, size_y, size_x)
+                    fits = [(x, y) for y, x in fits]
+                else:
+                    fits = fit_goo_mist(grid, size_x, size_y)
+                for x, y in fits:
+                    particles.append((x, y, size_x, size_y, particle, angles))
+            if best_particles is None or len(particles) < len(best_particles):
+                best_particles = particles
 
-    needs_mist is a set of all added sides, so we don't double-up on a space.
-    """
-    if grid_y is None:
-        grid_y = grid_x
-    for pos in sides:
-        if pos not in needs_mist:
-            continue  # We filled this space already
-        for x, y in utils.iter_grid(grid_x, grid_y, stride=128):
-            if (pos.x+x, pos.y+y, pos.z) not in needs_mist:
-                break  # Doesn't match
-        else:
+        for x, y, size_x, size_y, particle, angles in best_particles:
             VMF.create_ent(
                 classname='info_particle_system',
                 targetname='@goo_mist',
                 start_active='1',
                 effect_name=particle,
                 origin='{x!s} {y!s} {z!s}'.format(
-                    x=pos.x + (grid_x/2 - 64),
-                    y=pos.y + (grid_y/2 - 64),
-                    z=pos.z + 48,
+                    x=min_x + 128 * x + (size_x * 64 - 64),
+                    y=min_y + 128 * y + (size_y * 64 - 64),
+                    z=z + 48,
                 ),
                 angles=angles,
             )
-            for (x, y) in utils.iter_grid(grid_x, grid_y, stride=128):
-                needs_mist.remove((pos.x+x, pos.y+y, pos.z))
+
+
+def fit_goo_mist(
+        grid: List[bytearray],
+        size_x: int,
+        size_y: int,
+        ) -> List[Tuple[int, int]]:
+    """Find where particles of the given size fit entirely in goo.
+
+    grid is the rows of cells still needing mist, which are cleared when
+    filled. The size is in cells. The x, y position of each particle
+    is returned.
+    """
+    height = len(grid)
+    width = len(grid[0])
+    blank = bytes(size_x)
+    fits = []
+    for y in range(height - size_y + 1):
+        row = grid[y]
+        x = row.find(1)
+        while 0 <= x <= width - size_x:
+            rows = grid[y:y + size_y]
+            if all(other.find(0, x, x + size_x) == -1 for other in rows):
+                fits.append((x, y))
+                for other in rows:
+                    other[x:x + size_x] = blank
+                x += size_x
+            else:
+                x += 1
+            x = row.find(1, x)
+    return fits
 
 
 def fixup_goo_sides():
@@ -1612,6 +1670,8 @@ def fixup_goo_sides():
     For goo these can use special textures, or black 4x4 walls.
     For pits sides use normal black walls.
     """
+    import brushLoc
+    import bottomlessPit
 
     if vbsp_options.get(str, 'goo_wall_scale_temp'):
         scale = conditions.get_scaling_template(
@@ -1635,15 +1695,16 @@ def fixup_goo_sides():
 
                 # We only want to alter black panel surfaces..
                 if block_type.is_goo and face.mat.casefold() in BLACK_PAN:
-                    face.mat = ''
+                    goo_mat = ''
                     if norm.z != 0:
-                        face.mat = get_tex('special.goo_floor')
+                        goo_mat = get_tex('special.goo_floor')
 
-                    if face.mat == '':  # goo_floor is invalid, or not used
-                        face.mat = get_tex('special.goo_wall')
+                    if goo_mat == '':  # goo_floor is invalid, or not used
+                        goo_mat = get_tex('special.goo_wall')
 
-                    if face.mat == '': # No overrides, use normal textures.
-                        face.mat = get_tex('black.4x4')
+                    if goo_mat == '': # No overrides, use normal textures.
+                        goo_mat = get_tex('black.4x4')
+                    conditions.FACES.set_mat(face, goo_mat)
 
                     if scale is not None:
                         # Allow altering the orientation of the texture.
@@ -1658,7 +1719,7 @@ def fixup_goo_sides():
                         bottomlessPit.fix_base_brush(VMF, solid, face)
                     else:
                         # Use the black textures, this should be textured normally.
-                        face.mat = BLACK_PAN[1]
+                        conditions.FACES.set_mat(face, BLACK_PAN[1])
 
     LOGGER.info("Done!")
 
@@ -1818,6 +1879,7 @@ def fix_squarebeams(face, rotate, reset_offset: bool, scale: float):
 
 def change_brush():
     """Alter all world/detail brush textures to use the configured ones."""
+    import bottomlessPit
     LOGGER.info("Editing Brushes...")
     glass_clip_mat = vbsp_options.get(str, 'glass_clip')
     glass_scale = vbsp_options.get(float, 'glass_scale')
@@ -1842,59 +1904,57 @@ def change_brush():
 
     if vbsp_options.get(bool, 'remove_pedestal_plat'):
         # Remove the pedestal platforms
-        for ent in VMF.by_class['func_detail']:
-            if ent in IGNORED_BRUSH_ENTS:
+        for face in conditions.FACES.find_mat('plastic/plasticwall004a'):
+            ent = conditions.FACES.owner[face]
+            if ent is None or ent in IGNORED_BRUSH_ENTS:
                 continue
-
-            for side in ent.sides():
-                if side.mat.casefold() == 'plastic/plasticwall004a':
-                    VMF.remove_ent(ent)
-                    break  # Skip to next entity
+            if ent in VMF.by_class['func_detail']:  # Not already removed
+                VMF.remove_ent(ent)
+                conditions.FACES.remove_detail(ent)
 
     make_bottomless = bottomlessPit.pits_allowed()
     LOGGER.info('Make Bottomless Pit: {}', make_bottomless)
 
-    highest_brush = 0
-
-    for solid in VMF.iter_wbrushes(world=True, detail=True):
-        is_glass = False
-        for face in solid:
-            highest_brush = max(
-                highest_brush,
-                face.planes[0].z,
-                face.planes[1].z,
-                face.planes[2].z,
+    for face in conditions.FACES.find_mat(*consts.Goo):
+        if make_goo_mist:
+            mist_solids.add(
+                conditions.FACES.solid[face].get_origin().as_tuple()
             )
-            if face.mat in consts.Goo:
-                if make_goo_mist:
-                    mist_solids.add(
-                        solid.get_origin().as_tuple()
-                    )
-                # Apply goo scaling
-                face.scale = goo_scale
-            if face.mat == consts.Special.GLASS:
-                if glass_temp is not None:
-                    try:
-                        u, v, face.ham_rot = glass_temp[face.normal().as_tuple()]
-                    except KeyError:
-                        pass
-                    else:
-                        face.uaxis = u.copy()
-                        face.vaxis = v.copy()
-                else:
-                    # Apply the glass scaling option
-                    face.scale = glass_scale
-                settings['has_attr']['glass'] = True
-                is_glass = True
-        if is_glass and glass_clip_mat:
+        # Apply goo scaling
+        face.scale = goo_scale
+
+    glass_solids = []  # type: List[VLib.Solid]
+    for face in conditions.FACES.find_mat(consts.Special.GLASS):
+        if glass_temp is not None:
+            try:
+                u, v, face.ham_rot = glass_temp[face.normal().as_tuple()]
+            except KeyError:
+                pass
+            else:
+                face.uaxis = u.copy()
+                face.vaxis = v.copy()
+        else:
+            # Apply the glass scaling option
+            face.scale = glass_scale
+        settings['has_attr']['glass'] = True
+        # Faces of a brush are next to each other.
+        solid = conditions.FACES.solid[face]
+        if not glass_solids or glass_solids[-1] is not solid:
+            glass_solids.append(solid)
+
+    if glass_clip_mat:
+        for solid in glass_solids:
             glass_clip, glass_loc, glass_norm = make_barrier_solid(
                 solid.get_origin(),
                 glass_clip_mat,
             )
             VMF.add_brush(glass_clip.solid)
+            conditions.FACES.add_solid(glass_clip.solid)
             if floorbeam_locs is not None and glass_norm.z != 0:
                 floorbeam_locs.append((glass_loc, glass_norm))
 
+    highest_brush = conditions.FACES.highest_point()
+
     if vbsp_options.get(str, 'glass_pack') and settings['has_attr']['glass']:
         TO_PACK.add(vbsp_options.get(str, 'glass_pack').casefold())
 
@@ -2055,26 +2115,34 @@ def random_walls():
     edge_off = vbsp_options.get(bool, 'reset_edge_off')
     edge_scale = vbsp_options.get(float, 'edge_scale')
 
-    for solid in VMF.iter_wbrushes(world=True, detail=True):
-        for face in solid:
-            if face in IGNORED_FACES:
-                continue
+    if PRESET_CLUMPS:
+        # These can retexture any face.
+        faces = conditions.FACES.all_faces()
+    else:
+        # Only these textures are changed by alter_mat().
+        mats = set(TEX_VALVE).union(TEX_FIZZLER, consts.WhitePan, consts.BlackPan)
+        mats.add(consts.Special.SQUAREBEAMS)
+        faces = conditions.FACES.find_mat(*mats)
 
-            if face.mat == consts.Special.SQUAREBEAMS:
-                fix_squarebeams(face, rotate_edge, edge_off, edge_scale)
+    for face in faces:
+        if face in IGNORED_FACES:
+            continue
 
-            # Conditions can define special clumps for items, we want to
-            # do those if needed.
-            origin = face.get_origin()
-            for clump in PRESET_CLUMPS:
-                if clump.min_pos <= origin <= clump.max_pos:
-                    face.mat = clump.tex[get_tile_type(
-                        face.mat.casefold(),
-                        get_face_orient(face),
-                    )]
-                    break
-            else:  # No clump..
-                alter_mat(face, face_seed(face), texture_lock)
+        if face.mat == consts.Special.SQUAREBEAMS:
+            fix_squarebeams(face, rotate_edge, edge_off, edge_scale)
+
+        # Conditions can define special clumps for items, we want to
+        # do those if needed.
+        origin = face.get_origin()
+        for clump in PRESET_CLUMPS:
+            if clump.min_pos <= origin <= clump.max_pos:
+                conditions.FACES.set_mat(face, clump.tex[get_tile_type(
+                    face.mat.casefold(),
+                    get_face_orient(face),
+                )])
+                break
+        else:  # No clump..
+            alter_mat(face, face_seed(face), texture_lock)
 
 
 Clump = namedtuple('Clump', [
@@ -2164,10 +2232,8 @@ def clump_walls():
     panel_mats = set(consts.WhitePan).union(consts.BlackPan)
     possible_locs = [
         face.get_origin()
-        for face in
-        VMF.iter_wfaces(world=True, detail=True)
+        for face in conditions.FACES.find_mat(*panel_mats)
         if face not in IGNORED_FACES
-        if face.mat.casefold() in panel_mats
     ]
 
     clump_size = vbsp_options.get(int, "clump_size")
@@ -2249,7 +2315,7 @@ def clump_walls():
         clump_changed = False
         for clump in PRESET_CLUMPS:
             if clump.min_pos <= origin <= clump.max_pos:
-                face.mat = clump.tex[get_tile_type(mat, orient)]
+                conditions.FACES.set_mat(face, clump.tex[get_tile_type(mat, orient)])
                 clump_changed = True
                 break
         if clump_changed:
@@ -2265,21 +2331,21 @@ def clump_walls():
         # Clump the texture!
         for clump in clumps:
             if clump.min_pos <= origin <= clump.max_pos:
-                face.mat = clump.tex[get_tile_type(mat, orient)]
+                conditions.FACES.set_mat(face, clump.tex[get_tile_type(mat, orient)])
                 break
         else:
             # Not in a clump!
             # Allow using special textures for these, to fill in gaps.
             orig_mat = mat
             if mat in consts.WhitePan:
-                face.mat = get_tex("special.white_gap")
+                conditions.FACES.set_mat(face, get_tex("special.white_gap"))
                 if not face.mat:
-                    face.mat = orig_mat
+                    conditions.FACES.set_mat(face, orig_mat)
                     alter_mat(face, texture_lock=texture_lock)
             elif mat in consts.BlackPan:
-                face.mat = get_tex("special.black_gap")
+                conditions.FACES.set_mat(face, get_tex("special.black_gap"))
                 if not face.mat:
-                    face.mat = orig_mat
+                    conditions.FACES.set_mat(face, orig_mat)
                     alter_mat(face, texture_lock=texture_lock)
             else:
                 alter_mat(face, texture_lock=texture_lock)
@@ -2574,6 +2640,7 @@ def change_trig():
 
 def add_extra_ents(mode):
     """Add the various extra instances to the map."""
+    import voiceLine
     LOGGER.info("Adding Music...")
 
     if mode == "COOP":
@@ -2793,6 +2860,7 @@ def change_func_brush():
         if is_grating and grating_clip_mat:
             grate_clip, _, _ = make_barrier_solid(brush_loc, grating_clip_mat)
             VMF.add_brush(grate_clip.solid)
+            conditions.FACES.add_solid(grate_clip.solid)
 
             grate_phys_clip_solid = grate_clip.solid.copy()  # type: VLib.Solid
             for face in grate_phys_clip_solid.sides:
@@ -2844,6 +2912,7 @@ def change_func_brush():
                         )
                         brush.solids = new_brush.detail.solids
                         new_brush.detail.remove()
+                        conditions.FACES.remove_detail(new_brush.detail)
                         for side in brush.sides():
                             if side.mat.casefold() == 'metal/black_wall_metal_002c':
                                 # Copy data from the original face...
@@ -2883,11 +2952,11 @@ def set_special_mat(face, side_type):
     rep_texture = 'special.' + side_type
     orient = get_face_orient(face)
     if orient is ORIENT.wall and get_tex(rep_texture + '_wall'):
-        face.mat = get_tex(rep_texture + '_wall')
+        conditions.FACES.set_mat(face, get_tex(rep_texture + '_wall'))
     elif get_tex(rep_texture):
-        face.mat = get_tex(rep_texture)
+        conditions.FACES.set_mat(face, get_tex(rep_texture))
     elif not alter_mat(face):
-        face.mat = get_tex(side_type + '.' + str(orient))
+        conditions.FACES.set_mat(face, get_tex(side_type + '.' + str(orient)))
 
 
 def make_static_pan(ent, pan_type, is_bullseye=False):
@@ -3107,11 +3176,14 @@ def make_packlist(map_path):
     pack_triggers = settings['packtrigger']
 
     if pack_triggers:
+        # World and detail brushes are indexed by material.
+        for mat in list(pack_triggers):
+            if conditions.FACES.find_mat(mat):
+                TO_PACK.update(pack_triggers.pop(mat))
+
         def face_iter():
             """Check all these locations for the target textures."""
             # We need the iterator to allow breaking out of the loop.
-            for face in VMF.iter_wfaces():
-                yield face.mat.casefold()
             for ent in (
                 VMF.by_class['func_brush'] |
                 VMF.by_class['func_door_rotating'] |
@@ -3124,12 +3196,13 @@ def make_packlist(map_path):
                 # Check overlays too
                 yield overlay['material', ''].casefold()
 
-        for mat in face_iter():
-            if mat in pack_triggers:
-                TO_PACK.update(pack_triggers[mat])
-                del pack_triggers[mat]
-                if not pack_triggers:
-                    break  # No more left
+        if pack_triggers:
+            for mat in face_iter():
+                if mat in pack_triggers:
+                    TO_PACK.update(pack_triggers[mat])
+                    del pack_triggers[mat]
+                    if not pack_triggers:
+                        break  # No more left
 
     if not TO_PACK:
         # Nothing to pack - wipe the packfile!
@@ -3385,6 +3458,8 @@ def process_vbsp_log(output: bytes):
             )
 
     LOGGER.info('Retrieved counts: {}', counts)
+    if BATCH_MODE:
+        return
     count_section = BEE2_config['Counts']
     for count_name, (value, limit) in counts.items():
         count_section[count_name] = value
@@ -3394,6 +3469,8 @@ def process_vbsp_log(output: bytes):
 
 def process_vbsp_fail(output: bytes):
     """Read through VBSP's logs when failing, to update counts."""
+    if BATCH_MODE:
+        return
     # VBSP doesn't output the actual entity counts, so set the errorred
     # one to max and the others to zero.
     count_section = BEE2_config['Counts']
@@ -3427,11 +3504,165 @@ def process_vbsp_fail(output: bytes):
     BEE2_config.save_check()
 
 
+def open_inject(filename: str):
+    """Open a file in bee2/inject/ for writing, so VRAD packs it into the map.
+
+    In batch mode the maps would overwrite each other's files, and VRAD isn't
+    run. The data is discarded instead.
+    """
+    if BATCH_MODE:
+        return io.StringIO()
+    return open(os.path.join('bee2', 'inject', filename), 'w')
+
+
+# Condition modules -> their containers filled in while converting a map.
+COND_MAP_STATE = {
+    'apTag': ['tag_fizzlers', 'tag_fizzler_locs'],
+    'brushes': ['CHECKPOINT_TRIG'],
+    'colorCubes': ['COLOR_POS', 'COLOR_SEC_POS'],
+    'connections': ['LOCKABLE_ITEMS', 'LINKED_CUBES'],
+    'cutoutTile': ['FORCE_LOCATIONS'],
+    'fizzler': ['FIZZ_BRUSH_ENTS'],
+    'globals': ['CACHED_MODELS'],
+    'instances': ['GLOBAL_INPUT_ENTS'],
+    'monitor': ['ALL_MONITORS', 'ALL_CAMERAS', 'BULLSYE_LOCS'],
+    'scaffold': ['SCAFFOLD_CONFIGS'],
+    'vactubes': ['PUSH_TRIGS', 'VAC_CONFIGS'],
+}
+
+
+def map_containers() -> list:
+    """Return the containers which are filled in while converting a map."""
+    import brushLoc
+    import voiceLine
+    containers = [
+        settings['style_vars'], settings['has_attr'], settings['packtrigger'],
+        IGNORED_FACES, IGNORED_OVERLAYS, IGNORED_BRUSH_ENTS,
+        GLOBAL_OUTPUTS, TO_PACK, PACK_FILES, PACK_RENAME,
+        IND_TOGGLE_NAMES, IND_PANEL_NAMES, IND_ITEM_NAMES,
+        PRESET_CLUMPS, ANGLED_PAN_BRUSH, FLIP_PAN_BRUSH, PANEL_FAITH_TARGETS,
+        brushLoc.POS,
+        voiceLine.ADDED_BULLSEYES, voiceLine.QUOTE_EVENTS,
+        conditions.GLOBAL_INSTANCES, conditions.ALL_INST,
+        conditions.GOO_LOCS, conditions.GOO_FACE_LOC, conditions.SOLIDS,
+    ]
+    for mod_name, names in COND_MAP_STATE.items():
+        # Modules which weren't imported can't have been changed.
+        module = sys.modules.get('conditions.' + mod_name)
+        if module is not None:
+            containers.extend(getattr(module, name) for name in names)
+    return containers
+
+
+def reset_map_state():
+    """Undo the changes made to the module state by converting a map.
+
+    Each container is restored to its contents once the configs were
+    loaded, so one process can convert several maps.
+    """
+    global GAME_MODE, IS_PREVIEW
+    # get_map_info() checks these, to see if the map sets them.
+    GAME_MODE = IS_PREVIEW = 'ERR'
+    for container, saved in MAP_STATE:
+        container.clear()
+        if isinstance(container, list):
+            container.extend(saved)
+        else:
+            container.update(saved)
+    if 'conditions.monitor' in sys.modules:
+        sys.modules['conditions.monitor'].NEEDS_TURRET = False
+
+
+def load_config():
+    """Load everything which is the same for every map.
+
+    This imports the conditions, then parses vbsp_config, instances.cfg
+    and the templates. This only happens once per process.
+    """
+    global CONFIG_LOADED
+    if CONFIG_LOADED:
+        return
+    # Import all the conditions and register them.
+    with utils.span('vbsp.import_conditions'):
+        conditions.import_conditions()
+
+    LOGGER.info("Loading settings...")
+    with utils.span('vbsp.load_settings'):
+        load_settings()
+        conditions.freeze()
+    with utils.span('vbsp.load_templates'):
+        conditions.load_templates()
+    utils.log_import_times(LOGGER, IMPORT_BUDGET)
+    MAP_STATE[:] = [
+        (container, container.copy())
+        for container in map_containers()
+    ]
+    CONFIG_LOADED = True
+
+
+def convert_map(path: str, new_path: str):
+    """Convert the PeTI map at path, and save it to new_path.
+
+    load_config() must have been called first.
+    """
+    global MAP_RAND_SEED
+    reset_map_state()
+    load_compile_config()
+
+    with utils.span('vbsp.load_map'):
+        load_map(path)
+
+    MAP_RAND_SEED = calc_rand_seed()
+
+    with utils.span('vbsp.analyse'):
+        all_inst = get_map_info()
+
+        import brushLoc
+        brushLoc.POS.read_from_map(VMF, settings['has_attr'])
+
+    with utils.span('vbsp.conditions'):
+        conditions.init(
+            seed=MAP_RAND_SEED,
+            inst_list=all_inst,
+            vmf_file=VMF,
+        )
+
+        fix_inst()
+        alter_flip_panel()  # Must be done before conditions!
+        conditions.check_all()
+        add_extra_ents(mode=GAME_MODE)
+
+    with utils.span('vbsp.restyle'):
+        change_ents()
+        fixup_goo_sides()  # Must be done before change_brush()!
+        change_brush()
+        change_overlays()
+        change_trig()
+        collapse_goo_trig()
+        change_func_brush()
+        remove_static_ind_toggles()
+        remove_barrier_ents()
+        fix_worldspawn()
+
+    with utils.span('vbsp.packlist'):
+        make_packlist(path)
+
+    with utils.span('vbsp.optimise'):
+        if vbsp_options.get(bool, 'merge_brushes'):
+            brushMerge.merge_brushes(VMF)
+        entityBudget.optimise(VMF)
+
+    utils.gauge('vbsp.entities', len(VMF.entities))
+    utils.gauge('vbsp.brushes', len(VMF.brushes))
+
+    with utils.span('vbsp.save'):
+        save(new_path)
+
+
 def main():
     """Main program code.
 
     """
-    global MAP_RAND_SEED, IS_PREVIEW, GAME_MODE
     LOGGER.info("BEE{} VBSP hook initiallised.", utils.BEE_VERSION)
 
     # Just in case we fail, overwrite the VRAD config so it doesn't use old
@@ -3467,11 +3698,10 @@ def main():
         utils.stdout_loghandler.setLevel('DEBUG')
         LOGGER.info('Switched to verbose logging.')
 
-    conditions.import_conditions()  # Import all the conditions and
-    # register them.
-
     if '-dump_conditions' in folded_args:
         # Print all the condition flags, results, and metaconditions
+        conditions.import_conditions()
+        utils.log_import_times(LOGGER, IMPORT_BUDGET)
         conditions.dump_conditions()
         sys.exit()
 
@@ -3524,54 +3754,24 @@ def main():
 
     if is_hammer:
         LOGGER.warning("Hammer map detected! skipping conversion..")
-        run_vbsp(
-            vbsp_args=old_args,
-            path=path,
-        )
+        # We don't need any of the conversion code.
+        utils.log_import_times(LOGGER, IMPORT_BUDGET)
+        with utils.span('vbsp.run_vbsp', peti=False):
+            run_vbsp(
+                vbsp_args=old_args,
+                path=path,
+            )
     else:
         LOGGER.info("PeTI map detected!")
-
-        LOGGER.info("Loading settings...")
-        load_settings()
-
-        load_map(path)
-
-        MAP_RAND_SEED = calc_rand_seed()
-
-        all_inst = get_map_info()
-
-        brushLoc.POS.read_from_map(VMF, settings['has_attr'])
-
-        conditions.init(
-            seed=MAP_RAND_SEED,
-            inst_list=all_inst,
-            vmf_file=VMF,
-        )
-
-        fix_inst()
-        alter_flip_panel()  # Must be done before conditions!
-        conditions.check_all()
-        add_extra_ents(mode=GAME_MODE)
-
-        change_ents()
-        fixup_goo_sides()  # Must be done before change_brush()!
-        change_brush()
-        change_overlays()
-        change_trig()
-        collapse_goo_trig()
-        change_func_brush()
-        remove_static_ind_toggles()
-        remove_barrier_ents()
-        fix_worldspawn()
-
-        make_packlist(path)
-
-        save(new_path)
-        run_vbsp(
-            vbsp_args=new_args,
-            path=path,
-            new_path=new_path,
-        )
+        load_config()
+        with utils.span('vbsp.convert', map=path_file):
+            convert_map(path, new_path)
+        with utils.span('vbsp.run_vbsp', peti=True):
+            run_vbsp(
+                vbsp_args=new_args,
+                path=path,
+                new_path=new_path,
+            )
 
     # We always need to do this - VRAD can't easily determine if the map is
     # a Hammer one.
@@ -0,0 +1,122 @@
+"""Convert many PeTI maps, only loading the configs once.
+
+Running VBSP once per map re-imports the conditions, and re-parses
+vbsp_config.cfg, instances.cfg and templates.vmf each time. Instead each
+worker process loads those once, then converts several maps. Before each
+map vbsp.reset_map_state() clears whatever the previous one left behind.
+Where fork() is available the configs are loaded before the workers are
+started, so they are only loaded once in total.
+
+Like VBSP, this needs to be run from the bin/ folder. Each map is written
+to the styled/ folder next to it. bee2/vrad_config.cfg, bee2/inject/ and the
+counts in the app's compile.cfg are not written, since they would be shared
+by all the maps.
+"""
+import argparse
+import functools
+import multiprocessing
+import os
+import shlex
+import sys
+import time
+
+import utils
+import vbsp
+
+from typing import List, Optional, Tuple
+
+LOGGER = utils.getLogger(__name__)
+
+
+def compile_map(
+    path: str,
+    vbsp_args: Optional[List[str]],
+) -> Tuple[str, bool, float]:
+    """Convert a single map. This runs inside a worker process.
+
+    If vbsp_args is set, the original VBSP is then run with those arguments.
+    This returns the map, whether it succeeded and the time taken.
+    """
+    start = time.perf_counter()
+    path_dir, path_file = os.path.split(path)
+    new_path = os.path.join(path_dir, 'styled', path_file)
+    try:
+        vbsp.convert_map(path, new_path)
+        if vbsp_args is not None:
+            vbsp.run_vbsp(
+                vbsp_args=vbsp_args + [new_path],
+                path=path,
+                new_path=new_path,
+            )
+    # VBSP calls sys.exit() on errors.
+    except (Exception, SystemExit):
+        LOGGER.exception('Failed to convert "{}"!', path)
+        success = False
+    else:
+        success = True
+    # Workers quit without running atexit handlers.
+    utils.flush_metrics()
+    return path, success, time.perf_counter() - start
+
+
+def init_worker():
+    """Load the configs in a worker, if it wasn't forked with them loaded."""
+    vbsp.BATCH_MODE = True
+    vbsp.load_config()
+
+
+def main(argv: List[str]) -> int:
+    """Load the configs, then convert each map in a process pool."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('maps', nargs='+', help='The maps to convert.')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+                        help='The number of maps to convert at once.')
+    parser.add_argument('--vbsp', default=None, metavar='ARGS',
+                        help='Also run the original VBSP on each map, with '
+                             'these arguments.')
+    args = parser.parse_args(argv)
+
+    maps = []
+    for path in args.maps:
+        path = os.path.abspath(path)
+        if not path.endswith('.vmf'):
+            path += '.vmf'
+        maps.append(path)
+
+    vbsp_args = None if args.vbsp is None else shlex.split(args.vbsp)
+
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+        init_worker()
+    else:
+        context = multiprocessing.get_context('spawn')
+
+    start = time.perf_counter()
+    failed = []
+    with context.Pool(
+        min(args.jobs, len(maps)),
+        initializer=init_worker,
+    ) as pool:
+        for path, success, duration in pool.imap_unordered(
+            functools.partial(compile_map, vbsp_args=vbsp_args),
+            maps,
+        ):
+            if success:
+                LOGGER.info('Converted "{}" in {:.2f}s', path, duration)
+            else:
+                failed.append(path)
+
+    LOGGER.info(
+        'Converted {}/{} maps in {:.2f}s',
+        len(maps) - len(failed),
+        len(maps),
+        time.perf_counter() - start,
+    )
+    if failed:
+        LOGGER.error('Failed maps:\n{}', '\n'.join(failed))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,403 @@
+"""Keep the VBSP hook loaded between compiles.
+
+Normally each compile starts the hook from scratch - importing everything,
+then parsing vbsp_config, instances.cfg and the templates. If the
+compile_daemon option is enabled, the first compile starts a daemon in the
+background. This keeps a worker process ready with all that already loaded.
+Later compiles send their arguments to the daemon, which runs the hook in the
+worker and sends back the output. Each worker only compiles one map, then
+a new one is started and loaded, ready for the next.
+
+If the configs change the worker is replaced, so it uses the new ones.
+If the daemon isn't running, the hook just compiles the map itself.
+
+Messages are JSON, so nothing received is unpickled. The socket and a random
+authentication key are kept in a folder only the current user can access.
+"""
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import connection
+
+import utils
+
+from typing import List, Optional, Tuple, Dict
+
+LOGGER = utils.getLogger(__name__)
+
+# Passed to vbsp_launch to run the daemon.
+ARG_DAEMON = '-bee2_daemon'
+
+# The size of the random key clients need to connect.
+AUTH_KEY_SIZE = 32
+
+# If these are modified, the worker is replaced. The app's compile.cfg is
+# reloaded for every map instead, since the hook rewrites it each compile.
+CONFIG_FILES = [
+    'bee2/vbsp_config.cfg',
+    'bee2/instances.cfg',
+    'bee2/templates.vmf',
+]
+
+# If no compiles occur for this long (in seconds), the daemon quits.
+IDLE_TIMEOUT = 30 * 60
+
+# Windows doesn't allow the daemon to outlive the hook without this.
+DETACHED_PROCESS = 0x00000008
+
+
+def private_dir() -> str:
+    """Return the folder for the sockets and keys, which only we can access.
+
+    This is in the temp folder, since socket paths have a short length
+    limit. On Windows that is already private to each user.
+    """
+    if utils.WIN:
+        path = os.path.join(tempfile.gettempdir(), 'bee2_vbsp')
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    path = os.path.join(
+        tempfile.gettempdir(),
+        'bee2_vbsp_{}'.format(os.getuid()),
+    )
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    # Someone else could have made it first, or replaced it with a link.
+    info = os.lstat(path)
+    if (
+        not stat.S_ISDIR(info.st_mode) or
+        info.st_uid != os.getuid() or
+        info.st_mode & 0o077
+    ):
+        raise PermissionError('"{}" is not private!'.format(path))
+    return path
+
+
+def get_address(folder: str) -> Tuple[str, str, str]:
+    """Get the address, family and key file for the daemon in this folder.
+
+    Each game's bin/ folder gets a separate daemon.
+    """
+    folder = os.path.normcase(os.path.realpath(folder))
+    key = hashlib.sha512(folder.encode('utf8')).hexdigest()[:16]
+    priv_dir = private_dir()
+    key_file = os.path.join(priv_dir, key + '.key')
+    if utils.WIN:
+        return r'\\.\pipe\bee2_vbsp_' + key, 'AF_PIPE', key_file
+    else:
+        return os.path.join(priv_dir, key + '.sock'), 'AF_UNIX', key_file
+
+
+def connect(folder: str) -> Optional[connection.Connection]:
+    """Connect to the daemon for this folder, or return None if not running.
+
+    Both sides prove they have the key, so another user can't pretend to be
+    the daemon.
+    """
+    try:
+        address, family, key_file = get_address(folder)
+        with open(key_file, 'rb') as f:
+            auth_key = f.read()
+        return connection.Client(address, family, authkey=auth_key)
+    except (OSError, multiprocessing.AuthenticationError):
+        return None
+
+
+def send_msg(conn: connection.Connection, msg: dict):
+    """Send a message, as JSON."""
+    conn.send_bytes(json.dumps(msg).encode('utf8'))
+
+
+def recv_msg(conn: connection.Connection) -> dict:
+    """Receive a JSON message."""
+    msg = json.loads(conn.recv_bytes().decode('utf8'))
+    if not isinstance(msg, dict):
+        raise ValueError('Invalid message: {!r}'.format(msg))
+    return msg
+
+
+def run_client(argv: List[str]) -> Optional[int]:
+    """Send a compile to the daemon.
+
+    The output is printed, and the exit code is returned. If the daemon
+    isn't running, None is returned instead.
+    """
+    conn = connect(os.getcwd())
+    if conn is None:
+        return None
+    with conn:
+        try:
+            send_msg(conn, {'cmd': 'compile', 'argv': argv})
+            reply = recv_msg(conn)
+            code = int(reply['code'])
+            output = str(reply['output'])
+        except (OSError, EOFError, ValueError, KeyError):
+            # The daemon quit - compile it ourselves.
+            return None
+    sys.stdout.write(output)
+    sys.stdout.flush()
+    return code
+
+
+def start():
+    """Start the daemon in the background, for the next compile."""
+    if getattr(sys, 'frozen', False):
+        args = [sys.executable, ARG_DAEMON]
+    else:
+        args = [
+            sys.executable,
+            os.path.join(os.path.dirname(__file__), 'vbsp_launch.py'),
+            ARG_DAEMON,
+        ]
+    LOGGER.info('Starting compile daemon...')
+    # The daemon mustn't keep our output open, otherwise the game
+    # will wait for it to finish.
+    if utils.WIN:
+        subprocess.Popen(
+            args,
+            close_fds=True,
+            creationflags=DETACHED_PROCESS |
+            subprocess.CREATE_NEW_PROCESS_GROUP,
+        )
+    else:
+        subprocess.Popen(
+            args,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+
+
+def stop(folder: str):
+    """Stop the daemon for this bin/ folder, if it's running.
+
+    This waits until it has quit, so the compiler files can be replaced.
+    """
+    conn = connect(folder)
+    if conn is None:
+        return
+    LOGGER.info('Stopping compile daemon in "{}"...', folder)
+    with conn:
+        try:
+            send_msg(conn, {'cmd': 'stop'})
+            # The daemon doesn't reply, this only returns once it quits.
+            conn.recv_bytes()
+        except (OSError, EOFError):
+            pass
+
+
+def config_mtimes() -> Dict[str, Optional[int]]:
+    """Get the modification times of the config files."""
+    mtimes = {}
+    for filename in CONFIG_FILES:
+        try:
+            mtimes[filename] = os.stat(filename).st_mtime_ns
+        except FileNotFoundError:
+            mtimes[filename] = None
+    return mtimes
+
+
+def null_output():
+    """Without a console, sys.stdout and stderr are None.
+
+    Logging needs them to be present.
+    """
+    if sys.stdout is None:
+        sys.stdout = open(os.devnull, 'w')
+    if sys.stderr is None:
+        sys.stderr = open(os.devnull, 'w')
+
+
+def warm_up():
+    """Load the configs in a new worker, before a compile is sent to it."""
+    null_output()
+    # Forked workers inherit the daemon's log handlers.
+    # Importing VBSP adds its own.
+    logger = logging.getLogger('BEE2')
+    for handler in logger.handlers[:]:
+        logger.removeHandler(handler)
+    import vbsp
+    try:
+        vbsp.load_config()
+    except Exception:
+        # The compile will fail the same way, and report the error.
+        LOGGER.exception('Loading configs failed:')
+
+
+def worker_compile(argv: List[str]) -> Tuple[int, str]:
+    """Run the VBSP hook in a worker, returning the exit code and output."""
+    import vbsp
+    output = io.StringIO()
+    handler = logging.StreamHandler(output)
+    handler.setFormatter(utils.long_log_format)
+    # Show the same messages that would go to the console.
+    handler.addFilter(
+        lambda record: record.levelno >= utils.stdout_loghandler.level
+    )
+    logging.getLogger('BEE2').addHandler(handler)
+
+    sys.argv = ['vbsp'] + argv
+    try:
+        vbsp.main()
+    except SystemExit as exc:
+        if exc.code is None:
+            code = 0
+        elif isinstance(exc.code, int):
+            code = exc.code
+        else:
+            code = 1
+    except Exception:
+        LOGGER.exception('Compile failed:')
+        code = 1
+    else:
+        code = 0
+    # The worker quits without running atexit handlers.
+    utils.flush_metrics()
+    return code, output.getvalue()
+
+
+class Daemon:
+    """Runs compiles sent by the hook, in a worker with everything loaded."""
+    def __init__(self):
+        self.pool = None  # type: multiprocessing.pool.Pool
+        self.mtimes = {}  # type: Dict[str, Optional[int]]
+        self.last_used = time.monotonic()
+        # Held while a compile is running.
+        self.lock = threading.Lock()
+
+    def start_worker(self):
+        """Start a new worker, which immediately loads the configs."""
+        if self.pool is not None:
+            self.pool.terminate()
+        self.mtimes = config_mtimes()
+        # Each worker only compiles once, then another is started.
+        self.pool = multiprocessing.Pool(
+            1,
+            initializer=warm_up,
+            maxtasksperchild=1,
+        )
+
+    def compile(self, argv: List[str]) -> Tuple[int, str]:
+        """Run a compile."""
+        with self.lock:
+            if config_mtimes() != self.mtimes:
+                LOGGER.info('Configs changed, reloading...')
+                self.start_worker()
+            LOGGER.info('Compiling: {}', argv)
+            try:
+                return self.pool.apply(worker_compile, (argv, ))
+            except Exception:
+                # The worker died, or the result couldn't be returned.
+                # Start a new one for the next compile.
+                LOGGER.exception('Compile failed:')
+                self.start_worker()
+                return 1, 'The compile daemon failed to run the compile!\n'
+            finally:
+                self.last_used = time.monotonic()
+
+    def check_idle(self):
+        """Quit if no compiles happen for a while."""
+        while True:
+            time.sleep(60)
+            with self.lock:
+                if time.monotonic() - self.last_used > IDLE_TIMEOUT:
+                    LOGGER.info('No compiles, quitting.')
+                    self.pool.terminate()
+                    logging.shutdown()
+                    os._exit(0)
+
+    def serve(self):
+        """Accept compiles, until told to stop."""
+        if connect(os.getcwd()) is not None:
+            LOGGER.info('Daemon already running!')
+            return
+
+        address, family, key_file = get_address(os.getcwd())
+        # These may be left behind by a daemon which didn't quit cleanly.
+        # They're in our private folder, but check we own them anyway.
+        stale = [key_file]
+        if family == 'AF_UNIX':
+            stale.append(address)
+        for path in stale:
+            try:
+                info = os.lstat(path)
+            except FileNotFoundError:
+                continue
+            if not utils.WIN and info.st_uid != os.getuid():
+                LOGGER.error('"{}" is owned by another user!', path)
+                return
+            os.remove(path)
+
+        # A new key each time, only readable by us.
+        auth_key = os.urandom(AUTH_KEY_SIZE)
+        fd = os.open(key_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with open(fd, 'wb') as f:
+            f.write(auth_key)
+
+        self.start_worker()
+        threading.Thread(target=self.check_idle, daemon=True).start()
+
+        with connection.Listener(address, family, authkey=auth_key) as listener:
+            LOGGER.info('Listening on "{}"', address)
+            while True:
+                try:
+                    conn = listener.accept()
+                except (OSError, multiprocessing.AuthenticationError):
+                    LOGGER.warning('Bad connection:', exc_info=True)
+                    continue
+                with conn:
+                    try:
+                        msg = recv_msg(conn)
+                    except (OSError, EOFError, ValueError):
+                        LOGGER.warning('Bad message:', exc_info=True)
+                        continue
+                    cmd = msg.get('cmd')
+                    if cmd == 'stop':
+                        LOGGER.info('Stopping...')
+                        with self.lock:
+                            self.pool.terminate()
+                            self.pool.join()
+                        listener.close()
+                        try:
+                            os.remove(key_file)
+                        except OSError:
+                            pass
+                        logging.shutdown()
+                        # Don't reply or close the connection, so it's
+                        # only closed once we've quit.
+                        os._exit(0)
+                    elif cmd == 'compile':
+                        argv = msg.get('argv')
+                        if not isinstance(argv, list) or not all(
+                            isinstance(arg, str) for arg in argv
+                        ):
+                            LOGGER.warning('Invalid arguments {!r}', argv)
+                            continue
+                        code, output = self.compile(argv)
+                        try:
+                            send_msg(conn, {'code': code, 'output': output})
+                        except OSError:
+                            LOGGER.warning('Hook quit before the compile finished!')
+                    else:
+                        LOGGER.warning('Unknown message {!r}', msg)
+
+
+def main():
+    """Run the daemon."""
+    null_output()
+    utils.init_logging('bee2/vbsp_daemon.log')
+    LOGGER.info('BEE{} compile daemon started.', utils.BEE_VERSION)
+    Daemon().serve()
@@ -1,7 +1,30 @@
 """If run as the main script, a module will be imported twice.
 
-This just redirects to stop that.
+This just redirects to stop that. If the compile daemon is running,
+the compile is sent there instead.
 """
-import vbsp
+import multiprocessing
+import sys
 
-vbsp.main()
+import vbsp_daemon
+
+if __name__ == '__main__':
+    # The daemon's workers are started using this executable.
+    multiprocessing.freeze_support()
+
+    if sys.argv[1:] == [vbsp_daemon.ARG_DAEMON]:
+        vbsp_daemon.main()
+        sys.exit()
+
+    code = vbsp_daemon.run_client(sys.argv[1:])
+    if code is not None:
+        sys.exit(code)
+
+    import vbsp
+    import vbsp_options
+    try:
+        vbsp.main()
+    finally:
+        # Start the daemon, so it's ready for the next compile.
+        if vbsp.CONFIG_LOADED and vbsp_options.get(bool, 'compile_daemon'):
+            vbsp_daemon.start()
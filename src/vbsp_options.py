@@ -494,4 +494,36 @@ DEFAULTS = [
     Opt('voice_studio_should_shoot', False,
         """Should turrets shoot at this character when shown?
         """),
+    Opt('fast_vmf_load', True,
+        """Use the specialised reader for Puzzlemaker maps.
+
+        This produces the same map as the regular parser, but faster.
+        Maps which use other syntax automatically use the regular parser.
+        """),
+    Opt('budget_margin', 0.9,
+        """Fraction of the entity limit where entity-saving changes apply.
+
+        Before running VBSP the entity count is estimated. If it's above
+        this fraction of the limit, identical triggers are merged. Set
+        above 1 to disable.
+        """),
+    Opt('budget_lossy', False,
+        """Allow visible changes to save entities near the limit.
+
+        If the map is still close to the limit after merging triggers, goo
+        mist particles are combined (which may extend past the goo) and
+        then antlines are made static, so they no longer light up.
+        """),
+    Opt('merge_brushes', True,
+        """Combine adjacent box brushes before saving the map.
+
+        Brushes are only merged if they are in the same entity and all
+        their other faces match, so this doesn't change the appearance.
+        """),
+    Opt('compile_daemon', False,
+        """Keep the compiler loaded in the background between compiles.
+
+        After the first compile, a daemon is started which keeps
+        the configs loaded. This makes later compiles start faster.
+        """),
 ]
@@ -0,0 +1,233 @@
+"""Specialised reading of the VMFs produced by the Puzzlemaker.
+
+The generic Property parser handles any file Hammer could produce, then
+VMF.parse() looks up each key in the tree. Puzzlemaker maps only use a
+small subset of the format - one token per line, no comments, flags or
+multi-line values. This lets us tokenise with plain string operations,
+then build the brushes and sides directly. Those are the bulk of the
+map - everything else is still passed through the regular code.
+
+If the map contains anything else, we raise FastParseError so the caller
+can fall back to the regular parser.
+"""
+from srctools import Property, VMF, Solid, Side, Entity, UVAxis
+
+import utils
+
+from typing import List, Tuple, Dict
+
+LOGGER = utils.getLogger(__name__)
+
+
+class FastParseError(ValueError):
+    """Raised if the file uses syntax outside what the Puzzlemaker produces."""
+
+
+class Block:
+    """A block in the file, with the keyvalues and child blocks kept apart."""
+    __slots__ = ['name', 'keys', 'blocks']
+
+    def __init__(self, name: str):
+        self.name = name
+        self.keys = []  # type: List[Tuple[str, str]]
+        self.blocks = []  # type: List[Block]
+
+    def as_prop(self) -> Property:
+        """Convert to a Property tree, for the parts we don't handle."""
+        return Property(
+            self.name,
+            [Property(key, value) for key, value in self.keys] +
+            [block.as_prop() for block in self.blocks]
+        )
+
+
+def parse_blocks(file) -> Block:
+    """Tokenise a Puzzlemaker VMF into blocks.
+
+    This only accepts 'name', '{', '}' and '"key" "value"' lines.
+    """
+    root = Block(None)
+    stack = [root]
+    block_name = None  # A name which is waiting for the '{'.
+
+    for line_num, line in enumerate(file, start=1):
+        line = line.strip()
+        if not line:
+            continue
+
+        first = line[0]
+        if first == '"':
+            # "key" "value" - there must be exactly 4 quotes.
+            if (
+                block_name is not None or
+                line[-1] != '"' or
+                line.count('"') != 4
+            ):
+                raise FastParseError(
+                    'Line {}: Invalid keyvalue'.format(line_num)
+                )
+            key, sep, value = line[1:-1].partition('" "')
+            if not sep:
+                raise FastParseError(
+                    'Line {}: Invalid keyvalue'.format(line_num)
+                )
+            stack[-1].keys.append((key, value))
+        elif first == '{':
+            if block_name is None or len(line) != 1:
+                raise FastParseError('Line {}: Unexpected "{{"'.format(line_num))
+            block = Block(block_name)
+            stack[-1].blocks.append(block)
+            stack.append(block)
+            block_name = None
+        elif first == '}':
+            if block_name is not None or len(line) != 1 or len(stack) == 1:
+                raise FastParseError('Line {}: Unexpected "}}"'.format(line_num))
+            stack.pop()
+        else:
+            if block_name is not None or not line.isidentifier():
+                raise FastParseError(
+                    'Line {}: Invalid block name'.format(line_num)
+                )
+            block_name = line
+
+    if block_name is not None or len(stack) != 1:
+        raise FastParseError('Unterminated block')
+    return root
+
+
+def _conv(keys: Dict[str, str], key: str, func, default):
+    """Convert a value, like Property.int() and Property.float() do."""
+    try:
+        return func(keys[key])
+    except (KeyError, ValueError):
+        return default
+
+
+def read_side(vmf: VMF, block: Block) -> Side:
+    """Build a brush side. This matches Side.parse()."""
+    if block.blocks:
+        # Displacements are rare, use the full code.
+        return Side.parse(vmf, block.as_prop())
+    keys = {key.casefold(): value for key, value in block.keys}
+
+    # "(x1 y1 z1) (x2 y2 z2) (x3 y3 z3)"
+    verts = keys.get('plane', '(0 0 0) (0 0 0) (0 0 0)')[1:-1].split(') (')
+    if len(verts) != 3:
+        raise FastParseError('Invalid plane "{}"'.format(keys['plane']))
+    planes = [vert.split(' ') for vert in verts]
+    for vert in planes:
+        if len(vert) != 3:
+            raise FastParseError('Invalid plane "{}"'.format(keys['plane']))
+
+    return Side(
+        vmf,
+        planes=[[float(x), float(y), float(z)] for x, y, z in planes],
+        des_id=_conv(keys, 'id', int, -1),
+        mat=keys.get('material', ''),
+        uaxis=UVAxis.parse(keys.get('uaxis', '[0 1 0 0] 0.25')),
+        vaxis=UVAxis.parse(keys.get('vaxis', '[0 0 -1 0] 0.25')),
+        rotation=_conv(keys, 'rotation', float, 0),
+        lightmap=_conv(keys, 'lightmapscale', int, 16),
+        smoothing=_conv(keys, 'smoothing_groups', int, 0),
+    )
+
+
+def read_solid(vmf: VMF, block: Block, hidden=False) -> Solid:
+    """Build a brush.
+
+    The sides are built here, the ID and editor block by Solid.parse().
+    """
+    sides = []
+    other = Block(block.name)
+    other.keys = block.keys
+    for child in block.blocks:
+        if child.name.casefold() == 'side':
+            sides.append(read_side(vmf, child))
+        else:
+            other.blocks.append(child)
+    solid = Solid.parse(vmf, other.as_prop(), hidden)
+    solid.sides = sides
+    return solid
+
+
+def split_brushes(block: Block) -> Tuple[Block, List[Tuple[Block, bool]]]:
+    """Separate the brushes in an entity from everything else.
+
+    This returns the rest of the entity, and each brush along with
+    whether it's hidden.
+    """
+    other = Block(block.name)
+    other.keys = block.keys
+    brushes = []
+    for child in block.blocks:
+        name = child.name.casefold()
+        if name == 'solid':
+            brushes.append((child, False))
+        elif name == 'hidden':
+            if child.keys:
+                raise FastParseError('Keyvalues in hidden block!')
+            brushes.extend((brush, True) for brush in child.blocks)
+        else:
+            other.blocks.append(child)
+    return other, brushes
+
+
+def read_ent(vmf: VMF, block: Block, hidden=False) -> Entity:
+    """Build an entity.
+
+    The brushes are built here, everything else by Entity.parse().
+    """
+    other, brushes = split_brushes(block)
+    solids = [
+        read_solid(vmf, brush, is_hidden)
+        for brush, is_hidden in brushes
+    ]
+    ent = Entity.parse(vmf, other.as_prop(), hidden)
+    ent.solids = solids
+    return ent
+
+
+def load_vmf(map_path: str) -> VMF:
+    """Read a Puzzlemaker VMF.
+
+    FastParseError is raised if it uses syntax we don't handle.
+    """
+    with open(map_path) as file:
+        root = parse_blocks(file)
+
+    # VMF.parse() creates the map from everything except the entities
+    # and brushes.
+    other = Block(None)
+    other.keys = root.keys
+    ents = []
+    world = None
+    for block in root.blocks:
+        name = block.name.casefold()
+        if name == 'entity':
+            ents.append((block, False))
+        elif name == 'hidden':
+            if block.keys:
+                raise FastParseError('Keyvalues in hidden block!')
+            ents.extend((ent, True) for ent in block.blocks)
+        elif name == 'world':
+            # If there's multiple, the last is used.
+            world = block
+        else:
+            other.blocks.append(block)
+
+    world_brushes = []
+    if world is not None:
+        world, world_brushes = split_brushes(world)
+        other.blocks.append(world)
+    # The world is created before the entities here, so entities and
+    # brushes without IDs (or with duplicate ones) are numbered differently
+    # to VMF.parse(). The Puzzlemaker always gives each a unique ID.
+    vmf = VMF.parse(other.as_prop())
+
+    for block, hidden in ents:
+        vmf.add_ent(read_ent(vmf, block, hidden))
+    vmf.brushes.extend(
+        read_solid(vmf, brush, hidden)
+        for brush, hidden in world_brushes
+    )
+    return vmf
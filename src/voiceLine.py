@@ -34,8 +34,8 @@ vmf_file = None  # type: VMF
 # The prefix for all voiceline instances.
 INST_PREFIX = 'instances/BEE2/voice/'
 
-# The location of the responses script.
-RESP_LOC = 'bee2/inject/response_data.nut'
+# The name of the responses script, in bee2/inject/.
+RESP_FILE = 'response_data.nut'
 
 RESP_HAS_NAMES = {
     'death_goo': 'goo',
@@ -478,12 +478,12 @@ def add_voice(
 
     if has_responses():
         LOGGER.info('Generating responses data..')
-        with open(RESP_LOC, 'w') as f:
+        with vbsp.open_inject(RESP_FILE) as f:
             generate_resp_script(f, allow_dings)
-    else:
+    elif not vbsp.BATCH_MODE:
         LOGGER.info('No responses data..')
         try:
-            os.remove(RESP_LOC)
+            os.remove(os.path.join('bee2', 'inject', RESP_FILE))
         except FileNotFoundError:
             pass
 
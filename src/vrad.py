@@ -1,23 +1,30 @@
+import utils
+# Do this very early, so we log the startup sequence.
+LOGGER = utils.init_logging('bee2/VRAD.log')
+utils.start_import_timer()
+
+import hashlib
 import os
 import os.path
 import shutil
 import subprocess
 import sys
 import logging
-from datetime import datetime
 from io import BytesIO
 from zipfile import ZipFile
 
 import srctools
-import utils
 from srctools import Property
 from srctools.bsp import BSP, BSP_LUMPS
 
+from typing import Iterable, Optional, Set
 
-LOGGER = utils.init_logging('bee2/VRAD.log')
 
 CONF = Property('Config', [])
 
+# If importing modules takes longer than this (in seconds), warn in the log.
+IMPORT_BUDGET = 0.5
+
 SCREENSHOT_DIR = os.path.join(
     '..',
     'portal2',  # This is hardcoded into P2, it won't change for mods.
@@ -69,6 +76,13 @@ INJECT_FILES = {
     'monitor_args.nut': 'scripts/vscripts/BEE2/mon_camera_args.nut',
 }
 
+# Generated files are saved here, named after a hash of the values used
+# to produce them. That way recompiles can reuse the previous result.
+GEN_CACHE_FOLDER = os.path.join('bee2', 'gen_cache')
+# The number of results to keep in the cache. The least recently used are
+# removed first.
+GEN_CACHE_SIZE = 8
+
 # Additional parts to add if we have a mdl file.
 MDL_ADDITIONAL_EXT = [
     '.sw.vtx',
@@ -389,6 +403,7 @@ def pack_file(zip_write, filename: str, suppress_error=False):
             )
             break
     else:
+        utils.count('vrad.missing_files')
         if not suppress_error:
             LOGGER.warning(
                 '"bee2/' + filename + '" not found! (May be OK if not custom)'
@@ -491,8 +506,86 @@ def gen_part_manifest(additional):
     LOGGER.info('Written new particles_manifest..')
 
 
+def cache_key(*parts: str) -> str:
+    """Produce a filename-safe hash of the given values.
+
+    The version is included, so updates discard old results.
+    """
+    # sha512 is the only algorithm included when frozen.
+    hasher = hashlib.sha512(utils.BEE_VERSION.encode('utf8'))
+    for part in parts:
+        hasher.update(part.encode('utf8'))
+        hasher.update(b'\0')  # Seperate parts, so 'ab', 'c' != 'a', 'bc'.
+    return hasher.hexdigest()[:32]
+
+
+def cache_fetch(name: str, dest: str) -> Optional[Set[str]]:
+    """Copy a cached file to dest, if it exists.
+
+    If found, this returns the files it requires packing. Otherwise None
+    is returned and the caller needs to generate the file.
+    """
+    cache_loc = os.path.join(GEN_CACHE_FOLDER, name)
+    try:
+        # The packlist is written last, so it marks a complete entry.
+        with open(cache_loc + '.pack') as f:
+            pack_list = {line.rstrip('\n') for line in f}
+        shutil.copyfile(cache_loc + '.txt', dest)
+        # Mark this as recently used, so it isn't pruned.
+        os.utime(cache_loc + '.pack')
+    except FileNotFoundError:
+        return None
+    pack_list.discard('')
+    return pack_list
+
+
+def cache_store(name: str, src: str, pack_list: Iterable[str]=()):
+    """Save a generated file into the cache, along with its packlist."""
+    cache_loc = os.path.join(GEN_CACHE_FOLDER, name)
+    try:
+        os.makedirs(GEN_CACHE_FOLDER, exist_ok=True)
+        shutil.copyfile(src, cache_loc + '.txt')
+        with open(cache_loc + '.pack', 'w') as f:
+            for file in sorted(pack_list):
+                f.write(file + '\n')
+    except OSError:
+        # Not a problem, we'll just need to regenerate next time.
+        LOGGER.warning('Could not cache "{}"!', name, exc_info=True)
+    cache_prune()
+
+
+def cache_prune():
+    """Remove the least recently used results, once the cache is full."""
+    try:
+        names = [
+            name[:-5] for name in os.listdir(GEN_CACHE_FOLDER)
+            if name.endswith('.pack')
+        ]
+    except OSError:
+        return
+    if len(names) <= GEN_CACHE_SIZE:
+        return
+    names.sort(
+        key=lambda name: os.path.getmtime(
+            os.path.join(GEN_CACHE_FOLDER, name + '.pack')
+        ),
+        reverse=True,
+    )
+    for name in names[GEN_CACHE_SIZE:]:
+        # Remove the packlist first, so a partial entry is never used.
+        for ext in ('.pack', '.txt'):
+            try:
+                os.remove(os.path.join(GEN_CACHE_FOLDER, name + ext))
+            except OSError:
+                pass
+
+
 def generate_music_script(data: Property, pack_list):
-    """Generate a soundscript file for music."""
+    """Generate a soundscript file for music.
+
+    The result is cached, since only the music and voice attributes
+    affect the output.
+    """
     # We also pack the filenames used for the tracks - that way funnel etc
     # only get packed when needed. Stock sounds are in VPKS or in aperturetag/,
     # we don't check there.
@@ -501,67 +594,100 @@ def generate_music_script(data: Property, pack_list):
 
     funnel = data.find_key('tbeam', '')
     bounce = data.find_key('bouncegel', '')
-    speed = data.find_key('speedgel', '')
 
     # The sounds must be present, and the items should be in the map.
-    has_funnel = funnel.value and (
+    has_funnel = bool(funnel.value) and (
         'funnel' in voice_attr or
         'excursionfunnel' in voice_attr
     )
-    has_bounce = bounce.value and (
+    has_bounce = bool(bounce.value) and (
         'bouncegel' in voice_attr or
         'bluegel' in voice_attr
     )
+
+    dest = os.path.join('bee2', 'inject', 'music_script.txt')
+    cache_name = 'music_' + cache_key(
+        ''.join(data.export()),
+        str(has_funnel),
+        str(has_bounce),
+    )
+
+    cached_files = cache_fetch(cache_name, dest)
+    if cached_files is not None:
+        LOGGER.info('Reusing cached music script.')
+        pack_list.update(cached_files)
+        return
+
+    music_files = set()
+    with open(dest, 'w') as file:
+        write_music_script(file, data, music_files, has_funnel, has_bounce)
+    cache_store(cache_name, dest, music_files)
+    pack_list.update(music_files)
+
+
+def write_music_script(
+    file,
+    data: Property,
+    pack_list: Set[str],
+    has_funnel: bool,
+    has_bounce: bool,
+):
+    """Write out the music soundscript.
+
+    has_funnel and has_bounce indicate if those tracks should be included.
+    """
+    funnel = data.find_key('tbeam', '')
+    bounce = data.find_key('bouncegel', '')
+    speed = data.find_key('speedgel', '')
     # Speed-gel sounds also play when flinging, so keep it always.
 
-    with open(os.path.join('bee2', 'inject', 'music_script.txt'), 'w') as file:
-        # Write the base music track
-        file.write(MUSIC_START.format(name='', vol='1'))
-        write_sound(file, data.find_key('base'), pack_list, snd_prefix='#*')
-        file.write(MUSIC_BASE)
-        # The 'soundoperators' section is still open now.
-
-        # Add the operators to play the auxilluary sounds..
-        if has_funnel:
-            file.write(MUSIC_FUNNEL_MAIN)
-        if has_bounce:
-            file.write(MUSIC_GEL_BOUNCE_MAIN)
-        if speed.value:
-            file.write(MUSIC_GEL_SPEED_MAIN)
-
-        # End the main sound block
-        file.write(MUSIC_END)
-
-        if has_funnel:
-            # Write the 'music.BEE2_funnel' sound entry
-            file.write('\n')
-            file.write(MUSIC_START.format(name='_funnel', vol='1'))
-            write_sound(file, funnel, pack_list, snd_prefix='*')
-            # Some tracks want the funnel music to sync with the normal
-            # track, others randomly choose a start.
-            file.write(
-                MUSIC_FUNNEL_SYNC_STACK
-                if data.bool('sync_funnel') else
-                MUSIC_FUNNEL_RAND_STACK
-            )
-            file.write(MUSIC_FUNNEL_UPDATE_STACK)
-
-        if has_bounce:
-            file.write('\n')
-            file.write(MUSIC_START.format(name='_gel_bounce', vol='0.5'))
-            write_sound(file, bounce, pack_list, snd_prefix='*')
-            # Fade in fast (we never get false positives, but fade out slow
-            # since this disables when falling back..
-            file.write(MUSIC_GEL_STACK.format(fadein=0.25, fadeout=1.5))
-
-        if speed.value:
-            file.write('\n')
-            file.write(MUSIC_START.format(name='_gel_speed', vol='0.5'))
-            write_sound(file, speed, pack_list, snd_prefix='*')
-            # We need to shut off the sound fast, so portals don't confuse it.
-            # Fade in slow so it doesn't make much sound (and also as we get
-            # up to speed). We stop almost immediately on gel too.
-            file.write(MUSIC_GEL_STACK.format(fadein=0.5, fadeout=0.1))
+    # Write the base music track
+    file.write(MUSIC_START.format(name='', vol='1'))
+    write_sound(file, data.find_key('base'), pack_list, snd_prefix='#*')
+    file.write(MUSIC_BASE)
+    # The 'soundoperators' section is still open now.
+
+    # Add the operators to play the auxilluary sounds..
+    if has_funnel:
+        file.write(MUSIC_FUNNEL_MAIN)
+    if has_bounce:
+        file.write(MUSIC_GEL_BOUNCE_MAIN)
+    if speed.value:
+        file.write(MUSIC_GEL_SPEED_MAIN)
+
+    # End the main sound block
+    file.write(MUSIC_END)
+
+    if has_funnel:
+        # Write the 'music.BEE2_funnel' sound entry
+        file.write('\n')
+        file.write(MUSIC_START.format(name='_funnel', vol='1'))
+        write_sound(file, funnel, pack_list, snd_prefix='*')
+        # Some tracks want the funnel music to sync with the normal
+        # track, others randomly choose a start.
+        file.write(
+            MUSIC_FUNNEL_SYNC_STACK
+            if data.bool('sync_funnel') else
+            MUSIC_FUNNEL_RAND_STACK
+        )
+        file.write(MUSIC_FUNNEL_UPDATE_STACK)
+
+    if has_bounce:
+        file.write('\n')
+        file.write(MUSIC_START.format(name='_gel_bounce', vol='0.5'))
+        write_sound(file, bounce, pack_list, snd_prefix='*')
+        # Fade in fast (we never get false positives, but fade out slow
+        # since this disables when falling back..
+        file.write(MUSIC_GEL_STACK.format(fadein=0.25, fadeout=1.5))
+
+    if speed.value:
+        file.write('\n')
+        file.write(MUSIC_START.format(name='_gel_speed', vol='0.5'))
+        write_sound(file, speed, pack_list, snd_prefix='*')
+        # We need to shut off the sound fast, so portals don't confuse it.
+        # Fade in slow so it doesn't make much sound (and also as we get
+        # up to speed). We stop almost immediately on gel too.
+        file.write(MUSIC_GEL_STACK.format(fadein=0.5, fadeout=0.1))
 
 
 def write_sound(file, snds: Property, pack_list, snd_prefix='*'):
@@ -710,6 +836,9 @@ def pack_content(path, is_peti):
     for _, file in inject_names:
         LOGGER.info(' # "' + file + '"')
 
+    utils.gauge('vrad.pack_files', len(files))
+    utils.gauge('vrad.inject_files', len(inject_names))
+
     LOGGER.info("Packing Files!")
     bsp_file = BSP(path)
     LOGGER.debug(' - Header read')
@@ -765,6 +894,7 @@ def find_screenshots():
 
 def mod_screenshots():
     """Modify the map's screenshot."""
+    from datetime import datetime
     mod_type = CONF['screenshot_type', 'PETI'].lower()
 
     if mod_type == 'cust':
@@ -906,6 +1036,7 @@ def run_vrad(args):
 
 def main(argv):
     LOGGER.info('BEE2 VRAD hook started!')
+    utils.log_import_times(LOGGER, IMPORT_BUDGET)
     args = " ".join(argv)
     fast_args = argv[1:]
     full_args = argv[1:]
@@ -969,7 +1100,8 @@ def main(argv):
     LOGGER.info('Final status: is_peti={}, edit_args={}', is_peti, edit_args)
 
     if '-no_pack' not in args:
-        pack_content(path, is_peti)
+        with utils.span('vrad.pack'):
+            pack_content(path, is_peti)
     else:
         LOGGER.warning("Packing files is disabled!")
 
@@ -978,13 +1110,15 @@ def main(argv):
 
     if edit_args:
         LOGGER.info("Forcing Cheap Lighting!")
-        run_vrad(fast_args)
+        with utils.span('vrad.run_vrad', fast=True):
+            run_vrad(fast_args)
     else:
         if is_peti:
             LOGGER.info("Publishing - Full lighting enabled! (or forced to do so)")
         else:
             LOGGER.info("Hammer map detected! Not forcing cheap lighting..")
-        run_vrad(full_args)
+        with utils.span('vrad.run_vrad', fast=False):
+            run_vrad(full_args)
 
     LOGGER.info("BEE2 VRAD hook finished!")
 